@@ -1,12 +1,62 @@
+import os
+from typing import AsyncIterator, Callable
+
 from aiohttp import web
 
+from api.admission import AdmissionControl
 from api.contexts import pg_context
+from api.metrics import RequestMetrics
+from api.middlewares import admission_middleware, metrics_middleware, read_your_writes_middleware
 from api.routes import set_up_routes
+from api.workers import serve_workers
 
 
-def start_servers(app_config):
-    app = web.Application()
+def create_app(app_config, data_context: Callable[[web.Application], AsyncIterator] = pg_context) -> web.Application:
+    """Create web application.
+
+    :param app_config: application config.
+    :type app_config: dict.
+    :param data_context: cleanup context setting up data service of application.
+    :type data_context: Callable[[web.Application], AsyncIterator], default pg_context.
+    :return: web application.
+    :rtype: web.Application.
+    """
+    request_metrics = RequestMetrics()
+    middlewares = [metrics_middleware(request_metrics)]
+    admission_config = app_config.get('admission')
+    admission = AdmissionControl(**admission_config) if admission_config else None
+    if admission:
+        # Shed requests are still recorded by metrics
+        middlewares.append(admission_middleware(admission))
+    read_your_writes_window = app_config.get('api', {}).get('read_your_writes_window')
+    if read_your_writes_window:
+        middlewares.append(read_your_writes_middleware(read_your_writes_window))
+
+    app = web.Application(middlewares=middlewares)
     app['config'] = app_config
-    app.cleanup_ctx.append(pg_context)
+    app['request_metrics'] = request_metrics
+    app['admission'] = admission
+    app.cleanup_ctx.append(data_context)
+    # Streams are ended before server waits for open handlers, which cleanup would otherwise wait for
+    app.on_shutdown.append(_end_live_results)
     set_up_routes(app)
-    web.run_app(app)
+    return app
+
+
+async def _end_live_results(app: web.Application):
+    live_results = app.get('live_results')
+    if live_results:
+        await live_results.close()
+
+
+def start_servers(app_config):
+    server_config = app_config.get('server', {})
+    host = server_config.get('host', '0.0.0.0')
+    port = server_config.get('port', 8080)
+    shutdown_timeout = server_config.get('shutdown_timeout', 60)
+    workers = server_config.get('workers', 1) or os.cpu_count()
+
+    if workers > 1:
+        serve_workers(app_config, workers, host=host, port=port, shutdown_timeout=shutdown_timeout)
+    else:
+        web.run_app(create_app(app_config), host=host, port=port, shutdown_timeout=shutdown_timeout)
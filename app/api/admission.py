@@ -0,0 +1,176 @@
+# Admission control of web requests
+import asyncio
+import collections
+from typing import Deque, Dict, Optional
+
+from aiohttp import web
+
+# Header through which clients pass seconds they are willing to wait for response
+TIMEOUT_HEADER = 'X-Request-Timeout'
+# Weight of the latest request in moving average of time requests hold their slot
+SERVICE_TIME_WEIGHT = 0.1
+
+
+class Overloaded(Exception):
+    """Request is rejected, as it could not be handled in time."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class Limiter:
+    """Limit of concurrently handled requests of one class with bounded queue of waiting requests.
+
+    A request is rejected right away when queue is full or when the time it is expected to wait, estimated from
+    moving average of time requests hold their slot, would exceed its deadline. Waiting stops at the deadline.
+    """
+
+    __slots__ = ('concurrency', 'queue_size', 'active', 'admitted', 'shed', 'service_time', '_waiters')
+
+    def __init__(self, concurrency: int, queue_size: int):
+        """Create limiter.
+
+        :param concurrency: number of requests handled at once.
+        :type concurrency: int.
+        :param queue_size: number of requests waiting for their turn.
+        :type queue_size: int.
+        """
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.active = 0
+        self.admitted = 0
+        self.shed: Dict[str, int] = {'queue_full': 0, 'deadline': 0}
+        self.service_time = 0.0
+        self._waiters: Deque[asyncio.Future] = collections.deque()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def stats(self) -> Dict[str, object]:
+        return {
+            'concurrency': self.concurrency,
+            'active': self.active,
+            'queue_depth': self.queue_depth,
+            'admitted': self.admitted,
+            'shed': dict(self.shed),
+        }
+
+    async def acquire(self, deadline: float):
+        """Wait for a slot of request.
+
+        :param deadline: loop time by which request should be handled.
+        :type deadline: float.
+        :raises Overloaded: if request is not admitted.
+        """
+        loop = asyncio.get_running_loop()
+        if self.active < self.concurrency and not self._waiters:
+            self._admit()
+            return
+        if len(self._waiters) >= self.queue_size:
+            self._shed('queue_full')
+        expected_wait = (len(self._waiters) + 1) * self.service_time / self.concurrency
+        if loop.time() + expected_wait >= deadline:
+            self._shed('deadline')
+
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, deadline - loop.time())
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            self._shed('deadline')
+        except asyncio.CancelledError:
+            # Slot handed over together with cancellation is passed on
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if not waiter.done() or waiter.cancelled():
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+
+    def release(self, service_time: Optional[float] = None):
+        """Release slot of request, handing it over to the first waiting request.
+
+        :param service_time: seconds request held its slot, used to estimate waiting of queued requests.
+        :type service_time: Optional[float], default None.
+        """
+        if service_time is not None:
+            self.service_time += (service_time - self.service_time) * SERVICE_TIME_WEIGHT
+        self.active -= 1
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._admit()
+                return
+
+    def _admit(self):
+        self.active += 1
+        self.admitted += 1
+
+    def _shed(self, reason: str):
+        self.shed[reason] += 1
+        raise Overloaded(reason)
+
+
+class AdmissionControl:
+    """Admission of web requests by class, reads being requests with safe methods and writes all other ones.
+
+    Every request gets a deadline, which is the configured timeout or shorter timeout requested by client. A
+    request which could not be admitted or could not get connection to database before its deadline is rejected
+    with 503 and Retry-After, so that overload results in fast failures instead of growing latency.
+    """
+
+    def __init__(self, reads: dict, writes: dict, timeout: float = 10, retry_after: int = 1):
+        """Create admission control.
+
+        :param reads: options of ``Limiter`` of reads.
+        :type reads: dict.
+        :param writes: options of ``Limiter`` of writes.
+        :type writes: dict.
+        :param timeout: seconds in which requests should be handled.
+        :type timeout: float, default 10.
+        :param retry_after: seconds after which rejected clients are asked to retry.
+        :type retry_after: int, default 1.
+        """
+        self.limiters = {'reads': Limiter(**reads), 'writes': Limiter(**writes)}
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.expired = 0
+
+    @property
+    def stats(self) -> Dict[str, object]:
+        return {
+            **{route_class: limiter.stats for route_class, limiter in self.limiters.items()},
+            'expired': self.expired,
+        }
+
+    @staticmethod
+    def route_class(request: web.Request) -> str:
+        return 'reads' if request.method in ('GET', 'HEAD', 'OPTIONS') else 'writes'
+
+    def deadline(self, request: web.Request) -> float:
+        """Get loop time by which request should be handled.
+
+        :param request: web request.
+        :type request: web.Request.
+        :return: deadline of request.
+        :rtype: float.
+        """
+        timeout = self.timeout
+        try:
+            timeout = min(timeout, float(request.headers[TIMEOUT_HEADER]))
+        except (KeyError, ValueError):
+            pass
+        return asyncio.get_running_loop().time() + timeout
+
+    def overloaded(self) -> web.HTTPServiceUnavailable:
+        """Get response to rejected request."""
+        return web.HTTPServiceUnavailable(headers={'Retry-After': str(self.retry_after)})
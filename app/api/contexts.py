@@ -1,8 +1,55 @@
 # Web application contexts
+from contextlib import asynccontextmanager, AsyncExitStack
+
+from aiohttp import web
+
+from modules.data_service.cache import QueryCache
+from modules.data_service.feed import ChangeFeed
+from modules.data_service.live import LiveResults
 from modules.data_service.polls import PollsDataService
+from modules.data_service.results import ResultsSummary
+from modules.data_service.votes import VoteBuffer
+from modules.data_service.warmup import WarmUp
 
 
 async def pg_context(app):
     """Controls initialization and disposal of application data service."""
-    async with PollsDataService(**app['config']['db']['postgres']):
-        yield
+    cache_config = app['config'].get('cache')
+    cache = QueryCache(**cache_config) if cache_config else None
+
+    async with PollsDataService(**app['config']['db']['postgres'], cache=cache) as polls_data_service:
+        async with AsyncExitStack() as stack:
+            # Feed outlives services, so that votes drained on shutdown are still published to other processes
+            change_feed_config = app['config'].get('change_feed')
+            app['change_feed'] = None
+            if change_feed_config:
+                app['change_feed'] = await stack.enter_async_context(
+                    ChangeFeed(polls_data_service, **change_feed_config)
+                )
+            async with polls_services(app, polls_data_service):
+                yield
+
+
+@asynccontextmanager
+async def polls_services(app: web.Application, polls_data_service: PollsDataService):
+    """Controls services built on top of given data service and exposes them to application.
+
+    Data service is warmed up in background, application is ready once it finishes. Buffered votes are drained
+    to data service before it is disposed.
+
+    :param app: web application.
+    :type app: web.Application.
+    :param polls_data_service: data service of polls.
+    :type polls_data_service: PollsDataService.
+    """
+    app['polls_data_service'] = polls_data_service
+    with ResultsSummary(polls_data_service, **app['config'].get('results', {})) as results_summary:
+        app['results_summary'] = results_summary
+        # Live results outlive vote buffer, so that votes drained on shutdown do not reach closed subscriptions
+        async with LiveResults(polls_data_service, results_summary, **app['config'].get('live', {})) as live_results:
+            app['live_results'] = live_results
+            async with VoteBuffer(polls_data_service, **app['config'].get('votes', {})) as vote_buffer:
+                app['vote_buffer'] = vote_buffer
+                async with WarmUp(polls_data_service, **app['config'].get('warm_up', {})) as warm_up:
+                    app['warm_up'] = warm_up
+                    yield
@@ -0,0 +1,180 @@
+# Web request metrics and their Prometheus exposition
+from typing import Dict, Iterator, Tuple
+
+from aiohttp import web
+
+from api.admission import AdmissionControl
+from common.metrics import Histogram, RequestTiming, render_family
+from modules.data_service.live import LiveResults
+from modules.data_service.polls import PollsDataService
+
+# Route of requests not matching any resource
+UNMATCHED_ROUTE = 'unmatched'
+# Methods recorded by their name, any other method is recorded as ``OTHER_METHOD``, so clients can't add series
+KNOWN_METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+OTHER_METHOD = 'OTHER'
+
+
+class RouteMetrics:
+    """Metrics of requests of one method to one route."""
+
+    __slots__ = ('in_flight', 'duration', 'db_duration', 'db_statements', 'serialization_duration', 'responses')
+
+    def __init__(self):
+        self.in_flight = 0
+        self.duration = Histogram()
+        self.db_duration = Histogram()
+        self.db_statements = 0
+        self.serialization_duration = Histogram()
+        self.responses: Dict[int, int] = {}
+
+    def observe(self, duration: float, timing: RequestTiming, status: int):
+        """Record finished request.
+
+        :param duration: seconds request took.
+        :type duration: float.
+        :param timing: time request spent in database and serialization.
+        :type timing: RequestTiming.
+        :param status: HTTP status of response.
+        :type status: int.
+        """
+        self.duration.observe(duration)
+        self.db_duration.observe(timing.db_seconds)
+        self.db_statements += timing.db_statements
+        self.serialization_duration.observe(timing.serialization_seconds)
+        self.responses[status] = self.responses.get(status, 0) + 1
+
+
+class RequestMetrics:
+    """Metrics of web requests per route and method.
+
+    Metrics of a route and method are allocated on its first request, so recording further requests does not
+    allocate memory.
+    """
+
+    def __init__(self):
+        self._routes: Dict[Tuple[str, str], RouteMetrics] = {}
+
+    def route(self, request: web.Request) -> Tuple[str, RouteMetrics]:
+        """Get name of route of request together with metrics of its method and route.
+
+        :param request: web request.
+        :type request: web.Request.
+        :return: name of route and its metrics.
+        :rtype: Tuple[str, RouteMetrics].
+        """
+        resource = request.match_info.route.resource
+        name = resource.canonical if resource is not None else UNMATCHED_ROUTE
+        method = request.method if request.method in KNOWN_METHODS else OTHER_METHOD
+        metrics = self._routes.get((name, method))
+        if metrics is None:
+            metrics = self._routes[(name, method)] = RouteMetrics()
+        return name, metrics
+
+    def render(self) -> Iterator[str]:
+        """Render metrics in Prometheus text exposition format."""
+        routes = [({'route': route, 'method': method}, metrics) for (route, method), metrics in self._routes.items()]
+        yield from render_family(
+            'polls_http_requests_in_flight', 'gauge', 'Requests being handled.',
+            ((labels, metrics.in_flight) for labels, metrics in routes),
+        )
+        yield from render_family(
+            'polls_http_request_duration_seconds', 'histogram', 'Time of handling requests.',
+            ((labels, metrics.duration) for labels, metrics in routes),
+        )
+        yield from render_family(
+            'polls_http_request_db_duration_seconds', 'histogram', 'Time requests spent executing statements.',
+            ((labels, metrics.db_duration) for labels, metrics in routes),
+        )
+        yield from render_family(
+            'polls_http_request_db_statements_total', 'counter', 'Statements executed by requests.',
+            ((labels, metrics.db_statements) for labels, metrics in routes),
+        )
+        yield from render_family(
+            'polls_http_request_serialization_duration_seconds', 'histogram', 'Time requests spent encoding JSON.',
+            ((labels, metrics.serialization_duration) for labels, metrics in routes),
+        )
+        yield from render_family(
+            'polls_http_responses_total', 'counter', 'Responses by HTTP status.',
+            (
+                ({**labels, 'status': str(status)}, count)
+                for labels, metrics in routes
+                for status, count in metrics.responses.items()
+            ),
+        )
+
+
+def render_data_service(polls_data_service: PollsDataService) -> Iterator[str]:
+    """Render metrics of statements and connection pools of data service in Prometheus text exposition format."""
+    databases = [('primary', polls_data_service.pool_stats, polls_data_service.statement_timing)]
+    databases.extend(
+        (replica.name, replica.pool_stats, replica.statement_timing) for replica in polls_data_service.replicas
+    )
+    databases = [database for database in databases if database[1] is not None]
+
+    yield from render_family(
+        'polls_db_statement_duration_seconds', 'histogram', 'Time of executing statements by route of request.',
+        (
+            sample
+            for name, _, statement_timing in databases
+            for sample in statement_timing.samples({'database': name})
+        ),
+    )
+    yield from render_family(
+        'polls_db_pool_checked_out', 'gauge', 'Connections checked out of pool.',
+        (({'database': name}, pool_stats.stats['checked_out']) for name, pool_stats, _ in databases),
+    )
+    yield from render_family(
+        'polls_db_pool_waiters', 'gauge', 'Callers waiting for connection from pool.',
+        (({'database': name}, pool_stats.waiters) for name, pool_stats, _ in databases),
+    )
+    yield from render_family(
+        'polls_db_pool_checkout_wait_seconds', 'histogram', 'Time of waiting for connection from pool.',
+        (({'database': name}, pool_stats.wait_time) for name, pool_stats, _ in databases),
+    )
+
+
+def render_live_results(live_results: LiveResults) -> Iterator[str]:
+    """Render metrics of subscribers to live results in Prometheus text exposition format."""
+    yield from render_family(
+        'polls_live_subscribers', 'gauge', 'Subscribers to live results.', [({}, live_results.subscribers)]
+    )
+    yield from render_family(
+        'polls_live_events_total', 'counter', 'Events serialized for subscribers.', [({}, live_results.events)]
+    )
+    yield from render_family(
+        'polls_live_deliveries_total', 'counter', 'Events queued to subscribers.', [({}, live_results.deliveries)]
+    )
+    yield from render_family(
+        'polls_live_overflows_total', 'counter', 'Events dropped as subscribers fell behind.',
+        [({}, live_results.overflows)],
+    )
+
+
+def render_admission(admission: AdmissionControl) -> Iterator[str]:
+    """Render metrics of admission control in Prometheus text exposition format."""
+    limiters = [({'class': route_class}, limiter) for route_class, limiter in admission.limiters.items()]
+    yield from render_family(
+        'polls_admission_active', 'gauge', 'Requests holding slot of their class.',
+        ((labels, limiter.active) for labels, limiter in limiters),
+    )
+    yield from render_family(
+        'polls_admission_queue_depth', 'gauge', 'Requests waiting for slot of their class.',
+        ((labels, limiter.queue_depth) for labels, limiter in limiters),
+    )
+    yield from render_family(
+        'polls_admission_admitted_total', 'counter', 'Requests admitted.',
+        ((labels, limiter.admitted) for labels, limiter in limiters),
+    )
+    yield from render_family(
+        'polls_admission_shed_total', 'counter', 'Requests rejected before admission by reason.',
+        (
+            ({**labels, 'reason': reason}, count)
+            for labels, limiter in limiters
+            for reason, count in limiter.shed.items()
+        ),
+    )
+    yield from render_family(
+        'polls_admission_expired_total', 'counter', 'Admitted requests rejected as no connection was free in time.',
+        [({}, admission.expired)],
+    )
@@ -0,0 +1,111 @@
+# Web application middlewares
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+from aiohttp import web
+
+from api.admission import AdmissionControl, Overloaded
+from api.metrics import RequestMetrics
+from common.metrics import timing_request
+from connectors.db.base import DeadlineExceeded
+from modules.data_service.polls import PollsDataService
+
+Handler = Callable[[web.Request], Awaitable[web.StreamResponse]]
+
+READ_YOUR_WRITES_HEADER = 'X-Read-Your-Writes'
+READ_YOUR_WRITES_COOKIE = 'polls_read_your_writes'
+
+
+def read_your_writes_middleware(window: int):
+    """Create middleware serving reads of client by primary database for a while after it wrote data.
+
+    Clients opt in per request with "X-Read-Your-Writes" header. A response to a request which wrote data
+    carries a cookie opting client in for next ``window`` seconds.
+
+    :param window: seconds for which reads of client are served by primary database after a write.
+    :type window: int.
+    :return: middleware.
+    :rtype: Callable.
+    """
+    @web.middleware
+    async def middleware(request: web.Request, handler: Handler) -> web.StreamResponse:
+        opted_in = READ_YOUR_WRITES_HEADER in request.headers or READ_YOUR_WRITES_COOKIE in request.cookies
+
+        with PollsDataService.read_from_primary(opted_in), PollsDataService.tracking_writes():
+            response = await handler(request)
+            has_written = PollsDataService.has_written()
+
+        if has_written and not response.prepared:
+            response.set_cookie(READ_YOUR_WRITES_COOKIE, '1', max_age=window, httponly=True)
+        return response
+
+    return middleware
+
+
+def metrics_middleware(metrics: RequestMetrics):
+    """Create middleware recording latency, database and serialization time of requests per route and method.
+
+    :param metrics: metrics to record requests to.
+    :type metrics: RequestMetrics.
+    :return: middleware.
+    :rtype: Callable.
+    """
+    @web.middleware
+    async def middleware(request: web.Request, handler: Handler) -> web.StreamResponse:
+        route, route_metrics = metrics.route(request)
+        route_metrics.in_flight += 1
+        status = web.HTTPInternalServerError.status_code
+        started_at = time.perf_counter()
+
+        with timing_request(route) as timing:
+            try:
+                response = await handler(request)
+                status = response.status
+                return response
+            except web.HTTPException as error:
+                status = error.status
+                raise
+            finally:
+                route_metrics.in_flight -= 1
+                route_metrics.observe(time.perf_counter() - started_at, timing, status)
+
+    return middleware
+
+
+def admission_middleware(admission: AdmissionControl):
+    """Create middleware admitting requests through limiter of their class and shedding them under overload.
+
+    Views with ``admission_exempt`` attribute set, e.g. health checks and long-lived streams, are not limited.
+    Deadline of request is propagated to data service, which gives up waiting for connections at it.
+
+    :param admission: admission control of application.
+    :type admission: AdmissionControl.
+    :return: middleware.
+    :rtype: Callable.
+    """
+    @web.middleware
+    async def middleware(request: web.Request, handler: Handler) -> web.StreamResponse:
+        if getattr(request.match_info.handler, 'admission_exempt', False):
+            return await handler(request)
+
+        loop = asyncio.get_running_loop()
+        limiter = admission.limiters[admission.route_class(request)]
+        deadline = admission.deadline(request)
+        try:
+            await limiter.acquire(deadline)
+        except Overloaded:
+            raise admission.overloaded()
+
+        started_at = loop.time()
+        try:
+            with PollsDataService.with_deadline(deadline):
+                return await handler(request)
+        except DeadlineExceeded:
+            # Nothing is written before connection is checked out, so request may be retried safely
+            admission.expired += 1
+            raise admission.overloaded()
+        finally:
+            limiter.release(loop.time() - started_at)
+
+    return middleware
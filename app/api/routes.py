@@ -1,9 +1,20 @@
 from aiohttp import web
 
-from api.views import Index, QuestionList, QuestionSingle
+from api.views import (
+    Index, Health, Ready, QuestionList, QuestionImport, QuestionSingle, QuestionResults, QuestionLive, ChoiceVote,
+    Stats, Metrics,
+)
 
 
 def set_up_routes(app: web.Application):
     app.router.add_view('/', Index)
+    app.router.add_view('/health', Health)
+    app.router.add_view('/ready', Ready)
     app.router.add_view('/questions', QuestionList)
+    app.router.add_view('/questions/import', QuestionImport)
     app.router.add_view('/questions/{question_id}', QuestionSingle)
+    app.router.add_view(r'/questions/{question_id:\d+}/results', QuestionResults)
+    app.router.add_view(r'/questions/{question_id:\d+}/live', QuestionLive)
+    app.router.add_view(r'/questions/{question_id:\d+}/choices/{choice_id:\d+}/vote', ChoiceVote)
+    app.router.add_view('/stats', Stats)
+    app.router.add_view('/metrics', Metrics)
@@ -1,41 +1,442 @@
 # Polls views
+import asyncio
+import datetime
+import zlib
+from contextlib import aclosing
 from http import HTTPStatus
+from typing import Any, AsyncIterator, Dict, Mapping, Optional, Tuple, Type
 
 from aiohttp import web
+from aiohttp.helpers import ETag
+from aiohttp.http_exceptions import LineTooLong
+from sqlalchemy import Column
+from sqlalchemy.orm import relationship
 
-from common.utils import to_json
-from modules.data_service.models import Question, Choice
+from api.admission import AdmissionControl
+from api.metrics import RequestMetrics, render_admission, render_data_service, render_live_results
+from common.constants import MAX_BULK_UPDATE_SIZE, MAX_ID, MAX_PAGE_SIZE
+from common.metrics import timing_serialization
+from common.serializers import dumps, loads
+from modules.data_service.filters import In, Ordering, Prefix, Range
+from modules.data_service.live import KEEPALIVE, LiveResults
+from modules.data_service.models import BaseTable, Question, Choice, selected_column_attrs
 from modules.data_service.polls import PollsDataService
+from modules.data_service.results import ResultsSummary
+from modules.data_service.votes import VoteBuffer
+from modules.data_service.warmup import WarmUp
+
+
+def _get_int_query_param(
+    request: web.Request, name: str, minimum: Optional[int] = None, maximum: Optional[int] = None
+) -> Optional[int]:
+    """Get integer query parameter of request.
+
+    :param request: web request.
+    :type request: web.Request.
+    :param name: name of query parameter.
+    :type name: str.
+    :param minimum: minimal allowed value.
+    :type minimum: Optional[int], default None.
+    :param maximum: maximal allowed value.
+    :type maximum: Optional[int], default None.
+    :return: value of query parameter or None if it is not present.
+    :rtype: Optional[int].
+    """
+    try:
+        value = int(request.query[name])
+    except KeyError:
+        return None
+    except ValueError:
+        raise web.HTTPBadRequest(reason=f'Query parameter {name} should be an integer')
+    if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+        raise web.HTTPBadRequest(reason=f'Query parameter {name} should be between {minimum} and {maximum}')
+    return value
+
+
+def _get_relations(request: web.Request, entity: Type[BaseTable]) -> Tuple[relationship]:
+    """Get relationships of entity requested to be expanded through "expand" query parameter.
+
+    :param request: web request.
+    :type request: web.Request.
+    :param entity: entity whose relationships should be expanded.
+    :type entity: Type[BaseTable].
+    :return: relationships to expand.
+    :rtype: Tuple[relationship].
+    """
+    try:
+        expand_entities = request.query['expand'].split(',')
+    except KeyError:
+        expand_entities = tuple()
+
+    return tuple(getattr(entity, expand_entity) for expand_entity in expand_entities)
+
+
+def _get_fields(request: web.Request, entity: Type[BaseTable], relations: Tuple[relationship]) -> Tuple[Column]:
+    """Get sparse fieldset requested through "fields" query parameter of entity and "fields[<relation>]" query
+    parameters of its expanded relations, e.g. "fields=id,question_text&fields[choices]=id,votes".
+
+    :param request: web request.
+    :type request: web.Request.
+    :param entity: entity whose fields are requested.
+    :type entity: Type[BaseTable].
+    :param relations: expanded relationships of entity.
+    :type relations: Tuple[relationship].
+    :return: requested columns, empty if all columns are requested.
+    :rtype: Tuple[Column].
+    """
+    fieldsets = {'fields': entity}
+    fieldsets.update((f'fields[{relation.key}]', relation.property.mapper.class_) for relation in relations)
+    fields = []
+    for name in request.query:
+        if not name.startswith('fields'):
+            continue
+        if name not in fieldsets:
+            raise web.HTTPBadRequest(reason=f'Query parameter {name} should name an expanded relation')
+        fieldset_entity = fieldsets[name]
+        columns = {attr.key: getattr(fieldset_entity, attr.key) for attr in selected_column_attrs(fieldset_entity, ())}
+        for key in filter(None, request.query[name].split(',')):
+            try:
+                fields.append(columns[key])
+            except KeyError:
+                raise web.HTTPBadRequest(reason=f'Unsupported field: {key}, supported are: {", ".join(columns)}')
+    return tuple(fields)
+
+
+def _is_valid_text(value: Any, column: Column) -> bool:
+    """Check if value is a non-empty string fitting into text column."""
+    return isinstance(value, str) and 0 < len(value) <= column.type.length
+
+
+def _get_imported_question(question: Any) -> Dict[str, Any]:
+    """Get question with its choices from decoded line of import.
+
+    :param question: object with "question_text", optional "pub_date" and optional "choices" list of objects with
+        "choice_text" and optional "votes".
+    :type question: Any.
+    :return: question mapping.
+    :rtype: Dict[str, Any].
+    :raises ValueError: if question or its choices are invalid.
+    """
+    question_text = question['question_text']
+    if not _is_valid_text(question_text, Question.question_text):
+        raise ValueError(
+            f'question_text should be a non-empty string of at most {Question.question_text.type.length} characters'
+        )
+    pub_date = question.get('pub_date')
+    choices = []
+    for choice in question.get('choices', ()):
+        choice_text = choice['choice_text']
+        if not _is_valid_text(choice_text, Choice.choice_text):
+            raise ValueError(
+                f'choice_text should be a non-empty string of at most {Choice.choice_text.type.length} characters'
+            )
+        votes = int(choice.get('votes', 0))
+        if not 0 <= votes <= MAX_ID:
+            raise ValueError(f'votes should be between 0 and {MAX_ID}')
+        choices.append({'choice_text': choice_text, 'votes': votes})
+    return {
+        'question_text': question_text,
+        'pub_date': datetime.date.fromisoformat(pub_date[:10]) if pub_date else None,
+        'choices': tuple(choices),
+    }
+
+
+def _get_question_changes(changes: Any) -> Dict[Column, Any]:
+    """Get values of columns of question from changes of bulk update.
+
+    :param changes: mapping of names of columns to their new values.
+    :type changes: Any.
+    :return: mapping of columns to values.
+    :rtype: Dict[Column, Any].
+    """
+    if not isinstance(changes, dict) or not changes:
+        raise web.HTTPBadRequest(reason='Changes of question should be a non-empty object')
+    columns = {'question_text': Question.question_text, 'pub_date': Question.pub_date}
+    set_values = {}
+    for name, value in changes.items():
+        if name not in columns:
+            raise web.HTTPBadRequest(reason=f'Unsupported change: {name}, supported are: {", ".join(columns)}')
+        set_values[columns[name]] = value
+    if Question.question_text in set_values:
+        if not _is_valid_text(set_values[Question.question_text], Question.question_text):
+            raise web.HTTPBadRequest(
+                reason='Change question_text should be a non-empty string of at most '
+                f'{Question.question_text.type.length} characters'
+            )
+    if Question.pub_date in set_values:
+        try:
+            set_values[Question.pub_date] = datetime.date.fromisoformat(set_values[Question.pub_date])
+        except (TypeError, ValueError):
+            raise web.HTTPBadRequest(reason='Change pub_date should be an ISO date')
+    return set_values
+
+
+def _get_question_conditions(request: web.Request) -> Dict[Column, Any]:
+    """Get conditions on questions from query parameters of request.
+
+    Supported are "id" with comma separated list of ids, "pub_date_from" and "pub_date_to" with inclusive ISO
+    dates and "question_text_prefix".
+
+    :param request: web request.
+    :type request: web.Request.
+    :return: mapping of columns to filters.
+    :rtype: Dict[Column, Any].
+    """
+    conditions = {}
+    query = request.query
+    if 'id' in query:
+        listed_ids = query['id'].split(',')
+        if len(listed_ids) > MAX_PAGE_SIZE:
+            raise web.HTTPBadRequest(reason=f'Query parameter id should list at most {MAX_PAGE_SIZE} ids')
+        try:
+            ids = tuple(int(question_id) for question_id in listed_ids)
+        except ValueError:
+            raise web.HTTPBadRequest(reason='Query parameter id should be a comma separated list of integers')
+        if not all(0 < question_id <= MAX_ID for question_id in ids):
+            raise web.HTTPBadRequest(reason=f'Query parameter id should list ids between 1 and {MAX_ID}')
+        conditions[Question.id] = In(ids)
+
+    if 'pub_date_from' in query or 'pub_date_to' in query:
+        try:
+            bounds = {
+                bound: datetime.date.fromisoformat(query[name])
+                for bound, name in (('lower', 'pub_date_from'), ('upper', 'pub_date_to'))
+                if name in query
+            }
+        except ValueError:
+            raise web.HTTPBadRequest(reason='Query parameters pub_date_from and pub_date_to should be ISO dates')
+        conditions[Question.pub_date] = Range(**bounds)
+
+    if query.get('question_text_prefix'):
+        conditions[Question.question_text] = Prefix(query['question_text_prefix'])
+    return conditions
+
+
+def _get_ordering(request: web.Request, columns: Mapping[str, Column]) -> Ordering:
+    """Get ordering requested through "order" query parameter, e.g. "-pub_date,id" with "-" for descending order.
+
+    :param request: web request.
+    :type request: web.Request.
+    :param columns: mapping of names to columns which entities may be ordered by.
+    :type columns: Mapping[str, Column].
+    :return: columns to order by with conditions if order is descending.
+    :rtype: Ordering.
+    """
+    ordering = []
+    for name in filter(None, request.query.get('order', '').split(',')):
+        descending = name.startswith('-')
+        try:
+            ordering.append((columns[name.lstrip('-')], descending))
+        except KeyError:
+            raise web.HTTPBadRequest(reason=f'Unsupported order: {name}, supported are: {", ".join(columns)}')
+    return tuple(ordering)
+
+
+def _get_etag(request: web.Request, version: str) -> ETag:
+    """Get entity tag of response to request for data of given version.
+
+    :param request: web request.
+    :type request: web.Request.
+    :param version: version of data response is built from.
+    :type version: str.
+    :return: weak entity tag, as order of unpaginated rows is not guaranteed.
+    :rtype: ETag.
+    """
+    return ETag(value=f'{version}-{zlib.crc32(request.query_string.encode()):08x}', is_weak=True)
+
+
+def _get_tables(entity: Type[BaseTable], relations: Tuple[relationship]) -> Tuple[str]:
+    """Get names of tables which data of entity with given relationships is built from."""
+    return (entity.__tablename__, *(relation.property.mapper.class_.__tablename__ for relation in relations))
+
+
+def _is_not_modified(request: web.Request, etag: ETag) -> bool:
+    """Check if client already has representation with given entity tag.
+
+    :param request: web request.
+    :type request: web.Request.
+    :param etag: entity tag of current representation.
+    :type etag: ETag.
+    :return: True if representation of client matches current one.
+    :rtype: bool.
+    """
+    return any(tag.value in (etag.value, '*') for tag in (request.if_none_match or ()))
+
+
+def _json_response(data: Any, status: int = HTTPStatus.OK) -> web.Response:
+    """Create response with JSON serialized data.
+
+    :param data: data to serialize.
+    :type data: Any.
+    :param status: HTTP status of response.
+    :type status: int, default HTTPStatus.OK.
+    :return: web response.
+    :rtype: web.Response.
+    """
+    with timing_serialization():
+        body = dumps(data)
+    return web.Response(body=body, status=status, content_type='application/json')
+
+
+def _not_modified(etag: ETag) -> web.Response:
+    response = web.Response(status=HTTPStatus.NOT_MODIFIED)
+    response.etag = etag
+    return response
 
 
 class Index(web.View):
     """Index web view."""
 
     async def get(self) -> web.Response:
-        return web.Response(text=to_json({'message': 'Hello Aiohttp!'}), status=HTTPStatus.OK)
+        return _json_response({'message': 'Hello Aiohttp!'})
+
+
+class Health(web.View):
+    """View for liveness checks, answered without touching data service."""
+
+    # Probes and monitoring are answered under overload too
+    admission_exempt = True
+
+    async def get(self) -> web.Response:
+        return _json_response({'status': 'ok'})
+
+
+class Ready(web.View):
+    """View for readiness checks, reporting application ready once its data service is warmed up."""
+
+    admission_exempt = True
+
+    async def get(self) -> web.Response:
+        warm_up: WarmUp = self.request.app['warm_up']
+        if not warm_up.ready:
+            return _json_response({'status': 'warming_up'}, status=HTTPStatus.SERVICE_UNAVAILABLE)
+        return _json_response({'status': 'ready'})
 
 
 class QuestionList(web.View):
     """View for manipulating list of questions."""
 
-    async def get(self) -> web.Response:
-        polls_data_service: PollsDataService = PollsDataService.get_instance()
+    # Columns questions may be ordered by
+    order_columns = {'id': Question.id, 'pub_date': Question.pub_date, 'question_text': Question.question_text}
 
-        try:
-            expand_entities = self.request.query['expand'].split(',')
-        except KeyError:
-            expand_entities = tuple()
+    async def get(self) -> web.StreamResponse:
+        polls_data_service: PollsDataService = self.request.app['polls_data_service']
+        include_relations = _get_relations(self.request, Question)
+        etag = _get_etag(self.request, polls_data_service.versions.version(_get_tables(Question, include_relations)))
+        if _is_not_modified(self.request, etag):
+            return _not_modified(etag)
 
-        include_relations = tuple(getattr(Question, expand_entity) for expand_entity in expand_entities)
-        questions = await polls_data_service.get(entity=Question, with_relations=include_relations)
+        limit = _get_int_query_param(self.request, 'limit', minimum=1, maximum=MAX_PAGE_SIZE)
+        after_id = _get_int_query_param(self.request, 'after_id', minimum=0, maximum=MAX_ID)
+        conditions = _get_question_conditions(self.request)
+        order_by = _get_ordering(self.request, self.order_columns)
+        fields = _get_fields(self.request, Question, include_relations)
+        # Keyset cursor of pages is question id, so pages can follow only ordering by id
+        paginated_by_id = all(column is Question.id for column, _ in order_by)
+        if after_id is not None and not paginated_by_id:
+            raise web.HTTPBadRequest(reason='Query parameter after_id can be used only with ordering by id')
+        stream_format = self.request.query.get('stream')
 
-        return web.Response(
-            text=to_json(tuple(question.as_dict(include_relations=include_relations) for question in questions)),
-            status=HTTPStatus.OK
+        if stream_format:
+            return await self._stream(
+                stream_format=stream_format,
+                include_relations=include_relations,
+                conditions=conditions,
+                limit=limit,
+                after_id=after_id,
+                order_by=order_by,
+                fields=fields,
+                etag=etag,
+            )
+
+        # Page is encoded by database, so questions and their choices are neither loaded nor encoded here
+        page = await polls_data_service.get_json(
+            entity=Question,
+            conditions=conditions,
+            with_relations=include_relations,
+            limit=limit,
+            after=after_id,
+            order_by=order_by,
+            fields=fields,
         )
 
+        response = web.Response(body=page.payload, status=HTTPStatus.OK, content_type='application/json')
+        response.etag = etag
+        if limit and page.count == limit and paginated_by_id:
+            next_page_url = self.request.rel_url.update_query(after_id=page.last_key)
+            response.headers['Link'] = f'<{next_page_url}>; rel="next"'
+        return response
+
+    async def _stream(
+        self,
+        stream_format: str,
+        include_relations: Tuple[relationship],
+        conditions: Dict[Column, Any],
+        limit: Optional[int],
+        after_id: Optional[int],
+        order_by: Ordering,
+        fields: Tuple[Column],
+        etag: ETag,
+    ) -> web.StreamResponse:
+        """Stream questions to client as they are fetched from database.
+
+        :param stream_format: format of streamed body, either "ndjson" or "json".
+        :type stream_format: str.
+        :param include_relations: additional relationships to load with questions.
+        :type include_relations: Tuple[relationship].
+        :param conditions: conditions questions should satisfy.
+        :type conditions: Dict[Column, Any].
+        :param limit: maximum number of questions to stream.
+        :type limit: Optional[int].
+        :param after_id: id of question after which questions should be streamed.
+        :type after_id: Optional[int].
+        :param order_by: columns to order questions by.
+        :type order_by: Ordering.
+        :param fields: sparse fieldset of questions and their relations.
+        :type fields: Tuple[Column].
+        :param etag: entity tag of streamed representation.
+        :type etag: ETag.
+        :return: streamed response.
+        :rtype: web.StreamResponse.
+        """
+        polls_data_service: PollsDataService = self.request.app['polls_data_service']
+
+        if stream_format == 'ndjson':
+            content_type, opening, separator, terminator, closing = 'application/x-ndjson', b'', b'', b'\n', b''
+        elif stream_format == 'json':
+            content_type, opening, separator, terminator, closing = 'application/json', b'[', b',', b'', b']'
+        else:
+            raise web.HTTPBadRequest(reason=f'Unsupported stream format: {stream_format}')
+
+        response = web.StreamResponse(status=HTTPStatus.OK, headers={'Content-Type': content_type})
+        response.etag = etag
+        await response.prepare(self.request)
+        if opening:
+            await response.write(opening)
+
+        questions = polls_data_service.stream(
+            entity=Question,
+            conditions=conditions,
+            with_relations=include_relations,
+            limit=limit,
+            after=after_id,
+            order_by=order_by,
+            fields=fields,
+        )
+        encode = Question.encoder(include_relations, fields)
+        prefix = b''
+        async with aclosing(questions):
+            async for question in questions:
+                await response.write(prefix + dumps(encode(question)) + terminator)
+                prefix = separator
+
+        if closing:
+            await response.write(closing)
+        await response.write_eof()
+        return response
+
     async def post(self) -> web.Response:
-        polls_data_service: PollsDataService = PollsDataService.get_instance()
+        polls_data_service: PollsDataService = self.request.app['polls_data_service']
         wrapped_questions = []
         posted_questions = await self.request.json()
 
@@ -47,19 +448,98 @@ class QuestionList(web.View):
 
         await polls_data_service.create(entities=wrapped_questions)
 
-        return web.Response(
-            text=to_json(
-                tuple(question.as_dict(include_relations=(Question.choices,)) for question in wrapped_questions)
-            ),
-            status=HTTPStatus.OK
+        return _json_response(tuple(map(Question.encoder((Question.choices,)), wrapped_questions)))
+
+    async def patch(self) -> web.Response:
+        """Update many questions at once from list of objects with "id" of question and its "changes"."""
+        polls_data_service: PollsDataService = self.request.app['polls_data_service']
+        try:
+            patches = await self.request.json()
+        except ValueError:
+            patches = None
+        if not isinstance(patches, list) or len(patches) > MAX_BULK_UPDATE_SIZE:
+            raise web.HTTPBadRequest(reason=f'Body should be a list of at most {MAX_BULK_UPDATE_SIZE} changes')
+
+        changes = []
+        for patch in patches:
+            question_id = patch.get('id') if isinstance(patch, dict) else None
+            # Booleans are integers as well
+            if not isinstance(question_id, int) or isinstance(question_id, bool) or not 0 < question_id <= MAX_ID:
+                raise web.HTTPBadRequest(reason='Every change should have an integer id of question')
+            changes.append((patch['id'], _get_question_changes(patch.get('changes'))))
+        if len({question_id for question_id, _ in changes}) < len(changes):
+            raise web.HTTPBadRequest(reason='Every question should be changed at most once')
+
+        # Rows are returned as mappings, so no entities are built
+        updated_questions = await polls_data_service.update_many(entity=Question, changes=changes)
+
+        return _json_response(updated_questions)
+
+
+class QuestionImport(web.View):
+    """View for bulk import of questions from NDJSON body, one question with its choices per line."""
+
+    async def post(self) -> web.Response:
+        polls_data_service: PollsDataService = self.request.app['polls_data_service']
+        import_config = self.request.app['config'].get('import', {})
+
+        imported = await polls_data_service.import_questions(
+            questions=self._read_questions(), **import_config
         )
 
+        return _json_response({'imported': imported})
+
+    async def _read_questions(self) -> AsyncIterator[Mapping[str, Any]]:
+        """Read questions from request body as it arrives.
+
+        :return: async iterator over questions.
+        :rtype: AsyncIterator[Mapping[str, Any]].
+        """
+        line_number = 0
+        while True:
+            try:
+                line = await self.request.content.readline()
+            except (ValueError, LineTooLong):
+                # Line exceeds limit of buffered request body
+                raise web.HTTPBadRequest(reason=f'Line {line_number + 1} is too long')
+            if not line:
+                break
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                question = _get_imported_question(loads(line))
+            except (ValueError, TypeError, KeyError, AttributeError) as error:
+                raise web.HTTPBadRequest(reason=f'Invalid question on line {line_number}: {error!r}')
+            yield question
+
 
 class QuestionSingle(web.View):
     """View for manipulating single question."""
 
+    async def get(self) -> web.Response:
+        polls_data_service: PollsDataService = self.request.app['polls_data_service']
+        question_id = int(self.request.match_info['question_id'])
+        include_relations = _get_relations(self.request, Question)
+        etag = _get_etag(
+            self.request,
+            polls_data_service.versions.version(_get_tables(Question, include_relations), scope=question_id),
+        )
+        if _is_not_modified(self.request, etag):
+            return _not_modified(etag)
+
+        questions = await polls_data_service.get(
+            entity=Question, conditions={Question.id: question_id}, with_relations=include_relations
+        )
+        if not questions:
+            raise web.HTTPNotFound()
+
+        response = _json_response(questions[0].as_dict(include_relations=include_relations))
+        response.etag = etag
+        return response
+
     async def put(self) -> web.Response:
-        polls_data_service: PollsDataService = PollsDataService.get_instance()
+        polls_data_service: PollsDataService = self.request.app['polls_data_service']
         question_id = int(self.request.match_info['question_id'])
         question_attrs_to_update = await self.request.json()
 
@@ -74,13 +554,10 @@ class QuestionSingle(web.View):
             returning=True,
         )
 
-        return web.Response(
-            text=to_json(tuple(question.as_dict() for question in updated_questions)),
-            status=HTTPStatus.OK
-        )
+        return _json_response(tuple(map(Question.encoder(), updated_questions)))
 
     async def delete(self) -> web.Response:
-        polls_data_service: PollsDataService = PollsDataService.get_instance()
+        polls_data_service: PollsDataService = self.request.app['polls_data_service']
         question_id = int(self.request.match_info['question_id'])
 
         await polls_data_service.delete(
@@ -90,3 +567,125 @@ class QuestionSingle(web.View):
         )
 
         return web.Response(status=HTTPStatus.NO_CONTENT)
+
+
+class QuestionResults(web.View):
+    """View for results of question voting."""
+
+    async def get(self) -> web.Response:
+        polls_data_service: PollsDataService = self.request.app['polls_data_service']
+        results_summary: ResultsSummary = self.request.app['results_summary']
+        question_id = int(self.request.match_info['question_id'])
+        if question_id > MAX_ID:
+            raise web.HTTPNotFound()
+        tables = _get_tables(Question, (Question.choices,))
+        etag = _get_etag(self.request, polls_data_service.versions.version(tables, scope=question_id))
+        if _is_not_modified(self.request, etag):
+            return _not_modified(etag)
+
+        results = await results_summary.get(question_id)
+        if results is None:
+            raise web.HTTPNotFound()
+
+        response = web.Response(body=results.payload, status=HTTPStatus.OK, content_type='application/json')
+        response.etag = etag
+        return response
+
+
+class QuestionLive(web.View):
+    """View streaming live results of question voting as server-sent events."""
+
+    # Subscriptions last long and wait for no connection
+    admission_exempt = True
+
+    async def get(self) -> web.StreamResponse:
+        results_summary: ResultsSummary = self.request.app['results_summary']
+        live_results: LiveResults = self.request.app['live_results']
+        question_id = int(self.request.match_info['question_id'])
+        if question_id > MAX_ID or await results_summary.get(question_id) is None:
+            raise web.HTTPNotFound()
+
+        response = web.StreamResponse(headers={'Cache-Control': 'no-cache'})
+        response.content_type = 'text/event-stream'
+        await response.prepare(self.request)
+        async with live_results.subscribe(question_id) as subscription:
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=live_results.keepalive_interval)
+                except asyncio.TimeoutError:
+                    event = KEEPALIVE
+                if event is None:
+                    break
+                await response.write(event)
+        await response.write_eof()
+        return response
+
+
+class ChoiceVote(web.View):
+    """View for voting for question choice."""
+
+    async def post(self) -> web.Response:
+        vote_buffer: VoteBuffer = self.request.app['vote_buffer']
+        results_summary: ResultsSummary = self.request.app['results_summary']
+        question_id = int(self.request.match_info['question_id'])
+        choice_id = int(self.request.match_info['choice_id'])
+        # Ids beyond range of database integers could not exist and would be rejected by database
+        if question_id > MAX_ID or choice_id > MAX_ID:
+            raise web.HTTPNotFound()
+        # Votes are checked against choices of question before they are buffered, so that they are not lost later
+        results = await results_summary.get(question_id)
+        if results is None or choice_id not in results.votes:
+            raise web.HTTPNotFound()
+
+        vote_buffer.add(question_id=question_id, choice_id=choice_id, pub_date=results.pub_date)
+
+        return web.Response(status=HTTPStatus.ACCEPTED)
+
+
+class Stats(web.View):
+    """View for runtime statistics of data service."""
+
+    admission_exempt = True
+
+    async def get(self) -> web.Response:
+        polls_data_service: PollsDataService = self.request.app['polls_data_service']
+        pool_stats = polls_data_service.pool_stats
+        cache = polls_data_service.cache
+        change_feed = self.request.app.get('change_feed')
+        admission: Optional[AdmissionControl] = self.request.app['admission']
+
+        return _json_response({
+            'pool': pool_stats.stats if pool_stats else None,
+            'replicas': polls_data_service.replicas.stats,
+            'cache': cache.stats if cache else None,
+            'statements': polls_data_service.statements.stats,
+            'coalescing': polls_data_service.flights.stats,
+            'results': self.request.app['results_summary'].stats,
+            'change_feed': change_feed.stats if change_feed else None,
+            'warm_up': self.request.app['warm_up'].stats,
+            'live': self.request.app['live_results'].stats,
+            'admission': admission.stats if admission else None,
+        })
+
+
+class Metrics(web.View):
+    """View for runtime metrics in Prometheus text exposition format."""
+
+    admission_exempt = True
+
+    async def get(self) -> web.Response:
+        request_metrics: RequestMetrics = self.request.app['request_metrics']
+        polls_data_service: PollsDataService = self.request.app['polls_data_service']
+
+        live_results: LiveResults = self.request.app['live_results']
+        admission: Optional[AdmissionControl] = self.request.app['admission']
+
+        lines = [
+            *request_metrics.render(), *render_data_service(polls_data_service), *render_live_results(live_results),
+        ]
+        if admission:
+            lines.extend(render_admission(admission))
+        lines.append('')
+        return web.Response(
+            text='\n'.join(lines), content_type='text/plain', headers={'X-Content-Type-Options': 'nosniff'}
+        )
@@ -0,0 +1,129 @@
+# Pre-fork serving of web application by multiple worker processes
+import asyncio
+import copy
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Dict
+
+from aiohttp import web
+from aiohttp.web_runner import GracefulExit
+
+logger = logging.getLogger(__name__)
+
+# Options of connection pool which are split between workers
+POOL_OPTIONS = ('pool_size', 'max_overflow', 'minsize', 'maxsize')
+# Seconds to wait before restarting worker, so that a worker failing on start does not spin
+RESTART_DELAY = 1
+
+
+def worker_config(app_config: dict, workers: int) -> dict:
+    """Get config of one of workers, whose connection pools together are as large as configured ones.
+
+    :param app_config: application config.
+    :type app_config: dict.
+    :param workers: number of workers.
+    :type workers: int.
+    :return: application config of worker.
+    :rtype: dict.
+    """
+    config = copy.deepcopy(app_config)
+    postgres_config = config['db']['postgres']
+    for option in POOL_OPTIONS:
+        if postgres_config.get(option) is not None:
+            # Rounded up, so that every worker gets at least one connection
+            postgres_config[option] = -(-postgres_config[option] // workers)
+    return config
+
+
+def serve_workers(app_config: dict, workers: int, host: str, port: int, shutdown_timeout: float = 60):
+    """Serve web application by given number of forked worker processes sharing one port.
+
+    Every worker binds its own listening socket with SO_REUSEPORT, so the kernel balances connections between them,
+    and creates its application, data service and connection pools after fork. Workers exiting unexpectedly are
+    restarted. On SIGINT or SIGTERM workers stop accepting connections, finish handling requests, drain buffered
+    votes and close their pools.
+
+    :param app_config: application config.
+    :type app_config: dict.
+    :param workers: number of workers.
+    :type workers: int.
+    :param host: host to listen on.
+    :type host: str.
+    :param port: port to listen on.
+    :type port: int.
+    :param shutdown_timeout: seconds for which workers wait for requests to finish on shutdown.
+    :type shutdown_timeout: float, default 60.
+    """
+    config = worker_config(app_config, workers)
+    children: Dict[int, int] = {}
+    stopping = False
+
+    def spawn(index: int):
+        pid = os.fork()
+        if pid:
+            children[pid] = index
+            return
+        exit_code = 0
+        try:
+            _serve_worker(config, index, host, port, shutdown_timeout)
+        except BaseException:
+            logger.exception('Worker %d failed', index)
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        if stopping:
+            return
+        stopping = True
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for index in range(workers):
+        spawn(index)
+
+    while children:
+        pid, status = os.wait()
+        index = children.pop(pid, None)
+        if index is not None and not stopping:
+            logger.warning('Worker %d exited with status %d, restarting it', index, os.waitstatus_to_exitcode(status))
+            time.sleep(RESTART_DELAY)
+            if not stopping:
+                spawn(index)
+
+
+def _serve_worker(app_config: dict, index: int, host: str, port: int, shutdown_timeout: float):
+    # Imported here, as package of application imports this module
+    from api import create_app
+
+    # Shutdown is coordinated by parent, which turns interrupt from terminal into termination of every worker
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    loop.add_signal_handler(signal.SIGTERM, _raise_graceful_exit)
+
+    sock = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+
+    web.run_app(
+        create_app(app_config),
+        sock=sock,
+        shutdown_timeout=shutdown_timeout,
+        handle_signals=False,
+        print=print if index == 0 else None,
+        # Loop with handler of termination, otherwise application would run on a new loop without it
+        loop=loop,
+    )
+
+
+def _raise_graceful_exit():
+    raise GracefulExit()
@@ -1,3 +1,9 @@
 import pathlib
 
 BASE_DIR = pathlib.Path(__file__).parent.parent.parent
+
+MAX_PAGE_SIZE = 1000
+# The largest id of database integer column
+MAX_ID = 2 ** 31 - 1
+# Maximum number of questions updated by one bulk request
+MAX_BULK_UPDATE_SIZE = 1000
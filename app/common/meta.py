@@ -1,4 +1,5 @@
 # Module for meta classes
+import os
 import threading
 
 
@@ -9,8 +10,14 @@ class SingletonMeta(type):
         cls.__instance = None
         cls.__lock = threading.Lock()
         cls.get_instance = classmethod(lambda c: c.__instance)  # Global access point
+        # Forked process builds its own instance, as resources of parent's one, e.g. connections, can't be shared
+        os.register_at_fork(after_in_child=cls.__forget_instance)
         super().__init__(*args, **kwargs)
 
+    def __forget_instance(cls):
+        cls.__instance = None
+        cls.__lock = threading.Lock()
+
     def __call__(cls, *args, **kwargs):
         with cls.__lock:
             if not cls.__instance:
@@ -0,0 +1,121 @@
+# Module for runtime metrics
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, Iterator, Mapping, Optional, Sequence, Tuple, Union
+
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Histogram of observed values with fixed upper bounds of buckets.
+
+    Bucket counters are preallocated, so observing a value does not allocate memory.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        # The last counter is for values above the largest bucket bound
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self) -> Dict[str, object]:
+        """Get cumulative bucket counts, sum and count of observed values."""
+        cumulative, total = {}, 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            cumulative[str(bound)] = total
+        cumulative['+Inf'] = self.count
+        return {'buckets': cumulative, 'sum': self.sum, 'count': self.count}
+
+
+class RequestTiming:
+    """Time spent by one web request in database and in serialization of response."""
+
+    __slots__ = ('route', 'db_seconds', 'db_statements', 'serialization_seconds')
+
+    def __init__(self, route: str):
+        self.route = route
+        self.db_seconds = 0.0
+        self.db_statements = 0
+        self.serialization_seconds = 0.0
+
+
+# Timing of web request handled in current context
+request_timing_var: ContextVar[Optional[RequestTiming]] = ContextVar('request_timing', default=None)
+
+
+@contextmanager
+def timing_request(route: str) -> Iterator[RequestTiming]:
+    """Attribute time measured in current context to web request of given route."""
+    timing = RequestTiming(route)
+    token = request_timing_var.set(timing)
+    try:
+        yield timing
+    finally:
+        request_timing_var.reset(token)
+
+
+def current_request_timing() -> Optional[RequestTiming]:
+    """Get timing of web request handled in current context, if any."""
+    return request_timing_var.get()
+
+
+@contextmanager
+def timing_serialization():
+    """Attribute time of enclosed block to serialization of response of current web request."""
+    timing = request_timing_var.get()
+    if timing is None:
+        yield
+        return
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.serialization_seconds += time.perf_counter() - started_at
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Mapping[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label_value(value)}"' for name, value in labels.items()) + '}'
+
+
+def render_family(
+    name: str, kind: str, description: str, samples: Iterable[Tuple[Mapping[str, str], Union[float, Histogram]]]
+) -> Iterator[str]:
+    """Render metric family in Prometheus text exposition format.
+
+    :param name: name of metric.
+    :type name: str.
+    :param kind: type of metric, e.g. "counter", "gauge" or "histogram".
+    :type kind: str.
+    :param description: help text of metric.
+    :type description: str.
+    :param samples: labels of every series of metric with its value or histogram.
+    :type samples: Iterable[Tuple[Mapping[str, str], Union[float, Histogram]]].
+    :return: lines of exposition.
+    :rtype: Iterator[str].
+    """
+    yield f'# HELP {name} {description}'
+    yield f'# TYPE {name} {kind}'
+    for labels, value in samples:
+        if not isinstance(value, Histogram):
+            yield f'{name}{_format_labels(labels)} {value}'
+            continue
+        snapshot = value.snapshot()
+        for bound, count in snapshot['buckets'].items():
+            yield f'{name}_bucket{_format_labels({**labels, "le": bound})} {count}'
+        yield f'{name}_sum{_format_labels(labels)} {snapshot["sum"]}'
+        yield f'{name}_count{_format_labels(labels)} {snapshot["count"]}'
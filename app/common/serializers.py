@@ -0,0 +1,62 @@
+# JSON serialization
+import datetime
+import decimal
+import json
+from typing import Any, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on installed packages
+    orjson = None
+
+BACKEND = 'orjson' if orjson else 'json'
+
+
+def encode_python_object(obj: Any) -> Any:
+    """Convert Python object which is not natively supported by JSON encoder to supported one.
+
+    :param obj: Some object.
+    :type obj: Any.
+    :return: JSON serializable object.
+    :rtype: Any.
+    """
+    if isinstance(obj, set):
+        return list(obj)
+    elif isinstance(obj, decimal.Decimal):
+        return float(obj)
+    elif isinstance(obj, datetime.date):
+        return str(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def dumps(obj: Any, indent: Optional[int] = None) -> bytes:
+    """Serialize obj to JSON formatted bytes.
+
+    orjson is used if it is installed, otherwise standard json module is used.
+
+    :param obj: Some object.
+    :type obj: Any.
+    :param indent: Indent of a new line in JSON, output is compact if not given (orjson supports only 2).
+    :type indent: Optional[int], default None.
+    :return: UTF-8 encoded JSON.
+    :rtype: bytes.
+    """
+    if orjson:
+        return orjson.dumps(obj, default=encode_python_object, option=orjson.OPT_INDENT_2 if indent else 0)
+    separators = None if indent else (',', ':')
+    return json.dumps(
+        obj, default=encode_python_object, indent=indent, separators=separators, ensure_ascii=False
+    ).encode()
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Deserialize JSON document.
+
+    :param data: JSON document.
+    :type data: Union[bytes, str].
+    :return: deserialized object.
+    :rtype: Any.
+    """
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,76 @@
+# Module for coalescing of concurrent calls
+import asyncio
+import contextvars
+from typing import Awaitable, Callable, Dict, Hashable, Iterable, TypeVar
+
+T = TypeVar('T')
+
+
+class _Flight:
+    """Call in progress shared by its waiters."""
+
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces identical concurrent calls, so only one of them is executed and its outcome is shared.
+
+    Outcome is forgotten as soon as the call finishes, so callers arriving later start a new call. A call is
+    cancelled only when all its waiters are cancelled. It runs in context of caller which started it, except for
+    isolated context variables, which are unset, as they belong to that one caller only.
+    """
+
+    def __init__(self, isolated_vars: Iterable[contextvars.ContextVar] = ()):
+        """Create coalescing of calls.
+
+        :param isolated_vars: context variables describing one caller, e.g. its deadline, set to None for calls.
+        :type isolated_vars: Iterable[contextvars.ContextVar], default ().
+        """
+        self._isolated_vars = tuple(isolated_vars)
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {'in_flight': len(self._flights), 'calls': self.calls, 'coalesced': self.coalesced}
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """Execute call or join identical call which is already in progress.
+
+        :param key: key identifying identical calls.
+        :type key: Hashable.
+        :param call: function starting call.
+        :type call: Callable[[], Awaitable[T]].
+        :return: result of call.
+        :rtype: T.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            context = contextvars.copy_context()
+            for var in self._isolated_vars:
+                context.run(var.set, None)
+            # Task copies context it is created in
+            flight = self._flights[key] = _Flight(context.run(asyncio.ensure_future, call()))
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                # Nobody waits for the result anymore
+                flight.task.cancel()
+                self._forget(key, flight)
+
+    def _forget(self, key: Hashable, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
@@ -1,16 +1,72 @@
-from contextlib import asynccontextmanager
+import asyncio
+import os
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Iterable, Optional, TypeVar
 
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 
+from common.metrics import request_timing_var
+from connectors.db.pool import PoolStats
+from connectors.db.replicas import ReplicaSet, ROUND_ROBIN
+from connectors.db.timing import StatementTiming
+
+# Errors on which replica is considered unhealthy
+REPLICA_ERRORS = (OSError, DBAPIError, PoolTimeoutError, asyncio.TimeoutError)
+
+# Condition if reads of current context should be served by primary database
+_read_from_primary: ContextVar[bool] = ContextVar('read_from_primary', default=False)
+# Condition if data was written in current context
+_has_written: ContextVar[bool] = ContextVar('has_written', default=False)
+# Loop time by which connections should be checked out in current context, e.g. deadline of web request
+_deadline: ContextVar[Optional[float]] = ContextVar('deadline', default=None)
+# Variables of context bound to one web request, which reads shared by concurrent requests do not inherit
+REQUEST_BOUND_VARS = (_deadline, request_timing_var)
+
+T = TypeVar('T')
+
+
+class DeadlineExceeded(Exception):
+    """Connection could not be checked out before deadline of current context."""
+
 
 class BaseDataService:
     """Base class for data service."""
     _engine: AsyncEngine = None
+    # Process which created engine, connections of its pool can't be used by forked processes
+    _engine_pid: int = None
+    _pool_stats: PoolStats = None
+    _statement_timing: StatementTiming = None
+    _replicas: ReplicaSet = None
 
-    def __init__(self, url, **kwargs):
+    def __init__(
+        self,
+        url,
+        replica_urls: Iterable[str] = (),
+        replica_selection: str = ROUND_ROBIN,
+        replica_eject_seconds: float = 30,
+        replica_lag: float = 1,
+        **kwargs,
+    ):
+        if self._engine and self._engine_pid != os.getpid():
+            # Engine was inherited through fork, its connections are left to parent
+            self._engine.sync_engine.dispose(close=False)
+            for replica in self._replicas:
+                replica.engine.sync_engine.dispose(close=False)
+            type(self)._engine = None
         if not self._engine:
             type(self)._engine: AsyncEngine = create_async_engine(url, **kwargs)
+            type(self)._engine_pid = os.getpid()
+            type(self)._pool_stats = PoolStats(self._engine)
+            type(self)._statement_timing = StatementTiming(self._engine)
+            type(self)._replicas = ReplicaSet(
+                replica_urls, selection=replica_selection, eject_seconds=replica_eject_seconds, **kwargs
+            )
+
+        # Data changed this recently may be missing from replicas, so it is read from primary database
+        self.replica_lag = replica_lag
 
     async def __aenter__(self):
         return self
@@ -20,14 +76,155 @@ class BaseDataService:
 
     async def close_pool(self):
         await self._engine.dispose()
+        await self._replicas.dispose()
+
+    @property
+    def pool_stats(self) -> PoolStats:
+        return self._pool_stats
+
+    @property
+    def statement_timing(self) -> StatementTiming:
+        return self._statement_timing
+
+    @property
+    def replicas(self) -> ReplicaSet:
+        return self._replicas
 
     @property
     def session(self) -> sessionmaker:
         return sessionmaker(self._engine, AsyncSession, expire_on_commit=False)
 
+    @staticmethod
+    @contextmanager
+    def read_from_primary(enabled: bool = True):
+        """Serve reads of current context by primary database, e.g. to read own writes."""
+        token = _read_from_primary.set(enabled)
+        try:
+            yield
+        finally:
+            _read_from_primary.reset(token)
+
+    @staticmethod
+    def reads_from_primary() -> bool:
+        """Check if reads of current context are served by primary database."""
+        return _read_from_primary.get()
+
+    @staticmethod
+    @contextmanager
+    def tracking_writes():
+        """Track writes of data separately for current context, e.g. for one web request."""
+        token = _has_written.set(False)
+        try:
+            yield
+        finally:
+            _has_written.reset(token)
+
+    @staticmethod
+    def has_written() -> bool:
+        """Check if data was written in current context."""
+        return _has_written.get()
+
+    @staticmethod
+    def mark_written():
+        """Register that data was written in current context."""
+        _has_written.set(True)
+
+    @staticmethod
+    @contextmanager
+    def with_deadline(deadline: Optional[float]):
+        """Give up waiting for connections of current context at given loop time.
+
+        :param deadline: loop time after which ``DeadlineExceeded`` is raised instead of waiting, no limit if None.
+        :type deadline: Optional[float].
+        """
+        token = _deadline.set(deadline)
+        try:
+            yield
+        finally:
+            _deadline.reset(token)
+
+    @staticmethod
+    async def until_deadline(awaitable: Awaitable[T]) -> T:
+        """Wait for awaitable at most until deadline of current context.
+
+        :param awaitable: awaitable to wait for, it is cancelled at deadline.
+        :type awaitable: Awaitable[T].
+        :return: result of awaitable.
+        :rtype: T.
+        :raises DeadlineExceeded: if deadline passes first.
+        """
+        deadline = _deadline.get()
+        if deadline is None:
+            return await awaitable
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(awaitable, max(deadline - loop.time(), 0))
+        except asyncio.TimeoutError:
+            if loop.time() < deadline:
+                raise
+            raise DeadlineExceeded()
+
+    @staticmethod
+    async def _checkout(session: AsyncSession):
+        """Check out connection of session, waiting for it at most until deadline of current context."""
+        deadline = _deadline.get()
+        if deadline is None:
+            await session.connection()
+            return
+        remaining = deadline - asyncio.get_running_loop().time()
+        if remaining <= 0:
+            raise DeadlineExceeded()
+        try:
+            await asyncio.wait_for(session.connection(), remaining)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded()
+
     @asynccontextmanager
     async def transaction(self):
         async with self.session() as session:
             async with session.begin():
+                async with self._pool_stats.measure_checkout():
+                    await self._checkout(session)
                 yield session
                 await session.commit()
+
+    @asynccontextmanager
+    async def read_transaction(self, from_primary: bool = False):
+        """Transaction for read only queries.
+
+        It is served by one of replicas if there are any available, otherwise by primary database. Replicas
+        failing to provide connection are ejected for a while and the next candidate is tried.
+
+        :param from_primary: condition if transaction should be served by primary database regardless of context.
+        :type from_primary: bool, default False.
+        """
+        if from_primary or _read_from_primary.get():
+            candidates = ()
+        else:
+            candidates = self._replicas.candidates()
+
+        for replica in candidates:
+            session = replica.session()
+            try:
+                async with replica.pool_stats.measure_checkout():
+                    await self._checkout(session)
+            except REPLICA_ERRORS:
+                await session.close()
+                self._replicas.eject(replica)
+                continue
+            except BaseException:
+                await session.close()
+                raise
+
+            async with session:
+                try:
+                    yield session
+                except DBAPIError as error:
+                    if error.connection_invalidated:
+                        self._replicas.eject(replica)
+                    raise
+                await session.commit()
+            return
+
+        async with self.transaction() as session:
+            yield session
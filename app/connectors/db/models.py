@@ -1,22 +1,80 @@
+from typing import Tuple
+
 from sqlalchemy import (
-    MetaData, Table, Column, ForeignKey, Integer, String, Date
+    MetaData, Table, Column, ForeignKeyConstraint, Index, Integer, PrimaryKeyConstraint, String, Date,
+    UniqueConstraint,
 )
 
-meta = MetaData()
+# Column questions and their choices are partitioned by
+PARTITION_COLUMN = 'pub_date'
 
-question = Table(
-    'question', meta,
 
-    Column('id', Integer, primary_key=True),
-    Column('question_text', String(200), nullable=False),
-    Column('pub_date', Date, nullable=False)
-)
+def _define_tables(meta: MetaData, partitioned: bool) -> Tuple[Table, Table]:
+    """Define tables of questions and choices.
 
-choice = Table(
-    'choice', meta,
+    Choices carry publication date of their question and reference question by id together with it, so that both
+    tables may be range partitioned by publication date, whose partitions then hold a question with its choices.
+    Primary keys of partitioned tables include publication date, as PostgreSQL requires.
 
-    Column('id', Integer, primary_key=True),
-    Column('choice_text', String(200), nullable=False),
-    Column('votes', Integer, server_default='0', nullable=False),
-    Column('question_id', Integer, ForeignKey('question.id', ondelete='CASCADE'))
-)
+    :param meta: metadata tables are defined in.
+    :type meta: MetaData.
+    :param partitioned: condition if tables are partitioned.
+    :type partitioned: bool.
+    :return: tables of questions and choices.
+    :rtype: Tuple[Table, Table].
+    """
+    partition_options = {'postgresql_partition_by': f'RANGE ({PARTITION_COLUMN})'} if partitioned else {}
+    question = Table(
+        'question', meta,
+
+        Column('id', Integer, autoincrement=True),
+        Column('question_text', String(200), nullable=False),
+        Column('pub_date', Date, nullable=False),
+        PrimaryKeyConstraint('id', 'pub_date') if partitioned else PrimaryKeyConstraint('id'),
+        # Target of references from choices, it is the primary key of partitioned table
+        *(() if partitioned else (UniqueConstraint('id', 'pub_date', name='uq_question_id_pub_date'),)),
+        **partition_options,
+    )
+
+    choice = Table(
+        'choice', meta,
+
+        Column('id', Integer, autoincrement=True),
+        Column('choice_text', String(200), nullable=False),
+        Column('votes', Integer, server_default='0', nullable=False),
+        Column('question_id', Integer),
+        Column('pub_date', Date, nullable=False),
+        PrimaryKeyConstraint('id', 'pub_date') if partitioned else PrimaryKeyConstraint('id'),
+        # Changed publication date of question moves its choices along
+        ForeignKeyConstraint(
+            ('question_id', 'pub_date'), ('question.id', 'question.pub_date'),
+            name='fk_choice_question', ondelete='CASCADE', onupdate='CASCADE',
+        ),
+        **partition_options,
+    )
+    return question, choice
+
+
+def _define_indexes(question: Table, choice: Table) -> Tuple[Index, Index, Index]:
+    return (
+        # Loading of choices of questions looks them up by question
+        Index('ix_choice_question_id', choice.c.question_id),
+        # Filtering and ordering of questions by publication date
+        Index('ix_question_pub_date', question.c.pub_date),
+        # Filtering of questions by text prefix, pattern operators make it usable with any collation
+        Index(
+            'ix_question_question_text_pattern',
+            question.c.question_text,
+            postgresql_ops={'question_text': 'varchar_pattern_ops'},
+        ),
+    )
+
+
+meta = MetaData()
+question, choice = _define_tables(meta, partitioned=False)
+choice_question_id_index, question_pub_date_index, question_text_pattern_index = _define_indexes(question, choice)
+
+# The same tables partitioned by publication date, indexes of partitioned tables are created on every partition
+partitioned_meta = MetaData()
+partitioned_question, partitioned_choice = _define_tables(partitioned_meta, partitioned=True)
+partitioned_indexes = _define_indexes(partitioned_question, partitioned_choice)
@@ -0,0 +1,229 @@
+# Maintenance of range partitions of questions and their choices by publication date
+import datetime
+import os
+import re
+import zipfile
+from typing import Iterable, Iterator, List, NamedTuple
+
+# Partitioned tables, referenced table goes first
+TABLES = ('question', 'choice')
+INTERVALS = ('year', 'month')
+ARCHIVE_SUFFIX = '.zip'
+# Questions and choices looked up by id only, like single question or its votes, are probed in every partition
+MAX_PARTITIONS = 64
+_PARTITION_NAME = re.compile(r'p(\d{8})_(\d{8})')
+
+
+class Partition(NamedTuple):
+    """Range of publication dates, whose questions and their choices are kept in partitions of the same name."""
+
+    lower: datetime.date
+    upper: datetime.date
+
+    @property
+    def suffix(self) -> str:
+        return f'p{self.lower:%Y%m%d}_{self.upper:%Y%m%d}'
+
+    def table(self, table: str) -> str:
+        return f'{table}_{self.suffix}'
+
+    @property
+    def bounds(self) -> str:
+        return f"FROM ('{self.lower.isoformat()}') TO ('{self.upper.isoformat()}')"
+
+    @classmethod
+    def parse(cls, suffix: str) -> 'Partition':
+        """Get partition from suffix of names of its tables or archive.
+
+        :param suffix: suffix like ``p20190101_20200101``.
+        :type suffix: str.
+        :return: partition.
+        :rtype: Partition.
+        :raises ValueError: if suffix is not the one of partition.
+        """
+        match = _PARTITION_NAME.fullmatch(suffix)
+        if not match:
+            raise ValueError(f'{suffix!r} is not a partition name')
+        return cls(*(datetime.datetime.strptime(bound, '%Y%m%d').date() for bound in match.groups()))
+
+
+def partitions_between(start: datetime.date, end: datetime.date, interval: str = 'year') -> Iterator[Partition]:
+    """Get partitions of given interval covering range of publication dates.
+
+    :param start: the earliest publication date.
+    :type start: datetime.date.
+    :param end: the latest publication date.
+    :type end: datetime.date.
+    :param interval: interval of partition, one of ``INTERVALS``.
+    :type interval: str, default 'year'.
+    :return: iterator over partitions.
+    :rtype: Iterator[Partition].
+    """
+    lower = start.replace(month=1, day=1) if interval == 'year' else start.replace(day=1)
+    while lower <= end:
+        if interval == 'year':
+            upper = lower.replace(year=lower.year + 1)
+        else:
+            upper = lower.replace(year=lower.year + lower.month // 12, month=lower.month % 12 + 1)
+        yield Partition(lower, upper)
+        lower = upper
+
+
+def create_partitions(cursor, partitions: Iterable[Partition]):
+    """Create missing partitions of questions and choices.
+
+    Questions with publication dates outside of all partitions are kept in default partitions, which are created as
+    well. Partition could not be created while default partition holds rows within its range.
+
+    :param cursor: DB-API cursor.
+    :param partitions: partitions to create.
+    :type partitions: Iterable[Partition].
+    :raises ValueError: if there would be more than ``MAX_PARTITIONS`` partitions.
+    """
+    partitions = sorted(set(partitions))
+    _check_partition_count(cursor, partitions)
+    for table in TABLES:
+        cursor.execute(f'CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT')
+    for partition in partitions:
+        for table in TABLES:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {partition.table(table)} PARTITION OF {table} '
+                f'FOR VALUES {partition.bounds}'
+            )
+
+
+def attached_partitions(cursor) -> List[Partition]:
+    """Get partitions attached to table of questions ordered by publication dates."""
+    cursor.execute(
+        "SELECT child.relname FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = 'question'::regclass"
+    )
+    return sorted(_parse_tables(name for name, in cursor.fetchall()))
+
+
+def detached_partitions(cursor) -> List[Partition]:
+    """Get partitions, whose tables of questions exist but are detached, ordered by publication dates."""
+    cursor.execute(
+        "SELECT relname FROM pg_class WHERE relkind = 'r' AND NOT relispartition AND relname LIKE 'question\\_p%'"
+    )
+    return sorted(_parse_tables(name for name, in cursor.fetchall()))
+
+
+def detach_partition(cursor, partition: Partition):
+    """Detach partitions of questions and choices keeping them as standalone tables.
+
+    Choices of detached partition reference questions of the same partition, so that the pair stays consistent and
+    no longer holds back changes of attached questions.
+
+    :param cursor: DB-API cursor.
+    :param partition: partition to detach.
+    :type partition: Partition.
+    """
+    question_table, choice_table = map(partition.table, TABLES)
+    cursor.execute(f'ALTER TABLE choice DETACH PARTITION {choice_table}')
+    _drop_foreign_keys(cursor, choice_table)
+    cursor.execute(
+        f'ALTER TABLE {choice_table} ADD CONSTRAINT {choice_table}_question_fkey '
+        f'FOREIGN KEY (question_id, pub_date) REFERENCES {question_table} (id, pub_date) '
+        'ON DELETE CASCADE ON UPDATE CASCADE'
+    )
+    cursor.execute(f'ALTER TABLE question DETACH PARTITION {question_table}')
+
+
+def attach_partition(cursor, partition: Partition):
+    """Attach detached partitions of questions and choices back, which validates their rows against bounds.
+
+    :param cursor: DB-API cursor.
+    :param partition: partition to attach.
+    :type partition: Partition.
+    :raises ValueError: if there would be more than ``MAX_PARTITIONS`` partitions.
+    """
+    _check_partition_count(cursor, (partition,))
+    question_table, choice_table = map(partition.table, TABLES)
+    _drop_foreign_keys(cursor, choice_table)
+    cursor.execute(f'ALTER TABLE question ATTACH PARTITION {question_table} FOR VALUES {partition.bounds}')
+    # Foreign key of partitioned table of choices is added to attached partition and validated
+    cursor.execute(f'ALTER TABLE choice ATTACH PARTITION {choice_table} FOR VALUES {partition.bounds}')
+
+
+def archive_partition(cursor, partition: Partition, directory: str) -> str:
+    """Export partitions of questions and choices to archive and drop them.
+
+    Archive is a ZIP file holding binary COPY of every table. It is completely written before tables are dropped,
+    so that data is not lost if transaction fails, but it is committed by caller.
+
+    :param cursor: DB-API cursor supporting ``copy_expert``.
+    :param partition: attached or detached partition to archive.
+    :type partition: Partition.
+    :param directory: directory of archives.
+    :type directory: str.
+    :return: path of archive.
+    :rtype: str.
+    """
+    path = os.path.join(directory, partition.suffix + ARCHIVE_SUFFIX)
+    incomplete_path = path + '.part'
+    with zipfile.ZipFile(incomplete_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for table in TABLES:
+            with archive.open(table, 'w', force_zip64=True) as member:
+                cursor.copy_expert(f'COPY {partition.table(table)} TO STDOUT (FORMAT binary)', member)
+    with open(incomplete_path, 'rb') as archive_file:
+        os.fsync(archive_file.fileno())
+    os.replace(incomplete_path, path)
+
+    # Choices go first, as they reference questions
+    for table in reversed(TABLES):
+        if _is_attached(cursor, partition.table(table)):
+            cursor.execute(f'ALTER TABLE {table} DETACH PARTITION {partition.table(table)}')
+        cursor.execute(f'DROP TABLE {partition.table(table)}')
+    return path
+
+
+def restore_partition(cursor, path: str) -> Partition:
+    """Create partitions of questions and choices and load them from archive.
+
+    :param cursor: DB-API cursor supporting ``copy_expert``.
+    :param path: path of archive made by ``archive_partition``.
+    :type path: str.
+    :return: restored partition.
+    :rtype: Partition.
+    :raises ValueError: if archive is not named after partition or there would be more than ``MAX_PARTITIONS``
+        partitions.
+    """
+    partition = Partition.parse(os.path.basename(path).removesuffix(ARCHIVE_SUFFIX))
+    _check_partition_count(cursor, (partition,))
+    # Existing table of the same name, like detached partition, fails restore instead of being loaded into
+    for table in TABLES:
+        cursor.execute(f'CREATE TABLE {partition.table(table)} PARTITION OF {table} FOR VALUES {partition.bounds}')
+    with zipfile.ZipFile(path) as archive:
+        for table in TABLES:
+            with archive.open(table) as member:
+                cursor.copy_expert(f'COPY {partition.table(table)} FROM STDIN (FORMAT binary)', member)
+    return partition
+
+
+def _parse_tables(names: Iterable[str]) -> Iterator[Partition]:
+    for name in names:
+        try:
+            yield Partition.parse(name.removeprefix('question_'))
+        except ValueError:
+            # Default partition
+            continue
+
+
+def _check_partition_count(cursor, partitions: Iterable[Partition]):
+    count = len(set(attached_partitions(cursor)).union(partitions))
+    if count > MAX_PARTITIONS:
+        raise ValueError(
+            f'{count} partitions exceed limit of {MAX_PARTITIONS}, use longer interval or archive old partitions'
+        )
+
+
+def _is_attached(cursor, table: str) -> bool:
+    cursor.execute(f"SELECT relispartition FROM pg_class WHERE oid = '{table}'::regclass")
+    return cursor.fetchone()[0]
+
+
+def _drop_foreign_keys(cursor, table: str):
+    cursor.execute(f"SELECT conname FROM pg_constraint WHERE conrelid = '{table}'::regclass AND contype = 'f'")
+    for name, in cursor.fetchall():
+        cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT {name}')
@@ -0,0 +1,59 @@
+# Connection pool instrumentation
+import time
+from contextlib import asynccontextmanager
+from typing import Dict
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from common.metrics import Histogram
+
+
+class PoolStats:
+    """Live statistics of connection pool of engine collected through pool events."""
+
+    def __init__(self, engine: AsyncEngine):
+        self._pool = engine.sync_engine.pool
+        self.waiters = 0
+        self.connects = 0
+        self.checkouts = 0
+        self.invalidations = 0
+        self.wait_time = Histogram()
+
+        event.listen(self._pool, 'connect', self._on_connect)
+        event.listen(self._pool, 'checkout', self._on_checkout)
+        event.listen(self._pool, 'invalidate', self._on_invalidate)
+
+    @asynccontextmanager
+    async def measure_checkout(self):
+        """Count caller as waiting for connection and record how long it waits."""
+        self.waiters += 1
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.waiters -= 1
+            self.wait_time.observe(time.perf_counter() - started_at)
+
+    @property
+    def stats(self) -> Dict[str, object]:
+        return {
+            'size': self._pool.size(),
+            'checked_out': self._pool.checkedout(),
+            'idle': self._pool.checkedin(),
+            'overflow': self._pool.overflow(),
+            'waiters': self.waiters,
+            'connects': self.connects,
+            'checkouts': self.checkouts,
+            'invalidations': self.invalidations,
+            'wait_time': self.wait_time.snapshot(),
+        }
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.checkouts += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        self.invalidations += 1
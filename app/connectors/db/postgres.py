@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Any, Mapping, Optional, Sequence
 
 from sqlalchemy.ext.asyncio import AsyncEngine
 
@@ -8,13 +8,92 @@ from connectors.db.base import BaseDataService
 class PostgresDataService(BaseDataService):
     """PostgreSQL data service base."""
     _engine: AsyncEngine = None
-    _url_template = "postgresql+asyncpg://{user}:{password}@{host}:{port}/{database}"
+    _url_template = (
+        "postgresql+asyncpg://{user}:{password}@{host}:{port}/{database}"
+        "?prepared_statement_cache_size={statement_cache_size}"
+    )
 
     def __init__(
-        self, host: str, port: int, database: str, user: str, password: str, schema: Optional[str] = None
+        self,
+        host: str,
+        port: int,
+        database: str,
+        user: str,
+        password: str,
+        schema: Optional[str] = None,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_timeout: float = 30,
+        pool_recycle: int = -1,
+        pool_pre_ping: bool = False,
+        statement_cache_size: int = 100,
+        echo: bool = False,
+        minsize: Optional[int] = None,
+        maxsize: Optional[int] = None,
+        replicas: Sequence[Mapping[str, Any]] = (),
+        replica_selection: str = 'round_robin',
+        replica_eject_seconds: float = 30,
+        replica_lag: float = 1,
     ):
-        self._db_url = self._url_template.format(
-            user=user, password=password, host=host, port=port, database=database
+        """Create PostgreSQL data service.
+
+        :param pool_size: number of connections kept open in pool.
+        :type pool_size: int, default 5.
+        :param max_overflow: number of connections which may be opened above pool size under load.
+        :type max_overflow: int, default 10.
+        :param pool_timeout: seconds to wait for connection from pool before giving up.
+        :type pool_timeout: float, default 30.
+        :param pool_recycle: seconds after which connections are reopened, -1 to never reopen them.
+        :type pool_recycle: int, default -1.
+        :param pool_pre_ping: condition if connections should be tested for liveness on checkout.
+        :type pool_pre_ping: bool, default False.
+        :param statement_cache_size: number of prepared statements cached per connection, 0 disables cache.
+        :type statement_cache_size: int, default 100.
+        :param echo: condition if executed statements should be logged.
+        :type echo: bool, default False.
+        :param minsize: minimal number of pooled connections, raises pool size if it is lower.
+        :type minsize: Optional[int], default None.
+        :param maxsize: maximal number of open connections, overrides pool size and disables overflow.
+        :type maxsize: Optional[int], default None.
+        :param replicas: connection parameters of read replicas overriding those of primary database.
+        :type replicas: Sequence[Mapping[str, Any]], default ().
+        :param replica_selection: replica selection strategy, either "round_robin" or "least_connections".
+        :type replica_selection: str, default "round_robin".
+        :param replica_eject_seconds: seconds for which failed replica is not used.
+        :type replica_eject_seconds: float, default 30.
+        :param replica_lag: seconds by which replicas may lag behind primary database.
+        :type replica_lag: float, default 1.
+        """
+        connection_params = dict(
+            user=user,
+            password=password,
+            host=host,
+            port=port,
+            database=database,
+            statement_cache_size=statement_cache_size,
         )
+        self._db_url = self._url_template.format(**connection_params)
+        replica_urls = tuple(self._url_template.format(**{**connection_params, **replica}) for replica in replicas)
         self._schema = schema
-        super().__init__(self._db_url, echo=True)
+        if maxsize is not None:
+            pool_size, max_overflow = maxsize, 0
+        if minsize is not None:
+            pool_size = max(pool_size, minsize)
+        super().__init__(
+            self._db_url,
+            replica_urls=replica_urls,
+            replica_selection=replica_selection,
+            replica_eject_seconds=replica_eject_seconds,
+            replica_lag=replica_lag,
+            echo=echo,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_recycle=pool_recycle,
+            pool_pre_ping=pool_pre_ping,
+        )
+
+    @property
+    def dsn(self) -> str:
+        """URL of primary database in form accepted by database driver itself."""
+        return self._engine.url.set(drivername='postgresql', query={}).render_as_string(hide_password=False)
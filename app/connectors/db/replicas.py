@@ -0,0 +1,102 @@
+# Read replicas of database
+import itertools
+import time
+from typing import Dict, Iterable, Iterator, List
+
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from connectors.db.pool import PoolStats
+from connectors.db.timing import StatementTiming
+
+ROUND_ROBIN = 'round_robin'
+LEAST_CONNECTIONS = 'least_connections'
+
+
+class Replica:
+    """Read replica with its own engine and connection pool."""
+
+    def __init__(self, url: str, **kwargs):
+        self.engine: AsyncEngine = create_async_engine(url, **kwargs)
+        self.pool_stats = PoolStats(self.engine)
+        self.statement_timing = StatementTiming(self.engine)
+        self.session = sessionmaker(self.engine, AsyncSession, expire_on_commit=False)
+        self.ejected_until = 0.0
+        self.ejections = 0
+
+    @property
+    def name(self) -> str:
+        return f'{self.engine.url.host}:{self.engine.url.port}'
+
+    @property
+    def is_available(self) -> bool:
+        return self.ejected_until <= time.monotonic()
+
+
+class ReplicaSet:
+    """Set of read replicas with load balancing and ejection of unhealthy replicas."""
+
+    def __init__(
+        self, urls: Iterable[str], selection: str = ROUND_ROBIN, eject_seconds: float = 30, **kwargs
+    ):
+        """Create replica set.
+
+        :param urls: database URLs of replicas.
+        :type urls: Iterable[str].
+        :param selection: replica selection strategy, either "round_robin" or "least_connections".
+        :type selection: str, default "round_robin".
+        :param eject_seconds: seconds for which failed replica is not used.
+        :type eject_seconds: float, default 30.
+        :param kwargs: options of replica engines.
+        """
+        if selection not in (ROUND_ROBIN, LEAST_CONNECTIONS):
+            raise ValueError(f'Unknown replica selection strategy: {selection}')
+        self._replicas = tuple(Replica(url, **kwargs) for url in urls)
+        self._selection = selection
+        self._eject_seconds = eject_seconds
+        self._offsets = itertools.cycle(range(len(self._replicas)))
+
+    def __bool__(self) -> bool:
+        return bool(self._replicas)
+
+    def __iter__(self) -> Iterator[Replica]:
+        return iter(self._replicas)
+
+    @property
+    def stats(self) -> List[Dict[str, object]]:
+        return [
+            {
+                'name': replica.name,
+                'available': replica.is_available,
+                'ejections': replica.ejections,
+                'pool': replica.pool_stats.stats,
+            }
+            for replica in self._replicas
+        ]
+
+    def candidates(self) -> List[Replica]:
+        """Get available replicas in order in which they should be tried.
+
+        :return: available replicas, most preferred first.
+        :rtype: List[Replica].
+        """
+        available = [replica for replica in self._replicas if replica.is_available]
+        if not available:
+            return available
+        if self._selection == LEAST_CONNECTIONS:
+            return sorted(available, key=lambda replica: replica.engine.sync_engine.pool.checkedout())
+        offset = next(self._offsets) % len(available)
+        return available[offset:] + available[:offset]
+
+    def eject(self, replica: Replica):
+        """Stop using replica for some time after it failed.
+
+        :param replica: failed replica.
+        :type replica: Replica.
+        """
+        replica.ejected_until = time.monotonic() + self._eject_seconds
+        replica.ejections += 1
+
+    async def dispose(self):
+        for replica in self._replicas:
+            await replica.engine.dispose()
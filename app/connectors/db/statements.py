@@ -0,0 +1,51 @@
+# Cache of built SQL statements
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable
+
+from sqlalchemy.sql import Executable
+
+
+class StatementCache:
+    """LRU cache of statements keyed by their shape.
+
+    Statements are built once per shape with values of conditions bound as parameters, so repeated queries of
+    the same shape skip construction and hit SQLAlchemy compiled cache with the same statement.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self._maxsize = maxsize
+        self._statements: OrderedDict[Hashable, Executable] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self) -> Dict[str, object]:
+        requests = self.hits + self.misses
+        return {
+            'size': len(self._statements),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / requests if requests else None,
+        }
+
+    def get(self, shape: Hashable, build: Callable[[], Executable]) -> Executable:
+        """Get statement of given shape, building it if it is not cached.
+
+        :param shape: hashable description of statement structure without bound values.
+        :type shape: Hashable.
+        :param build: function building statement.
+        :type build: Callable[[], Executable].
+        :return: statement.
+        :rtype: Executable.
+        """
+        try:
+            statement = self._statements[shape]
+        except KeyError:
+            self.misses += 1
+            statement = self._statements[shape] = build()
+            if len(self._statements) > self._maxsize:
+                self._statements.popitem(last=False)
+            return statement
+        self.hits += 1
+        self._statements.move_to_end(shape)
+        return statement
@@ -0,0 +1,53 @@
+# Statement execution instrumentation
+import time
+from typing import Dict, Iterator, Mapping, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from common.metrics import Histogram, current_request_timing
+
+# Route of statements executed outside of any web request, e.g. by background vote flushes
+NO_ROUTE = 'none'
+
+
+class StatementTiming:
+    """Durations of statements executed by engine collected through cursor execution events.
+
+    Every duration is recorded per route of web request which executed the statement and per kind of statement,
+    and is added to timing of that request.
+    """
+
+    def __init__(self, engine: AsyncEngine):
+        self.durations: Dict[Tuple[str, str], Histogram] = {}
+
+        event.listen(engine.sync_engine, 'before_cursor_execute', self._on_before_cursor_execute)
+        event.listen(engine.sync_engine, 'after_cursor_execute', self._on_after_cursor_execute)
+
+    def samples(self, labels: Mapping[str, str]) -> Iterator[Tuple[Mapping[str, str], Histogram]]:
+        """Get duration histograms of statements labeled with route and kind of statement.
+
+        :param labels: additional labels of every histogram, e.g. database.
+        :type labels: Mapping[str, str].
+        :return: labels of histograms with histograms.
+        :rtype: Iterator[Tuple[Mapping[str, str], Histogram]].
+        """
+        for (route, operation), histogram in self.durations.items():
+            yield {**labels, 'route': route, 'operation': operation}, histogram
+
+    def _on_before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # Start is kept by execution context, so statements which fail leave nothing behind on connection
+        context._query_started_at = time.perf_counter()
+
+    def _on_after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - context._query_started_at
+        request_timing = current_request_timing()
+        if request_timing is not None:
+            request_timing.db_seconds += duration
+            request_timing.db_statements += 1
+
+        key = (request_timing.route if request_timing else NO_ROUTE, statement.split(None, 1)[0].upper())
+        histogram = self.durations.get(key)
+        if histogram is None:
+            histogram = self.durations[key] = Histogram()
+        histogram.observe(duration)
@@ -0,0 +1,127 @@
+# Cache for retrieved entities
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, FrozenSet, Hashable, Iterable, Optional, Set, Tuple
+
+# Scope of cache entries which do not belong to one particular question (e.g. lists)
+ANY_SCOPE = object()
+# Marker of missing cache entry
+MISSING = object()
+
+Tag = Tuple[str, Any]
+
+
+class QueryCache:
+    """LRU cache of query results with time to live and tag based invalidation.
+
+    Every entry is tagged with (table name, scope) pairs of data it was built from, where scope is either id of
+    question which data belongs to or ``ANY_SCOPE``. Invalidating a table for some scopes removes entries tagged
+    with those scopes and entries tagged with ``ANY_SCOPE`` of that table.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 5.0):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._entries: OrderedDict[Hashable, Tuple[float, Any, FrozenSet[Tag]]] = OrderedDict()
+        self._tagged_keys: Dict[str, Dict[Any, Set[Hashable]]] = defaultdict(lambda: defaultdict(set))
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def generation(self) -> int:
+        """Number of invalidations done so far, used to discard values read before an invalidation."""
+        return self._generation
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
+
+    def get(self, key: Hashable) -> Any:
+        """Get cached value.
+
+        :param key: key of cache entry.
+        :type key: Hashable.
+        :return: cached value or ``MISSING``.
+        :rtype: Any.
+        """
+        try:
+            expires_at, value, _ = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return MISSING
+        if expires_at < time.monotonic():
+            self._remove(key)
+            self.evictions += 1
+            self.misses += 1
+            return MISSING
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, tags: Iterable[Tag], generation: Optional[int] = None):
+        """Cache value.
+
+        :param key: key of cache entry.
+        :type key: Hashable.
+        :param value: value to cache.
+        :type value: Any.
+        :param tags: (table name, scope) pairs of data value was built from.
+        :type tags: Iterable[Tag].
+        :param generation: cache generation observed before value was read, value is dropped if cache was
+            invalidated since then.
+        :type generation: Optional[int], default None.
+        """
+        if generation is not None and generation != self._generation:
+            return
+        if key in self._entries:
+            self._remove(key)
+        tags = frozenset(tags)
+        self._entries[key] = (time.monotonic() + self._ttl, value, tags)
+        for table, scope in tags:
+            self._tagged_keys[table][scope].add(key)
+        while len(self._entries) > self._maxsize:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, table: str, scopes: Optional[Iterable[Any]] = None):
+        """Remove cached entries built from data of given table.
+
+        :param table: name of changed table.
+        :type table: str.
+        :param scopes: scopes of changed data, all entries of table are removed if not given.
+        :type scopes: Optional[Iterable[Any]], default None.
+        """
+        self._generation += 1
+        scoped_keys = self._tagged_keys.get(table)
+        if not scoped_keys:
+            return
+        if scopes is None:
+            keys = set().union(*scoped_keys.values())
+        else:
+            keys = set().union(*(scoped_keys.get(scope, ()) for scope in (*scopes, ANY_SCOPE)))
+        for key in keys:
+            self._remove(key)
+        self.invalidations += len(keys)
+
+    def clear(self):
+        """Remove all cached entries."""
+        self._generation += 1
+        self._entries.clear()
+        self._tagged_keys.clear()
+
+    def _remove(self, key: Hashable):
+        _, _, tags = self._entries.pop(key)
+        for table, scope in tags:
+            keys = self._tagged_keys[table][scope]
+            keys.discard(key)
+            if not keys:
+                del self._tagged_keys[table][scope]
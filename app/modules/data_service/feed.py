@@ -0,0 +1,171 @@
+# Propagation of committed changes between processes
+import asyncio
+import logging
+import secrets
+from typing import Dict, Optional
+
+import asyncpg
+
+from common.serializers import dumps, loads
+from modules.data_service.models import Question, Choice
+from modules.data_service.polls import PollsDataService, Changes, VoteDeltas
+
+logger = logging.getLogger(__name__)
+
+# Payload of PostgreSQL notification must be shorter than 8000 bytes
+MAX_PAYLOAD_SIZE = 7999
+
+
+class ChangeFeed:
+    """Feed of committed changes shared by processes through PostgreSQL notifications.
+
+    Every process keeps its own cache, data versions and results summary, so changes committed by one process are
+    published to a notification channel and applied by all other processes as if they committed them. Changes are
+    published after commit, so other processes may serve data which is stale for a few milliseconds.
+    """
+
+    def __init__(self, data_service: PollsDataService, channel: str = 'polls_changes', reconnect_interval: float = 1):
+        """Create change feed.
+
+        :param data_service: data service whose changes are shared.
+        :type data_service: PollsDataService.
+        :param channel: name of notification channel.
+        :type channel: str, default "polls_changes".
+        :param reconnect_interval: seconds to wait before reconnecting after connection to database is lost.
+        :type reconnect_interval: float, default 1.
+        """
+        self._data_service = data_service
+        self._channel = channel
+        self._reconnect_interval = reconnect_interval
+        # Distinguishes notifications of this process from those of others
+        self._origin = secrets.token_hex(8)
+        self._outgoing: asyncio.Queue[Optional[str]] = asyncio.Queue()
+        self._connection: Optional[asyncpg.Connection] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._applying = False
+        self.published = 0
+        self.received = 0
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @property
+    def stats(self) -> Dict[str, object]:
+        return {
+            'connected': self._connection is not None and not self._connection.is_closed(),
+            'pending': self._outgoing.qsize(),
+            'published': self.published,
+            'received': self.received,
+        }
+
+    async def start(self):
+        """Start listening to and publishing of changes."""
+        if not self._runner:
+            await self._connect()
+            self._data_service.add_change_listener(self._on_changes)
+            self._runner = asyncio.create_task(self._run())
+
+    async def close(self, timeout: float = 5):
+        """Publish pending changes and stop listening to changes of other processes.
+
+        :param timeout: seconds to wait for pending changes to be published.
+        :type timeout: float, default 5.
+        """
+        if not self._runner:
+            return
+        self._data_service.remove_change_listener(self._on_changes)
+        try:
+            await asyncio.wait_for(self._outgoing.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning('Dropped %d unpublished changes', self._outgoing.qsize())
+        self._runner.cancel()
+        try:
+            await self._runner
+        except asyncio.CancelledError:
+            pass
+        self._runner = None
+        await self._disconnect()
+
+    async def _run(self):
+        while True:
+            try:
+                if self._connection is None:
+                    await self._connect()
+                    # Notifications sent while disconnected are lost, so all local data is considered stale
+                    self._apply({Question.__tablename__: None, Choice.__tablename__: None}, None)
+                await self._publish_outgoing()
+            except (OSError, asyncpg.PostgresError, ConnectionError):
+                logger.exception('Change feed lost connection to database, reconnecting')
+                await self._disconnect()
+                await asyncio.sleep(self._reconnect_interval)
+
+    async def _publish_outgoing(self):
+        while True:
+            payload = await self._outgoing.get()
+            try:
+                if payload is None:
+                    raise ConnectionError('Listening connection was closed')
+                await self._connection.execute('SELECT pg_notify($1, $2)', self._channel, payload)
+                self.published += 1
+            finally:
+                self._outgoing.task_done()
+
+    async def _connect(self):
+        self._connection = await asyncpg.connect(self._data_service.dsn)
+        await self._connection.add_listener(self._channel, self._on_notification)
+        self._connection.add_termination_listener(self._on_termination)
+
+    async def _disconnect(self):
+        connection, self._connection = self._connection, None
+        if connection is not None and not connection.is_closed():
+            await connection.close()
+
+    def _on_termination(self, connection: asyncpg.Connection):
+        if connection is self._connection:
+            # Wakes up publishing, so that loss of connection is noticed even when nothing is published
+            self._outgoing.put_nowait(None)
+
+    def _on_changes(self, changes: Changes, vote_deltas: Optional[VoteDeltas]):
+        if not self._applying:
+            self._outgoing.put_nowait(self._encode(changes, vote_deltas))
+
+    def _on_notification(self, connection: asyncpg.Connection, pid: int, channel: str, payload: str):
+        message = loads(payload)
+        if message['origin'] == self._origin:
+            return
+        self.received += 1
+        vote_deltas = message.get('votes')
+        if vote_deltas is not None:
+            vote_deltas = {(question_id, choice_id): delta for question_id, choice_id, delta in vote_deltas}
+        self._apply(message['changes'], vote_deltas)
+
+    def _apply(self, changes: Changes, vote_deltas: Optional[VoteDeltas]):
+        # Changes of other processes must not be published again
+        self._applying = True
+        try:
+            self._data_service.apply_changes(changes, vote_deltas)
+        finally:
+            self._applying = False
+
+    def _encode(self, changes: Changes, vote_deltas: Optional[VoteDeltas]) -> str:
+        """Encode changes into notification payload, coarsening them if they do not fit into it."""
+        changes = {table: None if scopes is None else list(scopes) for table, scopes in changes.items()}
+        message = {'origin': self._origin, 'changes': changes}
+        if vote_deltas is not None:
+            message['votes'] = [
+                (question_id, choice_id, delta) for (question_id, choice_id), delta in vote_deltas.items()
+            ]
+
+        payload = dumps(message)
+        if len(payload) > MAX_PAYLOAD_SIZE and 'votes' in message:
+            # Without votes other processes reload results of changed questions instead of adding votes to them
+            del message['votes']
+            payload = dumps(message)
+        if len(payload) > MAX_PAYLOAD_SIZE:
+            message['changes'] = dict.fromkeys(changes)
+            payload = dumps(message)
+        return payload.decode()
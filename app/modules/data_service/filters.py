@@ -0,0 +1,177 @@
+# Conditions of queries other than equality
+import sys
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+from sqlalchemy import Column, and_, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.sql import ColumnElement
+
+# Ordering of query as pairs of column and condition if it is descending
+Ordering = Tuple[Tuple[Column, bool], ...]
+
+
+class Filter(ABC):
+    """Condition on column value, used as value of conditions mapping instead of value compared for equality.
+
+    Filters compile to statements with values bound as parameters, so statements of filters of the same shape are
+    shared regardless of filtered values.
+    """
+
+    __slots__ = ()
+
+    def __eq__(self, other: Any) -> bool:
+        return type(self) is type(other) and self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash((type(self), self._key()))
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}{self._key()!r}'
+
+    @property
+    def shape(self) -> Hashable:
+        """Shape of filter, i.e. everything of its statement except bound values."""
+        return type(self).__name__
+
+    @abstractmethod
+    def clause(self, column: Column, name: str) -> ColumnElement:
+        """Build condition on column with values bound as parameters named after given name.
+
+        :param column: column to which condition is applied.
+        :type column: Column.
+        :param name: name of parameter, used as prefix if filter binds several of them.
+        :type name: str.
+        :return: SQL condition.
+        :rtype: ColumnElement.
+        """
+
+    @abstractmethod
+    def params(self, name: str) -> Dict[str, Any]:
+        """Get values of parameters bound by ``clause``."""
+
+    @abstractmethod
+    def matches(self, value: Any) -> bool:
+        """Check if value satisfies filter, for data which is not stored in database."""
+
+    @abstractmethod
+    def _key(self) -> Tuple:
+        pass
+
+
+class In(Filter):
+    """Column value is one of given values."""
+
+    __slots__ = ('values',)
+
+    def __init__(self, values: Iterable[Any]):
+        self.values = tuple(values)
+
+    def clause(self, column: Column, name: str) -> ColumnElement:
+        # Array parameter keeps one prepared statement for lists of any length, unlike expanded IN list
+        return column == any_(bindparam(name, type_=ARRAY(column.type)))
+
+    def params(self, name: str) -> Dict[str, Any]:
+        return {name: list(self.values)}
+
+    def matches(self, value: Any) -> bool:
+        return value in self.values
+
+    def _key(self) -> Tuple:
+        return self.values
+
+
+class Range(Filter):
+    """Column value is between given bounds, both inclusive, a missing bound is not checked."""
+
+    __slots__ = ('lower', 'upper')
+
+    def __init__(self, lower: Optional[Any] = None, upper: Optional[Any] = None):
+        if lower is None and upper is None:
+            raise ValueError('At least one bound of range should be given')
+        self.lower = lower
+        self.upper = upper
+
+    @property
+    def shape(self) -> Hashable:
+        return type(self).__name__, self.lower is not None, self.upper is not None
+
+    def clause(self, column: Column, name: str) -> ColumnElement:
+        clauses = []
+        if self.lower is not None:
+            clauses.append(column >= bindparam(f'{name}_lower'))
+        if self.upper is not None:
+            clauses.append(column <= bindparam(f'{name}_upper'))
+        return and_(*clauses)
+
+    def params(self, name: str) -> Dict[str, Any]:
+        params = {}
+        if self.lower is not None:
+            params[f'{name}_lower'] = self.lower
+        if self.upper is not None:
+            params[f'{name}_upper'] = self.upper
+        return params
+
+    def matches(self, value: Any) -> bool:
+        return (self.lower is None or value >= self.lower) and (self.upper is None or value <= self.upper)
+
+    def _key(self) -> Tuple:
+        return self.lower, self.upper
+
+
+class Prefix(Filter):
+    """Column text starts with given prefix.
+
+    It compiles to a range of pattern comparison operators rather than ``LIKE``, so an index with
+    ``varchar_pattern_ops`` is used even when prefix is a bound parameter of a prepared statement. Prefix of only
+    the largest characters has no upper bound.
+    """
+
+    __slots__ = ('prefix', '_upper_bound')
+
+    def __init__(self, prefix: str):
+        if not prefix:
+            raise ValueError('Prefix should not be empty')
+        self.prefix = prefix
+        self._upper_bound = _successor(prefix)
+
+    @property
+    def shape(self) -> Hashable:
+        return type(self).__name__, self._upper_bound is not None
+
+    def clause(self, column: Column, name: str) -> ColumnElement:
+        lower = column.op('~>=~')(bindparam(f'{name}_from'))
+        if self._upper_bound is None:
+            return lower
+        return and_(lower, column.op('~<~')(bindparam(f'{name}_to')))
+
+    def params(self, name: str) -> Dict[str, Any]:
+        if self._upper_bound is None:
+            return {f'{name}_from': self.prefix}
+        return {f'{name}_from': self.prefix, f'{name}_to': self._upper_bound}
+
+    def matches(self, value: Any) -> bool:
+        return value.startswith(self.prefix)
+
+    def _key(self) -> Tuple:
+        return self.prefix,
+
+
+def _successor(prefix: str) -> Optional[str]:
+    """Get the smallest text greater than all texts starting with prefix, if any.
+
+    Texts are compared by code points, as pattern operators compare UTF-8 bytes. Surrogates are skipped, since
+    they could not be encoded, and the largest code points are dropped, since nothing follows them.
+
+    :param prefix: non-empty prefix.
+    :type prefix: str.
+    :return: upper bound or None if prefix consists of the largest code points only.
+    :rtype: Optional[str].
+    """
+    prefix = prefix.rstrip(chr(sys.maxunicode))
+    if not prefix:
+        return None
+    code_point = ord(prefix[-1]) + 1
+    if 0xD800 <= code_point <= 0xDFFF:
+        code_point = 0xE000
+    return prefix[:-1] + chr(code_point)
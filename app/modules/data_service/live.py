@@ -0,0 +1,248 @@
+# Live push of poll results to subscribers
+import asyncio
+import logging
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Set
+
+from common.serializers import dumps
+from modules.data_service.models import Question, Choice
+from modules.data_service.polls import PollsDataService, Changes, VoteDeltas
+from modules.data_service.results import ResultsSummary
+
+logger = logging.getLogger(__name__)
+
+# Comment event keeping idle connections open through proxies
+KEEPALIVE = b': keepalive\n\n'
+
+
+def _event(name: bytes, data: bytes) -> bytes:
+    """Frame data as server-sent event."""
+    return b'event: ' + name + b'\ndata: ' + data + b'\n\n'
+
+
+class Subscription:
+    """Bounded queue of server-sent events of one subscriber to live results of question.
+
+    A subscriber which does not keep up loses its queued events and gets a snapshot of results instead, so memory
+    used by slow subscribers is bounded and fast ones are never held back by them.
+    """
+
+    __slots__ = ('question_id', 'resync', 'closed', '_queue')
+
+    def __init__(self, question_id: int, queue_size: int):
+        self.question_id = question_id
+        # Every subscriber starts from a snapshot
+        self.resync = True
+        self.closed = False
+        # Room for the final event and end of events is always kept
+        self._queue: asyncio.Queue[Optional[bytes]] = asyncio.Queue(max(queue_size, 2))
+
+    async def get(self) -> Optional[bytes]:
+        """Get next event, None if there will be no more events."""
+        return await self._queue.get()
+
+    def offer(self, event: bytes) -> bool:
+        """Queue event unless subscriber fell behind, in which case it is resynchronized with next snapshot.
+
+        :param event: server-sent event.
+        :type event: bytes.
+        :return: condition if event was queued.
+        :rtype: bool.
+        """
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self._drain()
+            self.resync = True
+            return False
+        return True
+
+    def close(self, event: bytes):
+        """Replace queued events with the final event and end of events."""
+        self.closed = True
+        self._drain()
+        self._queue.put_nowait(event)
+        self._queue.put_nowait(None)
+
+    def _drain(self):
+        while not self._queue.empty():
+            self._queue.get_nowait()
+
+
+class LiveResults:
+    """Broadcast of changes of poll results to subscribers as server-sent events.
+
+    Votes committed for a question are aggregated and broadcast on a fixed tick as one delta event, which is
+    serialized once for all subscribers of question. Subscribers get a snapshot event with full results first,
+    after falling behind and after choices of question change in any other way than by votes.
+    """
+
+    def __init__(
+        self,
+        data_service: PollsDataService,
+        results_summary: ResultsSummary,
+        tick_interval: float = 1.0,
+        queue_size: int = 16,
+        keepalive_interval: float = 15,
+    ):
+        """Create live results.
+
+        :param data_service: data service whose committed votes are broadcast.
+        :type data_service: PollsDataService.
+        :param results_summary: summary providing snapshots of results.
+        :type results_summary: ResultsSummary.
+        :param tick_interval: seconds between broadcasts.
+        :type tick_interval: float, default 1.0.
+        :param queue_size: number of events queued for subscriber before it is considered behind.
+        :type queue_size: int, default 16.
+        :param keepalive_interval: seconds after which idle subscriber gets keepalive comment.
+        :type keepalive_interval: float, default 15.
+        """
+        self._data_service = data_service
+        self._results_summary = results_summary
+        self._tick_interval = tick_interval
+        self._queue_size = queue_size
+        self.keepalive_interval = keepalive_interval
+        self._subscriptions: Dict[int, Set[Subscription]] = {}
+        self._pending: Dict[int, Counter[int]] = {}
+        self._resync: Set[int] = set()
+        self._broadcaster: Optional[asyncio.Task] = None
+        self.subscribers = 0
+        self.ticks = 0
+        self.events = 0
+        self.deliveries = 0
+        self.overflows = 0
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            'subscribers': self.subscribers,
+            'questions': len(self._subscriptions),
+            'ticks': self.ticks,
+            'events': self.events,
+            'deliveries': self.deliveries,
+            'overflows': self.overflows,
+        }
+
+    def start(self):
+        """Start listening to committed changes and periodic broadcasting."""
+        if not self._broadcaster:
+            self._data_service.add_change_listener(self._on_changes)
+            self._broadcaster = asyncio.create_task(self._broadcast_periodically())
+
+    async def close(self):
+        """Stop broadcasting and end events of all subscribers."""
+        if not self._broadcaster:
+            return
+        self._data_service.remove_change_listener(self._on_changes)
+        self._broadcaster.cancel()
+        try:
+            await self._broadcaster
+        except asyncio.CancelledError:
+            pass
+        self._broadcaster = None
+        for subscriptions in self._subscriptions.values():
+            for subscription in subscriptions:
+                subscription.close(KEEPALIVE)
+
+    @asynccontextmanager
+    async def subscribe(self, question_id: int) -> AsyncIterator[Subscription]:
+        """Subscribe to live results of question for the duration of context.
+
+        :param question_id: id of question.
+        :type question_id: int.
+        :return: subscription yielding server-sent events.
+        :rtype: AsyncIterator[Subscription].
+        """
+        subscription = Subscription(question_id, self._queue_size)
+        self._subscriptions.setdefault(question_id, set()).add(subscription)
+        self.subscribers += 1
+        try:
+            yield subscription
+        finally:
+            self.subscribers -= 1
+            subscriptions = self._subscriptions[question_id]
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[question_id]
+                self._pending.pop(question_id, None)
+
+    async def _broadcast_periodically(self):
+        while True:
+            await asyncio.sleep(self._tick_interval)
+            if not self._subscriptions:
+                continue
+            try:
+                await self._broadcast()
+            except Exception:
+                logger.exception('Failed to broadcast live results')
+
+    async def _broadcast(self):
+        self.ticks += 1
+        resync, self._resync = self._resync, set()
+        snapshot_question_ids = [
+            question_id
+            for question_id, subscriptions in self._subscriptions.items()
+            if any(
+                not subscription.closed and (subscription.resync or question_id in resync)
+                for subscription in subscriptions
+            )
+        ]
+        results = dict(zip(
+            snapshot_question_ids,
+            await asyncio.gather(*map(self._results_summary.get, snapshot_question_ids)),
+        ))
+
+        # Nothing is awaited from here on, so snapshots already contain exactly the votes of pending deltas
+        pending, self._pending = self._pending, {}
+        for question_id, subscriptions in tuple(self._subscriptions.items()):
+            snapshot = delta = None
+            if question_id in results:
+                question_results = results[question_id]
+                if question_results is None:
+                    deleted = _event(b'deleted', dumps({'question_id': question_id}))
+                    for subscription in subscriptions:
+                        subscription.close(deleted)
+                    continue
+                snapshot = _event(b'snapshot', question_results.payload)
+                self.events += 1
+            votes = pending.get(question_id)
+            if votes and question_id not in resync:
+                votes = {str(choice_id): count for choice_id, count in votes.items()}
+                delta = _event(b'delta', dumps({'question_id': question_id, 'votes': votes}))
+                self.events += 1
+
+            for subscription in subscriptions:
+                event = snapshot if subscription.resync or question_id in resync else delta
+                if event is None or subscription.closed:
+                    continue
+                if subscription.offer(event):
+                    if event is snapshot:
+                        subscription.resync = False
+                    self.deliveries += 1
+                else:
+                    self.overflows += 1
+
+    def _on_changes(self, changes: Changes, vote_deltas: Optional[VoteDeltas]):
+        if vote_deltas is not None:
+            for (question_id, choice_id), count in vote_deltas.items():
+                if question_id in self._subscriptions:
+                    self._pending.setdefault(question_id, Counter())[choice_id] += count
+            return
+
+        for table in (Question.__tablename__, Choice.__tablename__):
+            if table not in changes:
+                continue
+            scopes = changes[table]
+            if scopes is None:
+                self._resync.update(self._subscriptions)
+            else:
+                self._resync.update(question_id for question_id in scopes if question_id in self._subscriptions)
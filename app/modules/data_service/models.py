@@ -1,24 +1,109 @@
-from typing import Iterable
+from functools import lru_cache
+from operator import attrgetter
+from typing import Callable, Iterable, Tuple, Type
 
 from sqlalchemy import (
-    Column, ForeignKey, Integer, String, Date, func
+    Column, ForeignKeyConstraint, Integer, String, Date, func
 )
-from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy.orm import ColumnProperty, declarative_base, relationship
 
 DeclarativeBase = declarative_base()
 
+Encoder = Callable[['BaseTable'], dict]
+# Sparse fieldset as sorted pairs of table name and column key
+FieldKeys = Tuple[Tuple[str, str], ...]
+
 
 class BaseTable(DeclarativeBase):
     __abstract__ = True
 
-    def as_dict(self, include_relations: Iterable[relationship] = tuple()) -> dict:
-        return {
-            **{col.name: getattr(self, col.name) for col in self.__table__.columns},
-            **{
-                relation.key: tuple(entity.as_dict() for entity in getattr(self, relation.key))
-                for relation in include_relations
-            }
-        }
+    def as_dict(self, include_relations: Iterable[relationship] = tuple(), fields: Iterable[Column] = tuple()) -> dict:
+        return self.encoder(include_relations, fields)(self)
+
+    @classmethod
+    def encoder(
+        cls, include_relations: Iterable[relationship] = tuple(), fields: Iterable[Column] = tuple()
+    ) -> Encoder:
+        """Get function converting entities to dicts.
+
+        Encoders are compiled once per entity, set of relations and fields, so encoding many rows does not walk
+        mapper metadata for every row.
+
+        :param include_relations: relationships which should be included into dicts.
+        :type include_relations: Iterable[relationship], default tuple().
+        :param fields: columns of entity and related entities which should be included into dicts, all columns
+            are included for entities none of whose columns is given.
+        :type fields: Iterable[Column], default tuple().
+        :return: encoder of entities.
+        :rtype: Encoder.
+        """
+        return _compile_encoder(cls, tuple(relation.key for relation in include_relations), field_keys(fields))
+
+
+def field_keys(fields: Iterable[Column]) -> FieldKeys:
+    """Get sparse fieldset identified by table names and column keys, so that it may be hashed and compared."""
+    return tuple(sorted({(field.class_.__tablename__, field.key) for field in fields}))
+
+
+def selected_column_attrs(entity: Type[BaseTable], fields: FieldKeys) -> Tuple[ColumnProperty, ...]:
+    """Get column attributes of entity which are in sparse fieldset, all of them if none of them is.
+
+    Columns marked as internal in their info are never selected.
+
+    :param entity: entity class.
+    :type entity: Type[BaseTable].
+    :param fields: sparse fieldset.
+    :type fields: FieldKeys.
+    :return: selected column attributes in order of mapper.
+    :rtype: Tuple[ColumnProperty, ...].
+    """
+    keys = {key for table, key in fields if table == entity.__tablename__}
+    return tuple(
+        attr for attr in entity.__mapper__.column_attrs
+        if not attr.columns[0].info.get('internal') and (not keys or attr.key in keys)
+    )
+
+
+@lru_cache(maxsize=None)
+def _compile_encoder(entity: Type[BaseTable], relation_keys: Tuple[str], fields: FieldKeys = ()) -> Encoder:
+    """Compile encoder of entity to dict from mapper metadata.
+
+    :param entity: entity class.
+    :type entity: Type[BaseTable].
+    :param relation_keys: keys of relationships which should be included into dicts.
+    :type relation_keys: Tuple[str].
+    :param fields: sparse fieldset of entity and related entities.
+    :type fields: FieldKeys, default ().
+    :return: encoder of entities.
+    :rtype: Encoder.
+    """
+    column_attrs = selected_column_attrs(entity, fields)
+    names = tuple(attr.columns[0].name for attr in column_attrs)
+    get_values = attrgetter(*(attr.key for attr in column_attrs))
+
+    def encode_columns(obj: BaseTable) -> dict:
+        values = get_values(obj)
+        return dict(zip(names, values)) if len(names) > 1 else {names[0]: values}
+
+    if not relation_keys:
+        return encode_columns
+
+    relations = []
+    for key in relation_keys:
+        relation = entity.__mapper__.relationships[key]
+        relations.append((key, relation.uselist, _compile_encoder(relation.mapper.class_, (), fields)))
+
+    def encode(obj: BaseTable) -> dict:
+        encoded = encode_columns(obj)
+        for key, uselist, encode_related in relations:
+            related = getattr(obj, key)
+            if uselist:
+                encoded[key] = tuple(map(encode_related, related))
+            else:
+                encoded[key] = None if related is None else encode_related(related)
+        return encoded
+
+    return encode
 
 
 class Question(BaseTable):
@@ -34,11 +119,18 @@ class Question(BaseTable):
 
 class Choice(BaseTable):
     __tablename__ = 'choice'
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ('question_id', 'pub_date'), ('question.id', 'question.pub_date'), ondelete='CASCADE', onupdate='CASCADE'
+        ),
+    )
     __mapper_args__ = {'eager_defaults': True}
 
     id = Column(Integer, primary_key=True)
     choice_text = Column(String(200), nullable=False)
     votes = Column(Integer, server_default='0', nullable=False)
-    question_id = Column(Integer, ForeignKey('question.id', ondelete='CASCADE'))
+    question_id = Column(Integer)
+    # Publication date of question, which choices are partitioned by, it is synchronized from question
+    pub_date = Column(Date, nullable=False, info={'internal': True})
 
     question = relationship('Question', back_populates='choices')
@@ -1,29 +1,188 @@
+import asyncio
+import datetime
+import logging
+import time
+from collections import defaultdict
+from contextlib import AsyncExitStack
 from functools import partial
-from typing import Optional, Tuple, Iterable, Type, MutableMapping, Any
+from typing import (
+    Optional, Tuple, Iterable, Type, MutableMapping, Any, Mapping, AsyncIterator, Callable, Set, Hashable,
+    AsyncIterable, Sequence, Dict, List, Awaitable, TypeVar,
+)
 
-from sqlalchemy import Column, update, delete
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from sqlalchemy.orm import relationship, selectinload
+from sqlalchemy import (
+    Column, Date, Integer, Text, update, delete, insert, bindparam, event, func, cast, literal_column, true,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by, array_agg
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+from sqlalchemy.future import select, Select
+from sqlalchemy.orm import configure_mappers, load_only, relationship, selectinload, ONETOMANY
+from sqlalchemy.sql import ColumnElement, Executable
+from sqlalchemy.sql.selectable import Lateral, Subquery
 
 from common.meta import SingletonMeta
+from common.serializers import dumps, loads
+from common.singleflight import SingleFlight
+from connectors.db.base import REPLICA_ERRORS, REQUEST_BOUND_VARS
 from connectors.db.postgres import PostgresDataService
-from modules.data_service.models import BaseTable
+from connectors.db.statements import StatementCache
+from modules.data_service.cache import QueryCache, ANY_SCOPE, MISSING, Tag
+from modules.data_service.filters import Filter, In, Ordering
+from modules.data_service.models import BaseTable, FieldKeys, Question, Choice, field_keys, selected_column_attrs
+from modules.data_service.versions import DataVersions
+
+# Columns holding id of question which rows of table belong to, used to scope cache invalidation
+SCOPE_COLUMNS = {
+    'question': 'id',
+    'choice': 'question_id',
+}
+# The largest number of parameters PostgreSQL protocol lets bind to one statement
+MAX_QUERY_PARAMS = 32767
+# Parameters bound by one row of multi-row INSERT of imported questions: id, text and publication date
+IMPORT_QUESTION_PARAMS = 3
+
+Changes = Mapping[str, Optional[Iterable[Any]]]
+VoteDeltas = Mapping[Tuple[int, int], int]
+# Publication dates of questions by their ids, which choices are partitioned by
+PubDates = Mapping[int, datetime.date]
+# Listener of committed changes, called with changed tables and, for vote flushes, with added votes
+ChangeListener = Callable[[Changes, Optional[VoteDeltas]], None]
+
+T = TypeVar('T')
+
+logger = logging.getLogger(__name__)
+
+
+class EncodedPage:
+    """JSON array of entities encoded by database together with what is needed to link to the next page."""
+
+    __slots__ = ('payload', 'count', 'last_key')
+
+    def __init__(self, payload: bytes, count: int, last_key: Optional[Any]):
+        self.payload = payload
+        self.count = count
+        # Primary key of the last entity of page
+        self.last_key = last_key
+
+
+# Reads run on every pooled connection during warm-up, shaped as reads of web views
+WARM_UP_READS = (
+    dict(entity=Question, limit=1),
+    dict(entity=Question, limit=1, after=0),
+    dict(entity=Question, with_relations=(Question.choices,), limit=1),
+    dict(entity=Question, with_relations=(Question.choices,), conditions={Question.id: 0}),
+    dict(entity=Question, conditions={Question.id: 0}),
+)
+# Reads encoded by database run during warm-up, shaped as pages of list of questions
+WARM_UP_JSON_READS = (
+    dict(entity=Question, limit=1),
+    dict(entity=Question, limit=1, after=0),
+    dict(entity=Question, with_relations=(Question.choices,), limit=1),
+    dict(entity=Question, with_relations=(Question.choices,), limit=1, after=0),
+)
 
 
 class PollsDataService(PostgresDataService, metaclass=SingletonMeta):
     """Class for data manipulation for polls."""
 
     def __init__(
-        self, host: str, port: int, database: str, user: str, password: str, schema: Optional[str] = None
+        self,
+        host: str,
+        port: int,
+        database: str,
+        user: str,
+        password: str,
+        schema: Optional[str] = None,
+        cache: Optional[QueryCache] = None,
+        **pool_options,
     ):
-        super().__init__(host, port, database, user, password, schema)
+        super().__init__(host, port, database, user, password, schema, **pool_options)
+        self._cache = cache
+        self._versions = DataVersions()
+        self._statements = StatementCache()
+        self._flights = SingleFlight(isolated_vars=REQUEST_BOUND_VARS)
+        self._change_listeners: List[ChangeListener] = []
+
+    @property
+    def cache(self) -> Optional[QueryCache]:
+        return self._cache
+
+    @property
+    def versions(self) -> DataVersions:
+        return self._versions
+
+    @property
+    def statements(self) -> StatementCache:
+        return self._statements
+
+    @property
+    def flights(self) -> SingleFlight:
+        return self._flights
+
+    def add_change_listener(self, listener: ChangeListener):
+        """Register listener of committed changes of data.
+
+        Listeners are called synchronously right after commit, so they should be cheap and should not raise.
+
+        :param listener: listener of changes.
+        :type listener: ChangeListener.
+        """
+        self._change_listeners.append(listener)
+
+    def remove_change_listener(self, listener: ChangeListener):
+        self._change_listeners.remove(listener)
+
+    async def warm_up(self):
+        """Prepare data service for serving requests, so that first requests do not pay for preparation.
+
+        Mappers are configured, then connection pools of primary database and replicas are filled up to their
+        size and representative reads are run on every connection, which introspects types and prepares
+        statements of connection and compiles statements shared by all connections. Only failure of primary
+        database fails warm-up, failed replica is ejected as on reads, which are served by other ones meanwhile.
+        """
+        configure_mappers()
+        await self._warm_up_engine(self._engine)
+        for replica in self._replicas:
+            try:
+                await self._warm_up_engine(replica.engine)
+            except REPLICA_ERRORS:
+                logger.warning('Warm-up of replica %s failed, ejecting it', replica.name, exc_info=True)
+                self._replicas.eject(replica)
+
+    async def _warm_up_engine(self, engine: AsyncEngine):
+        async with AsyncExitStack() as stack:
+            # Connections are held together, so that pool opens as many of them as it keeps
+            connections = await asyncio.gather(
+                *(stack.enter_async_context(engine.connect()) for _ in range(engine.sync_engine.pool.size()))
+            )
+            await asyncio.gather(*map(self._warm_up_connection, connections))
+
+    async def _warm_up_connection(self, connection: AsyncConnection):
+        async with AsyncSession(bind=connection) as session:
+            for read in WARM_UP_READS:
+                await self._get(session=session, **read)
+            for read in WARM_UP_JSON_READS:
+                await self._get_json(session=session, **read)
+
+    def apply_changes(self, changes: Changes, vote_deltas: Optional[VoteDeltas] = None):
+        """Register changes of data committed by another process sharing database.
+
+        :param changes: mapping of changed tables to scopes of changed data (all scopes if None).
+        :type changes: Changes.
+        :param vote_deltas: votes added to choices, if changes are made only by adding votes.
+        :type vote_deltas: Optional[VoteDeltas], default None.
+        """
+        self._register_changes(changes, vote_deltas)
 
     async def get(
         self,
         entity: Type[BaseTable],
         conditions: MutableMapping[Column, Any] = None,
         with_relations: Optional[Iterable[relationship]] = None,
+        limit: Optional[int] = None,
+        after: Optional[Any] = None,
+        order_by: Ordering = (),
+        fields: Iterable[Column] = (),
         session: Optional[AsyncSession] = None,
     ) -> Tuple[BaseTable]:
         """Retrieve data for given entity from database.
@@ -34,7 +193,18 @@ class PollsDataService(PostgresDataService, metaclass=SingletonMeta):
         :type conditions: Optional[MutableMapping[Column, Any]], default None.
         :param with_relations: additional relationships to load with given entity.
         :type with_relations: Optional[Iterable[relationship]], default None.
-        :param session: session to use for retrieving entries from database.
+        :param limit: maximum number of entities to retrieve.
+        :type limit: Optional[int], default None.
+        :param after: primary key value after which entities should be retrieved (keyset pagination).
+        :type after: Optional[Any], default None.
+        :param order_by: columns to order entities by with conditions if order is descending, primary key
+            breaks ties and ``after`` follows its direction.
+        :type order_by: Ordering, default ().
+        :param fields: columns of entity and related entities to retrieve (sparse fieldset), all columns are
+            retrieved for entities none of whose columns is given.
+        :type fields: Iterable[Column], default ().
+        :param session: session to use for retrieving entries from database, if it is not given entries are
+            retrieved from read replica, cached and shared by identical concurrent calls.
         :type session: Optional[AsyncSession], default None.
         :return: tuple of retrieved entities.
         :rtype: Tuple[Type[BaseTable]].
@@ -44,19 +214,132 @@ class PollsDataService(PostgresDataService, metaclass=SingletonMeta):
             entity=entity,
             conditions=conditions,
             with_relations=with_relations,
+            limit=limit,
+            after=after,
+            order_by=order_by,
+            fields=fields,
         )
         if not session:
-            async with self.transaction() as session:
-                return await get(session=session)
+            query_key = self._query_key(entity, conditions, with_relations, limit, after, order_by, fields)
+            return await self._read(query_key, entity, conditions, with_relations, get)
         else:
             return await get(session=session)
 
+    async def get_json(
+        self,
+        entity: Type[BaseTable],
+        conditions: MutableMapping[Column, Any] = None,
+        with_relations: Optional[Iterable[relationship]] = None,
+        limit: Optional[int] = None,
+        after: Optional[Any] = None,
+        order_by: Ordering = (),
+        fields: Iterable[Column] = (),
+        session: Optional[AsyncSession] = None,
+    ) -> EncodedPage:
+        """Retrieve data for given entity from database as JSON array encoded by database.
+
+        Entities are encoded as by ``BaseTable.encoder`` in one statement, so neither entities nor related entities
+        are loaded into session and encoded in Python.
+
+        :param entity: entity which should be retrieved from database.
+        :type entity: Type[BaseTable].
+        :param conditions: mapping of columns to values which should be used as conditions while retrieving.
+        :type conditions: Optional[MutableMapping[Column, Any]], default None.
+        :param with_relations: additional relationships to include into encoded entities.
+        :type with_relations: Optional[Iterable[relationship]], default None.
+        :param limit: maximum number of entities to retrieve.
+        :type limit: Optional[int], default None.
+        :param after: primary key value after which entities should be retrieved (keyset pagination).
+        :type after: Optional[Any], default None.
+        :param order_by: columns to order entities by with conditions if order is descending, primary key
+            breaks ties and ``after`` follows its direction.
+        :type order_by: Ordering, default ().
+        :param fields: columns of entity and related entities to retrieve (sparse fieldset), all columns are
+            retrieved for entities none of whose columns is given.
+        :type fields: Iterable[Column], default ().
+        :param session: session to use for retrieving entries from database, if it is not given entries are
+            retrieved from read replica, cached and shared by identical concurrent calls.
+        :type session: Optional[AsyncSession], default None.
+        :return: encoded page of entities.
+        :rtype: EncodedPage.
+        """
+        get_json = partial(
+            self._get_json,
+            entity=entity,
+            conditions=conditions,
+            with_relations=with_relations,
+            limit=limit,
+            after=after,
+            order_by=order_by,
+            fields=fields,
+        )
+        if not session:
+            query_key = self._query_key(entity, conditions, with_relations, limit, after, order_by, fields)
+            # Encoded pages are cached next to entities of the same query
+            query_key = query_key and ('json', query_key)
+            return await self._read(query_key, entity, conditions, with_relations, get_json)
+        else:
+            return await get_json(session=session)
+
+    async def _read(
+        self,
+        query_key: Optional[Hashable],
+        entity: Type[BaseTable],
+        conditions: Optional[MutableMapping[Column, Any]],
+        with_relations: Optional[Iterable[relationship]],
+        read: Callable[..., Awaitable[T]],
+    ) -> T:
+        """Run read in read transaction, reusing cached result and result of identical concurrent read.
+
+        :param query_key: key identifying read, read is neither cached nor shared if it is None.
+        :type query_key: Optional[Hashable].
+        :param entity: entity which is read.
+        :type entity: Type[BaseTable].
+        :param conditions: conditions of read, used to tag cached result.
+        :type conditions: Optional[MutableMapping[Column, Any]].
+        :param with_relations: relationships loaded by read, used to tag cached result.
+        :type with_relations: Optional[Iterable[relationship]].
+        :param read: read taking session as keyword argument.
+        :type read: Callable[..., Awaitable[T]].
+        :return: result of read.
+        :rtype: T.
+        """
+        from_primary = self.reads_from_primary() or self._replicas_may_lag(entity, conditions, with_relations)
+        if query_key is None:
+            async with self.read_transaction(from_primary=from_primary) as session:
+                return await read(session=session)
+
+        # Reads of own or recent writes neither get cached results, which may predate the writes, nor cache their
+        # results, which could be read before replica caught up otherwise
+        cache = None if from_primary else self._cache
+        # Generation is observed before lookup, so result read after any later invalidation is not cached
+        generation = cache.generation if cache else None
+        if cache:
+            result = cache.get(query_key)
+            if result is not MISSING:
+                return result
+
+        async def load() -> T:
+            async with self.read_transaction(from_primary=from_primary) as session:
+                loaded = await read(session=session)
+            if cache:
+                tags = self._cache_tags(entity, conditions, with_relations)
+                cache.set(query_key, loaded, tags=tags, generation=generation)
+            return loaded
+
+        # Identical concurrent reads share one query, which is not bound to deadline of any of them
+        return await self.until_deadline(self._flights.do((query_key, from_primary), load))
+
     async def _get(
         self,
         entity: Type[BaseTable],
         session: AsyncSession,
         conditions: MutableMapping[Column, Any] = None,
         with_relations: Optional[Iterable[relationship]] = None,
+        limit: Optional[int] = None,
+        after: Optional[Any] = None,
+        order_by: Ordering = (),
+        fields: Iterable[Column] = (),
     ) -> Tuple[BaseTable]:
         """Retrieve data for given entity from database.
 
@@ -68,18 +351,479 @@ class PollsDataService(PostgresDataService, metaclass=SingletonMeta):
         :type conditions: Optional[MutableMapping[Column, Any]], default None.
         :param with_relations: additional relationships to load with given entity.
         :type with_relations: Optional[Iterable[relationship]], default None.
+        :param limit: maximum number of entities to retrieve.
+        :type limit: Optional[int], default None.
+        :param after: primary key value after which entities should be retrieved (keyset pagination).
+        :type after: Optional[Any], default None.
+        :param order_by: columns to order entities by with conditions if order is descending, primary key
+            breaks ties and ``after`` follows its direction.
+        :type order_by: Ordering, default ().
+        :param fields: columns of entity and related entities to retrieve (sparse fieldset), all columns are
+            retrieved for entities none of whose columns is given.
+        :type fields: Iterable[Column], default ().
         :return: tuple of retrieved entities.
         :rtype: Tuple[Type[BaseTable]].
         """
-        stmt = select(entity)
-        for column, value in (conditions or {}).items():
-            stmt = stmt.where(column == value)
-        if with_relations:
-            stmt = stmt.options(*(selectinload(relation) for relation in with_relations))
-        result = await session.execute(stmt)
+        stmt, params = self._select(
+            entity=entity,
+            conditions=conditions,
+            with_relations=with_relations,
+            limit=limit,
+            after=after,
+            order_by=order_by,
+            fields=fields,
+        )
+        result = await session.execute(stmt, params)
         entities = result.scalars().all()
         return tuple(entities)
 
+    async def _get_json(
+        self,
+        entity: Type[BaseTable],
+        session: AsyncSession,
+        conditions: MutableMapping[Column, Any] = None,
+        with_relations: Optional[Iterable[relationship]] = None,
+        limit: Optional[int] = None,
+        after: Optional[Any] = None,
+        order_by: Ordering = (),
+        fields: Iterable[Column] = (),
+    ) -> EncodedPage:
+        """Retrieve data for given entity from database as JSON array encoded by database.
+
+        :param entity: entity which should be retrieved from database.
+        :type entity: Type[BaseTable].
+        :param session: session to use for retrieving entries from database.
+        :type session: AsyncSession.
+        :param conditions: mapping of columns to values which should be used as conditions while retrieving.
+        :type conditions: Optional[MutableMapping[Column, Any]], default None.
+        :param with_relations: additional relationships to include into encoded entities.
+        :type with_relations: Optional[Iterable[relationship]], default None.
+        :param limit: maximum number of entities to retrieve.
+        :type limit: Optional[int], default None.
+        :param after: primary key value after which entities should be retrieved (keyset pagination).
+        :type after: Optional[Any], default None.
+        :param order_by: columns to order entities by with conditions if order is descending, primary key
+            breaks ties and ``after`` follows its direction.
+        :type order_by: Ordering, default ().
+        :param fields: columns of entity and related entities to retrieve (sparse fieldset), all columns are
+            retrieved for entities none of whose columns is given.
+        :type fields: Iterable[Column], default ().
+        :return: encoded page of entities.
+        :rtype: EncodedPage.
+        """
+        stmt, params = self._select_json(
+            entity=entity,
+            conditions=conditions,
+            with_relations=with_relations,
+            limit=limit,
+            after=after,
+            order_by=order_by,
+            fields=fields,
+        )
+        result = await session.execute(stmt, params)
+        payload, count, last_key = result.one()
+        # Database separates keys, values and items with whitespace, so payload is re-encoded compactly to be the same
+        # as entities encoded in Python, keys keep their order unlike in jsonb
+        return EncodedPage(dumps(loads(payload)), count, last_key)
+
+    async def stream(
+        self,
+        entity: Type[BaseTable],
+        conditions: MutableMapping[Column, Any] = None,
+        with_relations: Optional[Iterable[relationship]] = None,
+        limit: Optional[int] = None,
+        after: Optional[Any] = None,
+        order_by: Ordering = (),
+        fields: Iterable[Column] = (),
+        batch_size: int = 500,
+        session: Optional[AsyncSession] = None,
+    ) -> AsyncIterator[BaseTable]:
+        """Retrieve data for given entity from database through server-side cursor.
+
+        Entities are yielded in given order, primary key order by default, as soon as their batch is fetched, so
+        memory usage does not depend on number of retrieved entities.
+
+        :param entity: entity which should be retrieved from database.
+        :type entity: Type[BaseTable].
+        :param conditions: mapping of columns to values which should be used as conditions while retrieving.
+        :type conditions: Optional[MutableMapping[Column, Any]], default None.
+        :param with_relations: additional relationships to load with given entity.
+        :type with_relations: Optional[Iterable[relationship]], default None.
+        :param limit: maximum number of entities to retrieve.
+        :type limit: Optional[int], default None.
+        :param after: primary key value after which entities should be retrieved (keyset pagination).
+        :type after: Optional[Any], default None.
+        :param order_by: columns to order entities by with conditions if order is descending, primary key
+            breaks ties and ``after`` follows its direction.
+        :type order_by: Ordering, default ().
+        :param fields: columns of entity and related entities to retrieve (sparse fieldset), all columns are
+            retrieved for entities none of whose columns is given.
+        :type fields: Iterable[Column], default ().
+        :param batch_size: number of entities fetched from cursor at once.
+        :type batch_size: int, default 500.
+        :param session: session to use for retrieving entries from database, read replica is used if not given.
+        :type session: Optional[AsyncSession], default None.
+        :return: async iterator over retrieved entities.
+        :rtype: AsyncIterator[BaseTable].
+        """
+        stream = partial(
+            self._stream,
+            entity=entity,
+            conditions=conditions,
+            with_relations=with_relations,
+            limit=limit,
+            after=after,
+            order_by=order_by,
+            fields=fields,
+            batch_size=batch_size,
+        )
+        if not session:
+            from_primary = self._replicas_may_lag(entity, conditions, with_relations)
+            async with self.read_transaction(from_primary=from_primary) as session:
+                async for entity in stream(session=session):
+                    yield entity
+        else:
+            async for entity in stream(session=session):
+                yield entity
+
+    async def _stream(
+        self,
+        entity: Type[BaseTable],
+        session: AsyncSession,
+        conditions: MutableMapping[Column, Any] = None,
+        with_relations: Optional[Iterable[relationship]] = None,
+        limit: Optional[int] = None,
+        after: Optional[Any] = None,
+        order_by: Ordering = (),
+        fields: Iterable[Column] = (),
+        batch_size: int = 500,
+    ) -> AsyncIterator[BaseTable]:
+        """Retrieve data for given entity from database through server-side cursor.
+
+        :param entity: entity which should be retrieved from database.
+        :type entity: Type[BaseTable].
+        :param session: session to use for retrieving entries from database.
+        :type session: AsyncSession.
+        :param conditions: mapping of columns to values which should be used as conditions while retrieving.
+        :type conditions: Optional[MutableMapping[Column, Any]], default None.
+        :param with_relations: additional relationships to load with given entity.
+        :type with_relations: Optional[Iterable[relationship]], default None.
+        :param limit: maximum number of entities to retrieve.
+        :type limit: Optional[int], default None.
+        :param after: primary key value after which entities should be retrieved (keyset pagination).
+        :type after: Optional[Any], default None.
+        :param order_by: columns to order entities by with conditions if order is descending, primary key
+            breaks ties and ``after`` follows its direction.
+        :type order_by: Ordering, default ().
+        :param fields: columns of entity and related entities to retrieve (sparse fieldset), all columns are
+            retrieved for entities none of whose columns is given.
+        :type fields: Iterable[Column], default ().
+        :param batch_size: number of entities fetched from cursor at once.
+        :type batch_size: int, default 500.
+        :return: async iterator over retrieved entities.
+        :rtype: AsyncIterator[BaseTable].
+        """
+        stmt, params = self._select(
+            entity=entity,
+            conditions=conditions,
+            with_relations=with_relations,
+            limit=limit,
+            after=after,
+            order_by=order_by,
+            fields=fields,
+            ordered=True,
+        )
+        result = await session.stream(stmt, params, execution_options={'yield_per': batch_size})
+        async for partition in result.scalars().partitions():
+            for entity in partition:
+                yield entity
+
+    def _select(
+        self,
+        entity: Type[BaseTable],
+        conditions: MutableMapping[Column, Any] = None,
+        with_relations: Optional[Iterable[relationship]] = None,
+        limit: Optional[int] = None,
+        after: Optional[Any] = None,
+        order_by: Ordering = (),
+        fields: Iterable[Column] = (),
+        ordered: bool = False,
+    ) -> Tuple[Select, Dict[str, Any]]:
+        """Get select statement for given entity together with its parameters.
+
+        Entities are ordered whenever a page of them is requested, with primary key breaking ties, so that
+        ``after`` is a stable keyset cursor as long as entities are ordered by primary key only.
+
+        :param entity: entity which should be retrieved from database.
+        :type entity: Type[BaseTable].
+        :param conditions: mapping of columns to values or filters which should be used as conditions.
+        :type conditions: Optional[MutableMapping[Column, Any]], default None.
+        :param with_relations: additional relationships to load with given entity.
+        :type with_relations: Optional[Iterable[relationship]], default None.
+        :param limit: maximum number of entities to retrieve.
+        :type limit: Optional[int], default None.
+        :param after: primary key value after which entities should be retrieved.
+        :type after: Optional[Any], default None.
+        :param order_by: columns to order entities by with conditions if order is descending.
+        :type order_by: Ordering, default ().
+        :param fields: columns of entity and related entities to retrieve (sparse fieldset), all columns are
+            retrieved for entities none of whose columns is given.
+        :type fields: Iterable[Column], default ().
+        :param ordered: condition if entities should be ordered even if no page of them is requested.
+        :type ordered: bool, default False.
+        :return: select statement and its parameters.
+        :rtype: Tuple[Select, Dict[str, Any]].
+        """
+        conditions = conditions or {}
+        with_relations = tuple(with_relations or ())
+        order_by = tuple(order_by)
+        fields = field_keys(fields)
+        paginated = ordered or bool(order_by) or limit is not None or after is not None
+        shape = (
+            'select',
+            entity,
+            self._conditions_shape(conditions),
+            tuple(relation.key for relation in with_relations),
+            tuple((column.key, descending) for column, descending in order_by),
+            paginated,
+            limit is not None,
+            after is not None,
+            fields,
+        )
+
+        def build() -> Select:
+            stmt = self._where(select(entity), conditions)
+            loaders = [selectinload(relation) for relation in with_relations]
+            if fields:
+                stmt = stmt.options(load_only(*self._field_attrs(entity, fields)))
+                loaders = [
+                    loader.load_only(*self._field_attrs(relation.property.mapper.class_, fields))
+                    for loader, relation in zip(loaders, with_relations)
+                ]
+            if loaders:
+                stmt = stmt.options(*loaders)
+            if paginated:
+                stmt = self._paginate(stmt, entity, order_by, limit is not None, after is not None)
+            return stmt
+
+        return self._statements.get(shape, build), self._select_params(conditions, limit, after)
+
+    def _select_json(
+        self,
+        entity: Type[BaseTable],
+        conditions: MutableMapping[Column, Any] = None,
+        with_relations: Optional[Iterable[relationship]] = None,
+        limit: Optional[int] = None,
+        after: Optional[Any] = None,
+        order_by: Ordering = (),
+        fields: Iterable[Column] = (),
+    ) -> Tuple[Select, Dict[str, Any]]:
+        """Get statement encoding entities to JSON array together with its parameters.
+
+        Selected rows of entity are joined laterally with aggregates of their related rows and encoded with
+        ``json_build_object`` into objects with the same keys as ``BaseTable.encoder`` produces. Statement returns
+        one row with UTF-8 encoded array, number of its entities and primary key of the last of them.
+
+        :param entity: entity which should be retrieved from database.
+        :type entity: Type[BaseTable].
+        :param conditions: mapping of columns to values or filters which should be used as conditions.
+        :type conditions: Optional[MutableMapping[Column, Any]], default None.
+        :param with_relations: additional relationships to include into encoded entities.
+        :type with_relations: Optional[Iterable[relationship]], default None.
+        :param limit: maximum number of entities to retrieve.
+        :type limit: Optional[int], default None.
+        :param after: primary key value after which entities should be retrieved.
+        :type after: Optional[Any], default None.
+        :param order_by: columns to order entities by with conditions if order is descending.
+        :type order_by: Ordering, default ().
+        :param fields: columns of entity and related entities to retrieve (sparse fieldset), all columns are
+            retrieved for entities none of whose columns is given.
+        :type fields: Iterable[Column], default ().
+        :return: select statement and its parameters.
+        :rtype: Tuple[Select, Dict[str, Any]].
+        """
+        conditions = conditions or {}
+        with_relations = tuple(with_relations or ())
+        order_by = tuple(order_by)
+        fields = field_keys(fields)
+        shape = (
+            'select_json',
+            entity,
+            self._conditions_shape(conditions),
+            tuple(relation.key for relation in with_relations),
+            tuple((column.key, descending) for column, descending in order_by),
+            limit is not None,
+            after is not None,
+            fields,
+        )
+
+        def build() -> Select:
+            encoded_attrs = selected_column_attrs(entity, fields)
+            # Besides encoded columns, only columns which entities are ordered and joined by are selected
+            required_keys = {
+                entity.__mapper__.primary_key[0].key,
+                *(column.key for column, _ in order_by),
+                *(local.key for relation in with_relations for local, _ in relation.property.local_remote_pairs),
+            }
+            columns = [
+                attr.columns[0]
+                for attr in entity.__mapper__.column_attrs
+                if attr in encoded_attrs or attr.key in required_keys
+            ]
+            rows = self._where(select(*columns), conditions)
+            rows = self._paginate(rows, entity, order_by, limit is not None, after is not None).subquery('entities')
+            encoded = [(self._json_key(attr.columns[0].name), rows.c[attr.columns[0].name]) for attr in encoded_attrs]
+            from_clause = rows
+            for relation in with_relations:
+                related = self._json_related(relation, rows, fields)
+                from_clause = from_clause.outerjoin(related, true())
+                encoded.append((self._json_key(relation.key), related.c.value))
+
+            document = func.json_build_object(*(value for pair in encoded for value in pair))
+            orders = [
+                rows.c[column.key].desc() if descending else rows.c[column.key].asc()
+                for column, descending in self._orders(entity, order_by)
+            ]
+            primary_key = rows.c[entity.__mapper__.primary_key[0].name]
+            keys = array_agg(aggregate_order_by(primary_key, *orders))
+            array = func.coalesce(
+                cast(func.json_agg(aggregate_order_by(document, *orders)), Text), literal_column("'[]'")
+            )
+            return select(
+                # Text of array is converted to bytes by database, so driver neither decodes JSON nor text
+                func.convert_to(array, literal_column("'UTF8'")),
+                func.count(),
+                keys[func.count()],
+            ).select_from(from_clause)
+
+        return self._statements.get(shape, build), self._select_params(conditions, limit, after)
+
+    @staticmethod
+    def _json_key(name: str) -> ColumnElement:
+        """Get key of JSON object as literal, as type of bound key could not be inferred for prepared statement."""
+        return literal_column(f"'{name}'")
+
+    @classmethod
+    def _json_related(cls, relation: relationship, rows: Subquery, fields: FieldKeys) -> Lateral:
+        """Get lateral subquery encoding rows related to rows of subquery into its ``value`` column.
+
+        :param relation: relationship of entity whose rows are selected by subquery.
+        :type relation: relationship.
+        :param rows: subquery selecting rows of entity.
+        :type rows: Subquery.
+        :param fields: sparse fieldset of related entity.
+        :type fields: FieldKeys.
+        :return: lateral subquery.
+        :rtype: Lateral.
+        """
+        related = relation.property.mapper
+        document = func.json_build_object(*(
+            value
+            for attr in selected_column_attrs(related.class_, fields)
+            for value in (cls._json_key(attr.columns[0].name), attr.columns[0])
+        ))
+        join_conditions = [
+            remote == rows.c[local.name] for local, remote in relation.property.local_remote_pairs
+        ]
+        if relation.property.uselist:
+            value = func.coalesce(
+                func.json_agg(aggregate_order_by(document, related.primary_key[0].asc())), literal_column("'[]'::json")
+            )
+        else:
+            value = document
+        return select(value.label('value')).where(*join_conditions).lateral(relation.key)
+
+    @staticmethod
+    def _field_attrs(entity: Type[BaseTable], fields: FieldKeys) -> Tuple[Column, ...]:
+        """Get attributes of entity which are in sparse fieldset, for loader options."""
+        return tuple(getattr(entity, attr.key) for attr in selected_column_attrs(entity, fields))
+
+    @staticmethod
+    def _orders(entity: Type[BaseTable], order_by: Ordering) -> List[Tuple[Column, bool]]:
+        """Get orders of entities with primary key breaking ties."""
+        primary_key = entity.__mapper__.primary_key[0]
+        orders = [(column, descending) for column, descending in order_by]
+        if all(column.key != primary_key.key for column, _ in orders):
+            orders.append((primary_key, False))
+        return orders
+
+    @classmethod
+    def _paginate(cls, stmt: Select, entity: Type[BaseTable], order_by: Ordering, limit: bool, after: bool) -> Select:
+        """Order statement selecting entities and add bound parameters of page to it.
+
+        :param stmt: statement selecting entities.
+        :type stmt: Select.
+        :param entity: selected entity.
+        :type entity: Type[BaseTable].
+        :param order_by: columns to order entities by with conditions if order is descending.
+        :type order_by: Ordering.
+        :param limit: condition if number of entities is limited.
+        :type limit: bool.
+        :param after: condition if entities follow primary key value.
+        :type after: bool.
+        :return: ordered statement.
+        :rtype: Select.
+        """
+        primary_key = entity.__mapper__.primary_key[0]
+        orders = cls._orders(entity, order_by)
+        if after:
+            descending = next(descending for column, descending in orders if column.key == primary_key.key)
+            after_param = bindparam('after_')
+            stmt = stmt.where(primary_key < after_param if descending else primary_key > after_param)
+        stmt = stmt.order_by(*(column.desc() if descending else column.asc() for column, descending in orders))
+        if limit:
+            stmt = stmt.limit(bindparam('limit_'))
+        return stmt
+
+    @classmethod
+    def _select_params(
+        cls, conditions: MutableMapping[Column, Any], limit: Optional[int], after: Optional[Any]
+    ) -> Dict[str, Any]:
+        """Get parameters of select statement built with ``_where`` and ``_paginate``."""
+        params = cls._conditions_params(conditions)
+        if limit is not None:
+            params['limit_'] = limit
+        if after is not None:
+            params['after_'] = after
+        return params
+
+    @staticmethod
+    def _conditions_shape(conditions: MutableMapping[Column, Any]) -> Tuple[Tuple[str, Hashable], ...]:
+        """Get shape of conditions, i.e. their columns and whether they compare with NULL or apply filter."""
+        return tuple(
+            (column.key, value.shape if isinstance(value, Filter) else value is None)
+            for column, value in conditions.items()
+        )
+
+    @staticmethod
+    def _conditions_params(conditions: MutableMapping[Column, Any]) -> Dict[str, Any]:
+        """Get parameters bound to conditions built by ``_where``."""
+        params = {}
+        for column, value in conditions.items():
+            if isinstance(value, Filter):
+                params.update(value.params(f'c_{column.key}'))
+            elif value is not None:
+                params[f'c_{column.key}'] = value
+        return params
+
+    @staticmethod
+    def _where(stmt: Executable, conditions: MutableMapping[Column, Any]) -> Executable:
+        """Add conditions to statement with their values bound as parameters.
+
+        :param stmt: statement to add conditions to.
+        :type stmt: Executable.
+        :param conditions: mapping of columns to values compared for equality or to filters.
+        :type conditions: MutableMapping[Column, Any].
+        :return: statement with conditions.
+        :rtype: Executable.
+        """
+        for column, value in conditions.items():
+            if isinstance(value, Filter):
+                stmt = stmt.where(value.clause(column, f'c_{column.key}'))
+            else:
+                stmt = stmt.where(column.is_(None) if value is None else column == bindparam(f'c_{column.key}'))
+        return stmt
+
     async def create(self, entities: Iterable[BaseTable], session: Optional[AsyncSession] = None):
         """Create in database given entities.
 
@@ -102,7 +846,9 @@ class PollsDataService(PostgresDataService, metaclass=SingletonMeta):
         :param session: session to use for creating entries in database.
         :type session: AsyncSession.
         """
+        entities = tuple(entities)
         session.add_all(entities)
+        self._on_commit(session, changes=lambda: self._created_changes(entities))
 
     async def update(
         self,
@@ -122,7 +868,8 @@ class PollsDataService(PostgresDataService, metaclass=SingletonMeta):
         :type conditions: Optional[MutableMapping[Column, Any]], default None.
         :param returning: condition if updated entities should be returned after update.
         :type returning: bool, default False.
-        :param session: session to use for updating entries in database.
+        :param session: session to use for updating entries in database, its loaded entities are not
+            synchronized with the update.
         :type session: Optional[AsyncSession], default None.
         :return: updated entities or None.
         :rtype: Optional[Iterable[BaseTable]].
@@ -163,18 +910,129 @@ class PollsDataService(PostgresDataService, metaclass=SingletonMeta):
         :return: updated entities or None.
         :rtype: Optional[Iterable[BaseTable]].
         """
-        stmt = update(entity).values(**{column.name: value for column, value in set_values.items()})
-        for column, value in (conditions or {}).items():
-            stmt = stmt.where(column == value)
-        if returning:
-            stmt = stmt.returning(entity)
+        conditions = conditions or {}
+        shape = (
+            'update',
+            entity,
+            tuple(column.key for column in set_values),
+            self._conditions_shape(conditions),
+            returning,
+        )
+
+        def build() -> Executable:
+            stmt = update(entity).values({column.name: bindparam(f'v_{column.key}') for column in set_values})
+            stmt = self._where(stmt, conditions).execution_options(synchronize_session=False)
+            if returning:
+                stmt = stmt.returning(entity)
+            return stmt
 
-        result = await session.execute(stmt)
+        stmt = self._statements.get(shape, build)
+        params = {
+            **{f'v_{column.key}': value for column, value in set_values.items()},
+            **self._conditions_params(conditions),
+        }
+
+        result = await session.execute(stmt, params)
+        moves_scope = any(column.key == SCOPE_COLUMNS.get(entity.__tablename__) for column in set_values)
+        self._on_commit(
+            session, changes=lambda: {entity.__tablename__: None if moves_scope else self._scopes(entity, conditions)}
+        )
 
         if returning:
             entities = tuple(entity(**record) for record in result.fetchall())
             return entities
 
+    async def update_many(
+        self,
+        entity: Type[BaseTable],
+        changes: Iterable[Tuple[Any, MutableMapping[Column, Any]]],
+        session: Optional[AsyncSession] = None,
+    ) -> Tuple[Dict[str, Any], ...]:
+        """Update in database many entities of given entity, each with its own values.
+
+        Entities changing the same columns are updated by one statement, whatever their number is, and all of
+        them are updated in one transaction.
+
+        :param entity: entity which should be updated in database.
+        :type entity: Type[BaseTable].
+        :param changes: pairs of primary key of entity and mapping of columns to values which should be set.
+        :type changes: Iterable[Tuple[Any, MutableMapping[Column, Any]]].
+        :param session: session to use for updating entries in database, its loaded entities are not
+            synchronized with the update.
+        :type session: Optional[AsyncSession], default None.
+        :return: updated rows as mappings of column names to values, in order of changes, without rows of
+            entities which do not exist.
+        :rtype: Tuple[Dict[str, Any], ...].
+        """
+        update_many = partial(self._update_many, entity=entity, changes=changes)
+        if not session:
+            async with self.transaction() as session:
+                return await update_many(session=session)
+        else:
+            return await update_many(session=session)
+
+    async def _update_many(
+        self,
+        entity: Type[BaseTable],
+        changes: Iterable[Tuple[Any, MutableMapping[Column, Any]]],
+        session: AsyncSession,
+    ) -> Tuple[Dict[str, Any], ...]:
+        """Update in database many entities of given entity, each with its own values.
+
+        Values are bound as arrays, one per column, and joined to updated rows by primary key, so statement of a
+        set of changed columns is prepared once for any number of entities.
+
+        :param entity: entity which should be updated in database.
+        :type entity: Type[BaseTable].
+        :param changes: pairs of primary key of entity and mapping of columns to values which should be set.
+        :type changes: Iterable[Tuple[Any, MutableMapping[Column, Any]]].
+        :param session: session to use for updating entries in database.
+        :type session: AsyncSession.
+        :return: updated rows as mappings of column names to values, in order of changes.
+        :rtype: Tuple[Dict[str, Any], ...].
+        """
+        table = entity.__table__
+        primary_key = entity.__mapper__.primary_key[0]
+        changes = tuple(changes)
+        groups: Dict[Tuple[str, ...], List[Tuple[Any, Dict[str, Any]]]] = defaultdict(list)
+        for key, set_values in changes:
+            values = {column.key: value for column, value in set_values.items()}
+            groups[tuple(column.key for column in table.columns if column.key in values)].append((key, values))
+
+        updated_rows = {}
+        for column_keys, group in groups.items():
+            columns = (primary_key, *(table.c[column_key] for column_key in column_keys))
+
+            def build() -> Executable:
+                rows = func.unnest(
+                    *(bindparam(f'v_{column.key}', type_=ARRAY(column.type)) for column in columns)
+                ).table_valued(*(column.key for column in columns)).render_derived(name='changes')
+                return (
+                    update(table)
+                    .values({column_key: rows.c[column_key] for column_key in column_keys})
+                    .where(primary_key == rows.c[primary_key.key])
+                    .returning(*table.columns)
+                )
+
+            stmt = self._statements.get(('update_many', entity, column_keys), build)
+            params = {f'v_{primary_key.key}': [key for key, _ in group]}
+            params.update(
+                (f'v_{column_key}', [values[column_key] for _, values in group]) for column_key in column_keys
+            )
+            result = await session.execute(stmt, params)
+            updated_rows.update((row[primary_key.name], dict(row)) for row in result.mappings())
+
+        scope_column = SCOPE_COLUMNS.get(entity.__tablename__)
+        # Scopes rows are moved from are not returned, so all scopes are changed then
+        moves_scope = not scope_column or any(scope_column in column_keys for column_keys in groups)
+        self._on_commit(
+            session,
+            changes=lambda: {
+                entity.__tablename__: None if moves_scope else {row[scope_column] for row in updated_rows.values()}
+            },
+        )
+        return tuple(updated_rows[key] for key, _ in changes if key in updated_rows)
+
     async def delete(
         self,
         entity: Type[BaseTable],
@@ -190,7 +1048,8 @@ class PollsDataService(PostgresDataService, metaclass=SingletonMeta):
         :type conditions: Optional[MutableMapping[Column, Any]], default None.
         :param returning: condition if deleted entities should be returned after delete.
         :type returning: bool, default False.
-        :param session: session to use for deleting entries in database.
+        :param session: session to use for deleting entries in database, its loaded entities are not
+            synchronized with the delete.
         :type session: Optional[AsyncSession], default None.
         :return: deleted entities or None.
         :rtype: Optional[Iterable[BaseTable]].
@@ -227,14 +1086,374 @@ class PollsDataService(PostgresDataService, metaclass=SingletonMeta):
         :return: deleted entities or None.
         :rtype: Optional[Iterable[BaseTable]].
         """
-        stmt = delete(entity)
-        for column, value in (conditions or {}).items():
-            stmt = stmt.where(column == value)
-        if returning:
-            stmt = stmt.returning(entity)
+        conditions = conditions or {}
+        shape = ('delete', entity, self._conditions_shape(conditions), returning)
+
+        def build() -> Executable:
+            stmt = self._where(delete(entity), conditions).execution_options(synchronize_session=False)
+            if returning:
+                stmt = stmt.returning(entity)
+            return stmt
+
+        stmt = self._statements.get(shape, build)
+        params = self._conditions_params(conditions)
 
-        result = await session.execute(stmt)
+        result = await session.execute(stmt, params)
+        # Dependent rows are removed by database cascades, so they are invalidated as well
+        scopes = self._scopes(entity, conditions)
+        self._on_commit(
+            session, changes=lambda: {table: scopes for table in (entity.__tablename__, *self._dependents(entity))}
+        )
 
         if returning:
             entities = tuple(entity(**record) for record in result.fetchall())
             return entities
+
+    async def increment_votes(
+        self, deltas: VoteDeltas, pub_dates: PubDates, session: Optional[AsyncSession] = None
+    ):
+        """Atomically add votes to given choices.
+
+        :param deltas: mapping of (question id, choice id) pairs to number of votes which should be added.
+        :type deltas: VoteDeltas.
+        :param pub_dates: publication dates of questions of choices.
+        :type pub_dates: PubDates.
+        :param session: session to use for updating entries in database.
+        :type session: Optional[AsyncSession], default None.
+        """
+        if not deltas:
+            return
+        if not session:
+            async with self.transaction() as session:
+                await self._increment_votes(deltas=deltas, pub_dates=pub_dates, session=session)
+        else:
+            await self._increment_votes(deltas=deltas, pub_dates=pub_dates, session=session)
+
+    async def _increment_votes(self, deltas: VoteDeltas, pub_dates: PubDates, session: AsyncSession):
+        """Atomically add votes to given choices.
+
+        All increments are bound as arrays to one ``votes = votes + delta`` update, so concurrent writers never lose
+        each other's votes. Only votes of choices which were updated are reported as committed. Choices are looked
+        up together with publication dates of their questions, whose range is bound separately, so that partitions
+        of other dates are pruned.
+
+        :param deltas: mapping of (question id, choice id) pairs to number of votes which should be added.
+        :type deltas: VoteDeltas.
+        :param pub_dates: publication dates of questions of choices.
+        :type pub_dates: PubDates.
+        :param session: session to use for updating entries in database.
+        :type session: AsyncSession.
+        """
+        choice = Choice.__table__
+
+        def build() -> Executable:
+            rows = func.unnest(
+                bindparam('question_ids_', type_=ARRAY(Integer)),
+                bindparam('pub_dates_', type_=ARRAY(Date)),
+                bindparam('choice_ids_', type_=ARRAY(Integer)),
+                bindparam('deltas_', type_=ARRAY(Integer)),
+            ).table_valued('question_id', 'pub_date', 'choice_id', 'delta').render_derived(name='deltas')
+            matches = (
+                choice.c.id == rows.c.choice_id,
+                choice.c.question_id == rows.c.question_id,
+                choice.c.pub_date == rows.c.pub_date,
+                choice.c.pub_date.between(bindparam('min_pub_date_'), bindparam('max_pub_date_')),
+            )
+            # Rows are always locked in the same order to avoid deadlocks between concurrent flushes
+            locked = select(choice.c.id).where(*matches).order_by(choice.c.id).with_for_update(of=choice).cte('locked')
+            return (
+                update(choice)
+                .values(votes=choice.c.votes + rows.c.delta)
+                .where(*matches, choice.c.id.in_(select(locked.c.id)))
+                .returning(choice.c.question_id, choice.c.id)
+            )
+
+        stmt = self._statements.get(('increment_votes',), build)
+        keys = tuple(deltas)
+        params = {
+            'question_ids_': [question_id for question_id, _ in keys],
+            'pub_dates_': [pub_dates[question_id] for question_id, _ in keys],
+            'choice_ids_': [choice_id for _, choice_id in keys],
+            'deltas_': [deltas[key] for key in keys],
+            'min_pub_date_': min(pub_dates[question_id] for question_id, _ in keys),
+            'max_pub_date_': max(pub_dates[question_id] for question_id, _ in keys),
+        }
+        result = await session.execute(stmt, params)
+        applied = {(question_id, choice_id): deltas[(question_id, choice_id)] for question_id, choice_id in result}
+        if not applied:
+            return
+        self._on_commit(
+            session, changes=lambda: {choice.name: {question_id for question_id, _ in applied}}, vote_deltas=applied
+        )
+
+    async def import_questions(
+        self,
+        questions: AsyncIterable[Mapping[str, Any]],
+        batch_size: int = 1000,
+        session: Optional[AsyncSession] = None,
+    ) -> int:
+        """Bulk insert questions with their choices.
+
+        Questions are consumed from given iterator in bounded batches, so next batch is requested only after
+        previous one was written to database.
+
+        :param questions: iterator over question mappings with "question_text", optional "pub_date" and
+            optional "choices" list of mappings with "choice_text" and optional "votes".
+        :type questions: AsyncIterable[Mapping[str, Any]].
+        :param batch_size: number of questions written to database at once, reduced to fit parameters of one
+            statement.
+        :type batch_size: int, default 1000.
+        :param session: session to use for creating entries in database.
+        :type session: Optional[AsyncSession], default None.
+        :return: number of imported questions.
+        :rtype: int.
+        """
+        batch_size = min(batch_size, MAX_QUERY_PARAMS // IMPORT_QUESTION_PARAMS)
+        import_questions = partial(self._import_questions, questions=questions, batch_size=batch_size)
+        if not session:
+            async with self.transaction() as session:
+                return await import_questions(session=session)
+        else:
+            return await import_questions(session=session)
+
+    async def _import_questions(
+        self, questions: AsyncIterable[Mapping[str, Any]], session: AsyncSession, batch_size: int = 1000
+    ) -> int:
+        """Bulk insert questions with their choices.
+
+        :param questions: iterator over question mappings with "question_text", optional "pub_date" and
+            optional "choices" list of mappings with "choice_text" and optional "votes".
+        :type questions: AsyncIterable[Mapping[str, Any]].
+        :param session: session to use for creating entries in database.
+        :type session: AsyncSession.
+        :param batch_size: number of questions written to database at once.
+        :type batch_size: int, default 1000.
+        :return: number of imported questions.
+        :rtype: int.
+        """
+        imported_ids = []
+        batch = []
+        async for question in questions:
+            batch.append(question)
+            if len(batch) >= batch_size:
+                imported_ids.extend(await self._import_questions_batch(questions=batch, session=session))
+                batch = []
+        if batch:
+            imported_ids.extend(await self._import_questions_batch(questions=batch, session=session))
+
+        self._on_commit(
+            session, changes=lambda: {Question.__tablename__: imported_ids, Choice.__tablename__: imported_ids}
+        )
+        return len(imported_ids)
+
+    async def _import_questions_batch(
+        self, questions: Sequence[Mapping[str, Any]], session: AsyncSession
+    ) -> Sequence[int]:
+        """Insert batch of questions with one multi-row INSERT and their choices with COPY.
+
+        Ids of questions are allocated from sequence beforehand, so choices are linked to questions without
+        relying on order of rows returned by INSERT. Publication dates of choices, which they are partitioned by, are
+        the ones questions got in database.
+
+        :param questions: question mappings.
+        :type questions: Sequence[Mapping[str, Any]].
+        :param session: session to use for creating entries in database.
+        :type session: AsyncSession.
+        :return: ids of inserted questions.
+        :rtype: Sequence[int].
+        """
+        question_table, choice_table = Question.__table__, Choice.__table__
+
+        id_sequence = func.pg_get_serial_sequence(question_table.fullname, question_table.c.id.name)
+        result = await session.execute(
+            select(func.nextval(id_sequence)).select_from(func.generate_series(1, len(questions)))
+        )
+        question_ids = result.scalars().all()
+
+        result = await session.execute(
+            insert(question_table).values([
+                {
+                    'id': question_id,
+                    'question_text': question['question_text'],
+                    'pub_date': question.get('pub_date') or func.current_date(),
+                }
+                for question_id, question in zip(question_ids, questions)
+            ]).returning(question_table.c.id, question_table.c.pub_date)
+        )
+        pub_dates = dict(result.all())
+
+        choice_records = [
+            (choice['choice_text'], choice.get('votes', 0), question_id, pub_dates[question_id])
+            for question_id, question in zip(question_ids, questions)
+            for choice in question.get('choices', ())
+        ]
+        if choice_records:
+            connection = await session.connection()
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.connection.driver_connection.copy_records_to_table(
+                choice_table.name,
+                records=choice_records,
+                columns=tuple(
+                    column.name for column in (
+                        choice_table.c.choice_text, choice_table.c.votes, choice_table.c.question_id,
+                        choice_table.c.pub_date,
+                    )
+                ),
+                schema_name=choice_table.schema,
+            )
+
+        return question_ids
+
+    def _on_commit(
+        self, session: AsyncSession, changes: Callable[[], Changes], vote_deltas: Optional[VoteDeltas] = None
+    ):
+        """Register changes of data made in given session once session is committed.
+
+        Current context is marked as written, so its following reads may be served by primary database.
+
+        :param session: session in which data was changed.
+        :type session: AsyncSession.
+        :param changes: callable returning mapping of changed tables to scopes of changed data (all scopes if None).
+        :type changes: Callable[[], Changes].
+        :param vote_deltas: votes added to choices, if changes are made only by adding votes.
+        :type vote_deltas: Optional[VoteDeltas], default None.
+        """
+        event.listen(
+            session.sync_session,
+            'after_commit',
+            lambda _: self._register_changes(changes(), vote_deltas),
+            once=True,
+        )
+        self.mark_written()
+
+    def _register_changes(self, changes: Changes, vote_deltas: Optional[VoteDeltas] = None):
+        """Register committed changes of data.
+
+        Versions of changed data are bumped, cached data is invalidated and change listeners are notified.
+
+        :param changes: mapping of changed tables to scopes of changed data (all scopes if None).
+        :type changes: Changes.
+        :param vote_deltas: votes added to choices, if changes are made only by adding votes.
+        :type vote_deltas: Optional[VoteDeltas], default None.
+        """
+        for table, scopes in changes.items():
+            self._versions.bump(table, scopes)
+            if self._cache:
+                self._cache.invalidate(table, scopes)
+        for listener in self._change_listeners:
+            listener(changes, vote_deltas)
+
+    @staticmethod
+    def _scopes(entity: Type[BaseTable], conditions: Optional[MutableMapping[Column, Any]]) -> Optional[Set[Any]]:
+        """Get scopes of data matched by given conditions.
+
+        :param entity: entity to which conditions are applied.
+        :type entity: Type[BaseTable].
+        :param conditions: mapping of columns to values which are used as conditions.
+        :type conditions: Optional[MutableMapping[Column, Any]].
+        :return: scopes of matched data or None if data of any scope may be matched.
+        :rtype: Optional[Set[Any]].
+        """
+        scope_column = SCOPE_COLUMNS.get(entity.__tablename__)
+        for column, value in (conditions or {}).items():
+            if column.key != scope_column:
+                continue
+            if isinstance(value, In):
+                return set(value.values)
+            if not isinstance(value, Filter):
+                return {value}
+        return None
+
+    @staticmethod
+    def _dependents(entity: Type[BaseTable]) -> Tuple[str]:
+        """Get names of tables whose rows depend on rows of given entity."""
+        return tuple(
+            relation.mapper.class_.__tablename__
+            for relation in entity.__mapper__.relationships
+            if relation.direction is ONETOMANY
+        )
+
+    @classmethod
+    def _created_changes(cls, entities: Iterable[BaseTable]) -> Changes:
+        """Get changes made by creation of given entities together with their loaded dependents.
+
+        :param entities: created entities.
+        :type entities: Iterable[BaseTable].
+        :return: mapping of changed tables to scopes of changed data.
+        :rtype: Changes.
+        """
+        changes = defaultdict(set)
+        for entity in entities:
+            table = entity.__tablename__
+            scope_column = SCOPE_COLUMNS.get(table)
+            scope = getattr(entity, scope_column) if scope_column else None
+            for changed_table in (table, *cls._dependents(type(entity))):
+                changed_scopes = changes[changed_table]
+                if scope is not None:
+                    changed_scopes.add(scope)
+        return changes
+
+    @staticmethod
+    def _query_key(
+        entity: Type[BaseTable],
+        conditions: Optional[MutableMapping[Column, Any]],
+        with_relations: Optional[Iterable[relationship]],
+        limit: Optional[int],
+        after: Optional[Any],
+        order_by: Ordering = (),
+        fields: Iterable[Column] = (),
+    ) -> Optional[Hashable]:
+        """Build key identifying query or None if query is not cacheable."""
+        key = (
+            entity.__tablename__,
+            tuple(sorted((column.key, value) for column, value in (conditions or {}).items())),
+            tuple(sorted(relation.key for relation in (with_relations or ()))),
+            limit,
+            after,
+            tuple((column.key, descending) for column, descending in order_by),
+            field_keys(fields),
+        )
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def _replicas_may_lag(
+        self,
+        entity: Type[BaseTable],
+        conditions: Optional[MutableMapping[Column, Any]],
+        with_relations: Optional[Iterable[relationship]],
+    ) -> bool:
+        """Check if data read by query changed too recently to be read from replicas.
+
+        Versions of data are bumped as soon as primary database commits changes, so data read from replica which
+        did not catch up yet would be served under new version, e.g. as ETag, and cached as current.
+        """
+        if not self._replicas:
+            return False
+        changed_after = time.monotonic() - self.replica_lag
+        return any(
+            self._versions.changed_at(table, scope) > changed_after
+            for table, scope in self._cache_tags(entity, conditions, with_relations)
+        )
+
+    @classmethod
+    def _cache_tags(
+        cls,
+        entity: Type[BaseTable],
+        conditions: Optional[MutableMapping[Column, Any]],
+        with_relations: Optional[Iterable[relationship]],
+    ) -> Set[Tag]:
+        """Build cache tags of query.
+
+        Related entities share scope of retrieved entity, as every relation of polls belongs to one question.
+        """
+        scopes = cls._scopes(entity, conditions)
+        # Data of several scopes is tagged as data of any scope, as tags of cache entry share one scope
+        scope = next(iter(scopes)) if scopes and len(scopes) == 1 else ANY_SCOPE
+        tables = (
+            entity.__tablename__,
+            *(relation.property.mapper.class_.__tablename__ for relation in (with_relations or ())),
+        )
+        return {(table, scope) for table in tables}
@@ -0,0 +1,143 @@
+# Incrementally maintained poll results
+from collections import OrderedDict
+from functools import partial
+from typing import Dict, Optional
+
+from common.serializers import dumps
+from common.singleflight import SingleFlight
+from connectors.db.base import REQUEST_BOUND_VARS
+from modules.data_service.models import Question, Choice
+from modules.data_service.polls import PollsDataService, Changes, VoteDeltas
+
+
+class PollResults:
+    """Vote counts of choices of one question together with their serialized representation."""
+
+    __slots__ = ('question_id', 'pub_date', 'question_text', 'choice_texts', 'votes', 'total_votes', '_payload')
+
+    def __init__(self, question: Question):
+        choices = sorted(question.choices, key=lambda choice: choice.id)
+        self.question_id = question.id
+        self.pub_date = question.pub_date
+        self.question_text = question.question_text
+        self.choice_texts = {choice.id: choice.choice_text for choice in choices}
+        self.votes = {choice.id: choice.votes for choice in choices}
+        self.total_votes = sum(self.votes.values())
+        self._payload: Optional[bytes] = None
+
+    @property
+    def payload(self) -> bytes:
+        """JSON representation of results, rebuilt only after results change."""
+        if self._payload is None:
+            self._payload = dumps(self.as_dict())
+        return self._payload
+
+    def add_votes(self, choice_id: int, count: int):
+        if choice_id not in self.votes:
+            return
+        self.votes[choice_id] += count
+        self.total_votes += count
+        self._payload = None
+
+    def as_dict(self) -> dict:
+        total_votes = self.total_votes
+        return {
+            'question_id': self.question_id,
+            'question_text': self.question_text,
+            'total_votes': total_votes,
+            'choices': tuple(
+                {
+                    'id': choice_id,
+                    'choice_text': self.choice_texts[choice_id],
+                    'votes': votes,
+                    'percentage': round(votes * 100 / total_votes, 2) if total_votes else 0.0,
+                }
+                for choice_id, votes in self.votes.items()
+            ),
+        }
+
+
+class ResultsSummary:
+    """Summary of poll results maintained incrementally from committed vote flushes.
+
+    Results of a question are loaded from database once, then committed votes are added to them as they are
+    flushed, so reading results costs the same regardless of number of choices and votes. Results are dropped
+    and reloaded on next read when choices of question change in any other way.
+    """
+
+    def __init__(self, data_service: PollsDataService, maxsize: int = 10000):
+        self._data_service = data_service
+        self._maxsize = maxsize
+        self._results: OrderedDict[int, PollResults] = OrderedDict()
+        self._loads = SingleFlight(isolated_vars=REQUEST_BOUND_VARS)
+        self.loads = 0
+
+    def __enter__(self):
+        self._data_service.add_change_listener(self._on_changes)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._data_service.remove_change_listener(self._on_changes)
+        self._results.clear()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {'size': len(self._results), 'loads': self.loads}
+
+    async def get(self, question_id: int) -> Optional[PollResults]:
+        """Get results of question.
+
+        :param question_id: id of question.
+        :type question_id: int.
+        :return: results of question or None if question does not exist.
+        :rtype: Optional[PollResults].
+        """
+        results = self._results.get(question_id)
+        if results is not None:
+            self._results.move_to_end(question_id)
+            return results
+
+        return await self._data_service.until_deadline(self._loads.do(question_id, partial(self._load, question_id)))
+
+    async def _load(self, question_id: int) -> Optional[PollResults]:
+        """Load results of question from database and keep them if no votes were committed meanwhile."""
+        versions = self._data_service.versions
+        tables = (Question.__tablename__, Choice.__tablename__)
+        version = versions.version(tables, scope=question_id)
+        # Results are read from primary bypassing cache, as both may miss votes already applied to summary
+        async with self._data_service.transaction() as session:
+            questions = await self._data_service.get(
+                entity=Question,
+                conditions={Question.id: question_id},
+                with_relations=(Question.choices,),
+                session=session,
+            )
+        if not questions:
+            return None
+
+        self.loads += 1
+        results = PollResults(questions[0])
+        # Votes committed during loading may be missing from loaded results or already counted by them
+        if version == versions.version(tables, scope=question_id):
+            self._results[question_id] = results
+            while len(self._results) > self._maxsize:
+                self._results.popitem(last=False)
+        return results
+
+    def _on_changes(self, changes: Changes, vote_deltas: Optional[VoteDeltas]):
+        if vote_deltas is not None:
+            for (question_id, choice_id), count in vote_deltas.items():
+                results = self._results.get(question_id)
+                if results is not None:
+                    results.add_votes(choice_id, count)
+            return
+
+        for table in (Question.__tablename__, Choice.__tablename__):
+            if table not in changes:
+                continue
+            scopes = changes[table]
+            if scopes is None:
+                self._results.clear()
+                return
+            for question_id in scopes:
+                self._results.pop(question_id, None)
@@ -0,0 +1,76 @@
+# Versions of stored data
+import secrets
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional
+
+from modules.data_service.cache import ANY_SCOPE
+
+
+class DataVersions:
+    """In-memory counters of committed changes per table and per question scope.
+
+    Versions are cheap to read and change whenever data they describe changes, so they can be used as
+    validators of cached representations (e.g. ETags) without querying database. Times of the latest changes are
+    kept as well, so that data changed too recently to be replicated is recognized.
+    """
+
+    def __init__(self):
+        # Distinguishes counters of different processes and restarts
+        self._token = secrets.token_hex(4)
+        self._tables: Counter[str] = Counter()
+        self._table_resets: Counter[str] = Counter()
+        self._scopes: Counter[tuple] = Counter()
+        # Monotonic times of the latest changes of tables, of all their scopes and of single scopes
+        self._tables_changed_at: Dict[str, float] = {}
+        self._table_resets_changed_at: Dict[str, float] = {}
+        self._scopes_changed_at: Dict[tuple, float] = {}
+
+    def bump(self, table: str, scopes: Optional[Iterable[Any]] = None):
+        """Register committed change of table data.
+
+        :param table: name of changed table.
+        :type table: str.
+        :param scopes: scopes of changed data, data of all scopes is considered changed if not given.
+        :type scopes: Optional[Iterable[Any]], default None.
+        """
+        changed_at = time.monotonic()
+        self._tables[table] += 1
+        self._tables_changed_at[table] = changed_at
+        if scopes is None:
+            self._table_resets[table] += 1
+            self._table_resets_changed_at[table] = changed_at
+        else:
+            for scope in scopes:
+                self._scopes[(table, scope)] += 1
+                self._scopes_changed_at[(table, scope)] = changed_at
+
+    def version(self, tables: Iterable[str], scope: Any = ANY_SCOPE) -> str:
+        """Get version of data of given tables.
+
+        :param tables: names of tables data is built from.
+        :type tables: Iterable[str].
+        :param scope: scope of data, version of whole tables is returned if not given.
+        :type scope: Any, default ANY_SCOPE.
+        :return: opaque version string.
+        :rtype: str.
+        """
+        if scope is ANY_SCOPE:
+            counters = (str(self._tables[table]) for table in tables)
+        else:
+            counters = (f'{self._table_resets[table]}.{self._scopes[(table, scope)]}' for table in tables)
+        return '-'.join((self._token, *counters))
+
+    def changed_at(self, table: str, scope: Any = ANY_SCOPE) -> float:
+        """Get monotonic time of the latest committed change of data of given table.
+
+        :param table: name of table.
+        :type table: str.
+        :param scope: scope of data, time of the latest change of whole table is returned if not given.
+        :type scope: Any, default ANY_SCOPE.
+        :return: time of change or 0.0 if data was not changed.
+        :rtype: float.
+        """
+        if scope is ANY_SCOPE:
+            return self._tables_changed_at.get(table, 0.0)
+        return max(self._table_resets_changed_at.get(table, 0.0), self._scopes_changed_at.get((table, scope), 0.0))
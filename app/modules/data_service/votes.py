@@ -0,0 +1,144 @@
+# Write-behind buffer for choice votes
+import asyncio
+import datetime
+import logging
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy.exc import DBAPIError
+
+from modules.data_service.polls import PollsDataService
+
+logger = logging.getLogger(__name__)
+
+
+class VoteBuffer:
+    """In-process aggregation buffer for choice votes.
+
+    Votes are merged per choice in memory and periodically flushed to database as one batch of atomic
+    increments, so a burst of votes costs one transaction instead of one transaction per vote.
+    """
+
+    def __init__(self, data_service: PollsDataService, flush_interval: float = 0.5, flush_size: int = 1000):
+        self._data_service = data_service
+        self._flush_interval = flush_interval
+        self._flush_size = flush_size
+        self._pending: Counter[Tuple[int, int]] = Counter()
+        # Publication dates of questions of pending votes, which let database look up choices in their partitions
+        self._pub_dates: Dict[int, datetime.date] = {}
+        self._flush_requested = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def start(self):
+        """Start periodic flushing of buffered votes."""
+        if not self._flusher:
+            self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def close(self):
+        """Stop periodic flushing and drain all buffered votes to database."""
+        if self._flusher:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+
+    def add(self, question_id: int, choice_id: int, pub_date: datetime.date, count: int = 1):
+        """Buffer votes for given choice.
+
+        Votes are dropped on flush if question was meanwhile deleted or its publication date changed.
+
+        :param question_id: id of question to which choice belongs.
+        :type question_id: int.
+        :param choice_id: id of choice to vote for.
+        :type choice_id: int.
+        :param pub_date: publication date of question.
+        :type pub_date: datetime.date.
+        :param count: number of votes to add.
+        :type count: int, default 1.
+        """
+        self._pending[(question_id, choice_id)] += count
+        self._pub_dates[question_id] = pub_date
+        if len(self._pending) >= self._flush_size:
+            self._flush_requested.set()
+
+    async def flush(self):
+        """Write all buffered votes to database as one batch."""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, Counter()
+            pub_dates, self._pub_dates = self._pub_dates, {}
+            try:
+                await self._write(pending, pub_dates, tuple(pending))
+            except Exception:
+                # Keep votes which were not written for the next attempt instead of losing them
+                self._pending.update(pending)
+                # Dates of votes added meanwhile are more recent
+                self._pub_dates = {**pub_dates, **self._pub_dates}
+                raise
+
+    async def _write(self, pending: Counter, pub_dates: Dict[int, datetime.date], keys: Iterable[Tuple[int, int]]):
+        """Write votes of given choices, removing them from pending votes once they are written or dropped.
+
+        Batch rejected by database as invalid is split in halves until votes causing it are isolated and dropped,
+        so that they never hold back votes of other choices.
+
+        :param pending: pending votes by (question id, choice id) pairs.
+        :type pending: Counter.
+        :param pub_dates: publication dates of questions by their ids.
+        :type pub_dates: Dict[int, datetime.date].
+        :param keys: (question id, choice id) pairs of votes to write.
+        :type keys: Iterable[Tuple[int, int]].
+        """
+        keys = tuple(keys)
+        try:
+            await self._data_service.increment_votes(
+                deltas=Counter({key: pending[key] for key in keys}),
+                pub_dates={question_id: pub_dates[question_id] for question_id, _ in keys},
+            )
+            rejection = None
+        except DBAPIError as error:
+            if not _is_rejected(error):
+                raise
+            rejection = error
+        if rejection is not None and len(keys) > 1:
+            middle = len(keys) // 2
+            await self._write(pending, pub_dates, keys[:middle])
+            await self._write(pending, pub_dates, keys[middle:])
+            return
+        if rejection is not None:
+            logger.error(
+                'Dropped %d votes for choice %s rejected by database: %s', pending[keys[0]], keys[0], rejection.orig
+            )
+        for key in keys:
+            del pending[key]
+
+    async def _flush_periodically(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self._flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception('Failed to flush %d buffered votes', len(self._pending))
+
+
+def _is_rejected(error: DBAPIError) -> bool:
+    """Check if database or driver rejected statement for its data, so that retrying it could not succeed."""
+    sqlstate = getattr(error.orig, 'sqlstate', None) or ''
+    # Classes of data exceptions and integrity constraint violations, driver rejects parameters with ValueError
+    return sqlstate[:2] in ('22', '23') or isinstance(error.orig.__cause__, ValueError)
@@ -0,0 +1,67 @@
+# Warm-up of data service after start of application
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+from modules.data_service.polls import PollsDataService
+
+logger = logging.getLogger(__name__)
+
+
+class WarmUp:
+    """Warm-up of data service running in background, so that application reports readiness only after it.
+
+    Application accepts connections during warm-up, so cheap health checks are answered right away while load
+    balancers keep routing requests to other instances until warm-up finishes. Failed warm-up is retried.
+    """
+
+    def __init__(self, data_service: PollsDataService, retry_interval: float = 5):
+        self._data_service = data_service
+        self._retry_interval = retry_interval
+        self._task: Optional[asyncio.Task] = None
+        self.ready = False
+        self.attempts = 0
+        self.duration: Optional[float] = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @property
+    def stats(self) -> Dict[str, object]:
+        return {'ready': self.ready, 'attempts': self.attempts, 'duration': self.duration}
+
+    def start(self):
+        """Start warm-up in background."""
+        if not self._task:
+            self._task = asyncio.create_task(self._warm_up())
+
+    async def close(self):
+        """Stop warm-up if it is still running and report application as not ready."""
+        self.ready = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _warm_up(self):
+        while True:
+            self.attempts += 1
+            started_at = time.perf_counter()
+            try:
+                await self._data_service.warm_up()
+            except Exception:
+                logger.exception('Warm-up of data service failed, retrying in %s seconds', self._retry_interval)
+                await asyncio.sleep(self._retry_interval)
+                continue
+            self.duration = time.perf_counter() - started_at
+            self.ready = True
+            logger.info('Warm-up of data service finished in %.3f seconds', self.duration)
+            return
@@ -0,0 +1,230 @@
+"""HTTP benchmark of polls application.
+
+Application is started in-process with aiohttp test server and driven by a configurable mix of requests at
+fixed concurrency. Latency percentiles and throughput are printed as JSON, so results of runs can be compared.
+
+Run against in-memory data service to measure framework overhead only::
+
+    python benchmarks/http_benchmark.py --backend memory
+
+Run against PostgreSQL configured in config/polls.yaml::
+
+    python benchmarks/http_benchmark.py --backend postgres --output postgres.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import pathlib
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Mapping, Optional
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / 'app'))
+
+import aiohttp  # noqa: E402
+from aiohttp.test_utils import TestServer  # noqa: E402
+
+from api import create_app  # noqa: E402
+from api.contexts import pg_context  # noqa: E402
+from memory_data_service import memory_context  # noqa: E402
+from settings import config  # noqa: E402
+
+BACKENDS = {
+    'memory': memory_context,
+    'postgres': pg_context,
+}
+DEFAULT_MIX = 'list=30,list_expand=40,create=10,update=10,delete=10'
+PERCENTILES = (50, 95, 99)
+
+
+class Workload:
+    """Generator of benchmark requests keeping track of existing questions and their choices."""
+
+    def __init__(self, session: aiohttp.ClientSession, mix: Mapping[str, int], page_size: int, choices: int, seed: int):
+        self._session = session
+        self._operations = tuple(mix)
+        self._weights = tuple(mix.values())
+        self._page_size = page_size
+        self._choices = choices
+        self._random = random.Random(seed)
+        self._question_ids: List[int] = []
+        self._choice_ids: Dict[int, List[int]] = {}
+
+    async def seed(self, questions: int, batch_size: int = 100):
+        """Create initial questions."""
+        for offset in range(0, questions, batch_size):
+            await self._create(min(batch_size, questions - offset))
+
+    async def run_one(self) -> Optional[str]:
+        """Run one randomly chosen operation.
+
+        :return: name of executed operation or None if there was no question to execute it for.
+        :rtype: Optional[str].
+        """
+        operation = self._random.choices(self._operations, weights=self._weights)[0]
+        return operation if await getattr(self, f'_{operation}')() else None
+
+    async def _list(self) -> bool:
+        await self._request('GET', '/questions', params={'limit': self._page_size})
+        return True
+
+    async def _list_expand(self) -> bool:
+        await self._request('GET', '/questions', params={'limit': self._page_size, 'expand': 'choices'})
+        return True
+
+    async def _get(self) -> bool:
+        if not self._question_ids:
+            return False
+        question_id = self._random.choice(self._question_ids)
+        await self._request('GET', f'/questions/{question_id}', params={'expand': 'choices'})
+        return True
+
+    async def _results(self) -> bool:
+        if not self._question_ids:
+            return False
+        question_id = self._random.choice(self._question_ids)
+        await self._request('GET', f'/questions/{question_id}/results')
+        return True
+
+    async def _vote(self) -> bool:
+        if not self._question_ids:
+            return False
+        question_id = self._random.choice(self._question_ids)
+        choice_ids = self._choice_ids[question_id]
+        if not choice_ids:
+            return False
+        await self._request('POST', f'/questions/{question_id}/choices/{self._random.choice(choice_ids)}/vote')
+        return True
+
+    async def _create(self, questions: int = 1) -> bool:
+        body = [
+            {
+                'question_text': f'Benchmark question {self._random.random():.6f}',
+                'choices': [{'choice_text': f'Choice {number}'} for number in range(self._choices)],
+            }
+            for _ in range(questions)
+        ]
+        for question in await self._request('POST', '/questions', json=body):
+            self._question_ids.append(question['id'])
+            self._choice_ids[question['id']] = [choice['id'] for choice in question.get('choices', ())]
+        return True
+
+    async def _update(self) -> bool:
+        if not self._question_ids:
+            return False
+        question_id = self._random.choice(self._question_ids)
+        body = {'question_text': f'Updated question {self._random.random():.6f}'}
+        await self._request('PUT', f'/questions/{question_id}', json=body)
+        return True
+
+    async def _delete(self) -> bool:
+        if not self._question_ids:
+            return False
+        # Question is forgotten before it is deleted, so concurrent operations do not pick it anymore
+        index = self._random.randrange(len(self._question_ids))
+        self._question_ids[index], self._question_ids[-1] = self._question_ids[-1], self._question_ids[index]
+        question_id = self._question_ids.pop()
+        del self._choice_ids[question_id]
+        await self._request('DELETE', f'/questions/{question_id}')
+        return True
+
+    async def _request(self, method: str, path: str, **kwargs) -> Any:
+        async with self._session.request(method, path, **kwargs) as response:
+            response.raise_for_status()
+            if response.content_type == 'application/json':
+                return await response.json()
+            await response.read()
+
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    """Parse request mix like "list=30,create=10" into mapping of operations to weights."""
+    parsed = {}
+    for item in mix.split(','):
+        operation, weight = item.split('=')
+        if not hasattr(Workload, f'_{operation}'):
+            raise argparse.ArgumentTypeError(f'Unknown operation: {operation}')
+        parsed[operation] = int(weight)
+    return parsed
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, object]:
+    """Summarize latencies of requests of one kind."""
+    latencies = sorted(latencies)
+    summary = {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput': len(latencies) / elapsed if elapsed else 0.0,
+    }
+    for percentile in PERCENTILES:
+        rank = max(math.ceil(percentile / 100 * len(latencies)) - 1, 0)
+        summary[f'p{percentile}_ms'] = latencies[rank] * 1000 if latencies else None
+    return summary
+
+
+async def benchmark(args: argparse.Namespace) -> Dict[str, object]:
+    app = create_app(config, data_context=BACKENDS[args.backend])
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+
+    async with TestServer(app) as server:
+        connector = aiohttp.TCPConnector(limit=args.concurrency)
+        async with aiohttp.ClientSession(base_url=server.make_url(''), connector=connector) as session:
+            workload = Workload(session, args.mix, args.page_size, args.choices, args.seed)
+            await workload.seed(args.seed_questions)
+
+            started_at = time.perf_counter()
+            measured_from = started_at + args.warmup
+            finish_at = measured_from + args.duration
+
+            async def worker():
+                while (now := time.perf_counter()) < finish_at:
+                    try:
+                        operation = await workload.run_one()
+                    except (aiohttp.ClientError, asyncio.TimeoutError):
+                        if now >= measured_from:
+                            errors['total'] += 1
+                        continue
+                    if operation and now >= measured_from:
+                        latencies[operation].append(time.perf_counter() - now)
+
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+            elapsed = time.perf_counter() - measured_from
+
+    return {
+        'backend': args.backend,
+        'concurrency': args.concurrency,
+        'duration': args.duration,
+        'mix': args.mix,
+        'seed': args.seed,
+        'total': summarize([latency for values in latencies.values() for latency in values], errors['total'], elapsed),
+        'operations': {
+            operation: summarize(values, 0, elapsed) for operation, values in sorted(latencies.items())
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backend', choices=BACKENDS, default='memory', help='data service to benchmark against')
+    parser.add_argument('--concurrency', type=int, default=32, help='number of concurrent clients')
+    parser.add_argument('--duration', type=float, default=10, help='seconds of measured load')
+    parser.add_argument('--warmup', type=float, default=2, help='seconds of load before measuring')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX), help='weights of operations')
+    parser.add_argument('--seed-questions', type=int, default=200, help='questions created before load')
+    parser.add_argument('--choices', type=int, default=4, help='choices of every created question')
+    parser.add_argument('--page-size', type=int, default=50, help='questions requested by list operations')
+    parser.add_argument('--seed', type=int, default=0, help='seed of random generator')
+    parser.add_argument('--output', type=pathlib.Path, help='file to write JSON results to')
+    args = parser.parse_args()
+
+    results = json.dumps(asyncio.run(benchmark(args)), indent=2)
+    print(results)
+    if args.output:
+        args.output.write_text(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+# In-memory implementation of polls data service for benchmarks
+import datetime
+import itertools
+from contextlib import asynccontextmanager
+from typing import (
+    Any, AsyncIterable, AsyncIterator, Callable, Dict, Iterable, Mapping, MutableMapping, Optional, Tuple, Type
+)
+
+from sqlalchemy import Column
+from sqlalchemy.orm import configure_mappers, relationship
+
+from api.contexts import polls_services
+from common.serializers import dumps
+from common.singleflight import SingleFlight
+from connectors.db.replicas import ReplicaSet
+from connectors.db.statements import StatementCache
+from modules.data_service.filters import Filter, Ordering
+from modules.data_service.models import BaseTable, Question, Choice
+from modules.data_service.polls import EncodedPage, PollsDataService, Changes, PubDates, VoteDeltas
+from modules.data_service.versions import DataVersions
+
+
+class InMemoryPollsDataService(PollsDataService):
+    """Polls data service keeping data in process memory.
+
+    It implements the same interface as ``PollsDataService`` without database, so benchmarks against it measure
+    overhead of web framework, views and serialization only.
+    """
+
+    def __init__(self):
+        # Engine of PostgreSQL data service is intentionally not created
+        self._cache = None
+        self._versions = DataVersions()
+        self._statements = StatementCache()
+        self._flights = SingleFlight()
+        self._change_listeners = []
+        self._replicas = ReplicaSet(())
+        self._questions: MutableMapping[int, Question] = {}
+        self._question_ids = itertools.count(1)
+        self._choice_ids = itertools.count(1)
+
+    async def close_pool(self):
+        self._questions.clear()
+
+    async def warm_up(self):
+        configure_mappers()
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield None
+
+    @asynccontextmanager
+    async def read_transaction(self, from_primary: bool = False):
+        yield None
+
+    async def _get(
+        self,
+        entity: Type[BaseTable],
+        session: Any,
+        conditions: MutableMapping[Column, Any] = None,
+        with_relations: Optional[Iterable[relationship]] = None,
+        limit: Optional[int] = None,
+        after: Optional[Any] = None,
+        order_by: Ordering = (),
+        fields: Iterable[Column] = (),
+    ) -> Tuple[BaseTable]:
+        return tuple(self._filter(entity, conditions, limit, after, order_by))
+
+    async def _get_json(
+        self,
+        entity: Type[BaseTable],
+        session: Any,
+        conditions: MutableMapping[Column, Any] = None,
+        with_relations: Optional[Iterable[relationship]] = None,
+        limit: Optional[int] = None,
+        after: Optional[Any] = None,
+        order_by: Ordering = (),
+        fields: Iterable[Column] = (),
+    ) -> EncodedPage:
+        entities = tuple(self._filter(entity, conditions, limit, after, order_by))
+        payload = dumps(tuple(map(entity.encoder(with_relations or (), fields), entities)))
+        return EncodedPage(payload, len(entities), entities[-1].id if entities else None)
+
+    async def _stream(
+        self,
+        entity: Type[BaseTable],
+        session: Any,
+        conditions: MutableMapping[Column, Any] = None,
+        with_relations: Optional[Iterable[relationship]] = None,
+        limit: Optional[int] = None,
+        after: Optional[Any] = None,
+        order_by: Ordering = (),
+        fields: Iterable[Column] = (),
+        batch_size: int = 500,
+    ) -> AsyncIterator[BaseTable]:
+        for entity in self._filter(entity, conditions, limit, after, order_by):
+            yield entity
+
+    async def _create(self, entities: Iterable[BaseTable], session: Any):
+        entities = tuple(entities)
+        for entity in entities:
+            if isinstance(entity, Question):
+                self._add_question(entity)
+            else:
+                self._add_choice(self._questions[entity.question_id], entity)
+        self._on_commit(session, changes=lambda: self._created_changes(entities))
+
+    async def _update(
+        self,
+        entity: Type[BaseTable],
+        set_values: MutableMapping[Column, Any],
+        session: Any,
+        conditions: MutableMapping[Column, Any] = None,
+        returning: bool = False,
+    ) -> Optional[Iterable[BaseTable]]:
+        updated_entities = tuple(self._filter(entity, conditions))
+        for updated_entity in updated_entities:
+            for column, value in set_values.items():
+                setattr(updated_entity, column.key, value)
+        self._on_commit(session, changes=lambda: {entity.__tablename__: self._scopes(entity, conditions)})
+        if returning:
+            return updated_entities
+
+    async def _update_many(
+        self, entity: Type[BaseTable], changes: Iterable[Tuple[Any, MutableMapping[Column, Any]]], session: Any
+    ) -> Tuple[Dict[str, Any], ...]:
+        updated_rows = []
+        for key, set_values in changes:
+            updated_entities = tuple(self._filter(entity, {entity.__mapper__.primary_key[0]: key}))
+            for updated_entity in updated_entities:
+                for column, value in set_values.items():
+                    setattr(updated_entity, column.key, value)
+                updated_rows.append(updated_entity.as_dict())
+        self._on_commit(session, changes=lambda: {entity.__tablename__: None})
+        return tuple(updated_rows)
+
+    async def _delete(
+        self,
+        entity: Type[BaseTable],
+        session: Any,
+        conditions: MutableMapping[Column, Any] = None,
+        returning: bool = False,
+    ) -> Optional[Iterable[BaseTable]]:
+        deleted_entities = tuple(self._filter(entity, conditions))
+        for deleted_entity in deleted_entities:
+            if isinstance(deleted_entity, Question):
+                del self._questions[deleted_entity.id]
+            else:
+                self._questions[deleted_entity.question_id].choices.remove(deleted_entity)
+        scopes = self._scopes(entity, conditions)
+        self._on_commit(
+            session, changes=lambda: {table: scopes for table in (entity.__tablename__, *self._dependents(entity))}
+        )
+        if returning:
+            return deleted_entities
+
+    async def _increment_votes(self, deltas: VoteDeltas, pub_dates: PubDates, session: Any):
+        applied = {}
+        for (question_id, choice_id), delta in deltas.items():
+            question = self._questions.get(question_id)
+            if question is None or question.pub_date != pub_dates[question_id]:
+                continue
+            for choice in question.choices:
+                if choice.id == choice_id:
+                    choice.votes += delta
+                    applied[(question_id, choice_id)] = delta
+        if not applied:
+            return
+        changed_question_ids = {question_id for question_id, _ in applied}
+        self._on_commit(session, changes=lambda: {Choice.__tablename__: changed_question_ids}, vote_deltas=applied)
+
+    async def _import_questions(
+        self, questions: AsyncIterable[Mapping[str, Any]], session: Any, batch_size: int = 1000
+    ) -> int:
+        imported_ids = []
+        async for question in questions:
+            imported_question = Question(
+                question_text=question['question_text'],
+                pub_date=question.get('pub_date'),
+                choices=[Choice(**choice) for choice in question.get('choices', ())],
+            )
+            self._add_question(imported_question)
+            imported_ids.append(imported_question.id)
+        self._on_commit(
+            session, changes=lambda: {Question.__tablename__: imported_ids, Choice.__tablename__: imported_ids}
+        )
+        return len(imported_ids)
+
+    def _on_commit(self, session: Any, changes: Callable[[], Changes], vote_deltas: Optional[VoteDeltas] = None):
+        # Changes are applied immediately, so they are committed as soon as they are made
+        self._register_changes(changes(), vote_deltas)
+        self.mark_written()
+
+    def _add_question(self, question: Question):
+        question.id = next(self._question_ids)
+        if question.pub_date is None:
+            question.pub_date = datetime.date.today()
+        for choice in question.choices:
+            self._add_choice(question, choice)
+        self._questions[question.id] = question
+
+    def _add_choice(self, question: Question, choice: Choice):
+        choice.id = next(self._choice_ids)
+        choice.question_id = question.id
+        choice.pub_date = question.pub_date
+        if choice.votes is None:
+            choice.votes = 0
+        if choice not in question.choices:
+            question.choices.append(choice)
+
+    def _filter(
+        self,
+        entity: Type[BaseTable],
+        conditions: Optional[MutableMapping[Column, Any]] = None,
+        limit: Optional[int] = None,
+        after: Optional[Any] = None,
+        order_by: Ordering = (),
+    ) -> Iterable[BaseTable]:
+        conditions = {column.key: value for column, value in (conditions or {}).items()}
+        if entity is Question and 'id' in conditions and not isinstance(conditions['id'], Filter):
+            question = self._questions.get(conditions['id'])
+            candidates = (question,) if question else ()
+        elif entity is Question:
+            candidates = self._questions.values()
+        else:
+            candidates = itertools.chain.from_iterable(question.choices for question in self._questions.values())
+
+        orders = [(column.key, descending) for column, descending in order_by]
+        if all(key != 'id' for key, _ in orders):
+            orders.append(('id', False))
+        id_descending = next(descending for key, descending in orders if key == 'id')
+        selected = [
+            candidate
+            for candidate in candidates
+            if (after is None or (candidate.id < after if id_descending else candidate.id > after))
+            and all(self._matches(getattr(candidate, key), value) for key, value in conditions.items())
+        ]
+        # Stable sorts from the least significant order
+        for key, descending in reversed(orders):
+            selected.sort(key=lambda candidate: getattr(candidate, key), reverse=descending)
+        return tuple(itertools.islice(selected, limit))
+
+    @staticmethod
+    def _matches(value: Any, condition: Any) -> bool:
+        return condition.matches(value) if isinstance(condition, Filter) else value == condition
+
+
+async def memory_context(app):
+    """Controls initialization and disposal of in-memory data service."""
+    async with InMemoryPollsDataService() as polls_data_service:
+        async with polls_services(app, polls_data_service):
+            yield
@@ -1,7 +1,18 @@
-from sqlalchemy import create_engine, MetaData
+import argparse
+import datetime
+import io
+import math
+import random
+import time
+
+from sqlalchemy import create_engine, inspect, MetaData
 
 from app.settings import config
-from connectors.db.models import question, choice
+from connectors.db.models import (
+    question, choice, choice_question_id_index, question_pub_date_index, question_text_pattern_index,
+    partitioned_question, partitioned_choice, partitioned_indexes,
+)
+from connectors.db.partitions import INTERVALS, MAX_PARTITIONS, create_partitions, partitions_between
 
 DSN = "postgresql://{user}:{password}@{host}:{port}/{database}"
 
@@ -11,25 +22,206 @@ def create_tables(engine):
     meta.create_all(bind=engine, tables=[question, choice])
 
 
+def create_partitioned_tables(engine, start_date, end_date, interval='year'):
+    """Create tables partitioned by publication date with partitions covering given dates.
+
+    Partitioned tables require PostgreSQL 15 or higher, earlier versions delete choices of question, whose changed
+    publication date moves it to another partition. Existing tables are kept as they are.
+    """
+    meta = MetaData()
+    meta.create_all(bind=engine, tables=[partitioned_question, partitioned_choice])
+    conn = engine.raw_connection()
+    try:
+        create_partitions(conn.cursor(), partitions_between(start_date, end_date, interval))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def upgrade_tables(engine):
+    """Add publication date of question to choices of tables created before they were partitionable."""
+    if any(column['name'] == 'pub_date' for column in inspect(engine).get_columns('choice')):
+        return
+    with engine.begin() as conn:
+        conn.exec_driver_sql('ALTER TABLE choice ADD COLUMN pub_date date')
+        conn.exec_driver_sql(
+            'UPDATE choice SET pub_date = question.pub_date FROM question WHERE question.id = choice.question_id'
+        )
+        conn.exec_driver_sql('ALTER TABLE choice ALTER COLUMN pub_date SET NOT NULL')
+        conn.exec_driver_sql('ALTER TABLE question ADD CONSTRAINT uq_question_id_pub_date UNIQUE (id, pub_date)')
+        conn.exec_driver_sql(
+            'ALTER TABLE choice DROP CONSTRAINT choice_question_id_fkey, '
+            'ADD CONSTRAINT fk_choice_question FOREIGN KEY (question_id, pub_date) '
+            'REFERENCES question (id, pub_date) ON DELETE CASCADE ON UPDATE CASCADE'
+        )
+
+
+def create_indexes(engine, partitioned=False):
+    # Tables created before indexes were introduced get them as well
+    indexes = partitioned_indexes if partitioned else (
+        choice_question_id_index, question_pub_date_index, question_text_pattern_index
+    )
+    for index in indexes:
+        index.create(bind=engine, checkfirst=True)
+
+
 def sample_data(engine):
     conn = engine.connect()
+    pub_date = datetime.date(2015, 12, 15)
     try:
         conn.execute(question.insert(), [
             {'question_text': 'What\'s new?',
-             'pub_date': '2015-12-15 17:17:49.629+02'}
+             'pub_date': pub_date}
         ])
         conn.execute(choice.insert(), [
-            {'choice_text': 'Not much', 'votes': 0, 'question_id': 1},
-            {'choice_text': 'The sky', 'votes': 0, 'question_id': 1},
-            {'choice_text': 'Just hacking again', 'votes': 0, 'question_id': 1},
+            {'choice_text': 'Not much', 'votes': 0, 'question_id': 1, 'pub_date': pub_date},
+            {'choice_text': 'The sky', 'votes': 0, 'question_id': 1, 'pub_date': pub_date},
+            {'choice_text': 'Just hacking again', 'votes': 0, 'question_id': 1, 'pub_date': pub_date},
         ])
     finally:
         conn.close()
 
 
+def _zipf_normalizer(count, exponent):
+    """Sum of unnormalized weights of ranks 1..count following Zipf's law."""
+    return math.fsum(rank ** -exponent for rank in range(1, count + 1))
+
+
+def _zipf_weights(count, exponent):
+    """Weights of ranks 1..count following Zipf's law, normalized to sum to one."""
+    normalizer = _zipf_normalizer(count, exponent)
+    return [rank ** -exponent / normalizer for rank in range(1, count + 1)]
+
+
+def _coprime_multiplier(rng, count):
+    """Multiplier permuting indices 0..count-1 by multiplication modulo count."""
+    while True:
+        multiplier = rng.randrange(1, count) if count > 1 else 1
+        if math.gcd(multiplier, count) == 1:
+            return multiplier
+
+
+def _copy(cursor, table, columns, rows):
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", io.StringIO(''.join(rows)))
+
+
+def seed_data(
+    engine,
+    questions,
+    min_choices=2,
+    max_choices=5,
+    votes_per_question=10,
+    zipf_exponent=1.1,
+    start_date=datetime.date(2015, 1, 1),
+    days=3650,
+    seed=0,
+    batch_size=100000,
+):
+    """Generate synthetic questions with choices and load them into database with COPY.
+
+    Number of choices of every question is uniformly distributed between given bounds. Votes are distributed
+    between questions following Zipf's law over a random popularity ranking of questions, and between choices of
+    question following the same law, so a few polls get most of the votes. Publication dates are uniformly spread
+    over given number of days. The same seed always produces the same data.
+
+    Data is appended after existing rows and copied in batches of questions, each batch followed by its choices.
+    """
+    rng = random.Random(seed)
+    total_votes = questions * votes_per_question
+    question_normalizer = _zipf_normalizer(questions, zipf_exponent)
+    # Popularity rank of question is a pseudo-random permutation of its index, so it needs no extra memory
+    rank_multiplier = _coprime_multiplier(rng, questions)
+    choice_weights = {count: _zipf_weights(count, zipf_exponent) for count in range(min_choices, max_choices + 1)}
+    dates = [(start_date + datetime.timedelta(days=day)).isoformat() for day in range(days)]
+
+    conn = engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('SELECT coalesce(max(id), 0) FROM question')
+        first_question_id = cursor.fetchone()[0] + 1
+        cursor.execute('SELECT coalesce(max(id), 0) FROM choice')
+        choice_id = cursor.fetchone()[0]
+
+        for batch_start in range(0, questions, batch_size):
+            question_rows, choice_rows = [], []
+            for index in range(batch_start, min(batch_start + batch_size, questions)):
+                question_id = first_question_id + index
+                pub_date = rng.choice(dates)
+                question_rows.append(f'{question_id}\tSynthetic question {question_id}?\t{pub_date}\n')
+
+                rank = index * rank_multiplier % questions + 1
+                question_votes = total_votes * rank ** -zipf_exponent / question_normalizer
+                weights = choice_weights[rng.randint(min_choices, max_choices)]
+                weights = rng.sample(weights, len(weights))
+                for number, weight in enumerate(weights, start=1):
+                    choice_id += 1
+                    # Stochastic rounding keeps expected number of votes exact
+                    votes = int(question_votes * weight + rng.random())
+                    choice_rows.append(f'{choice_id}\tChoice {number}\t{votes}\t{question_id}\t{pub_date}\n')
+
+            _copy(cursor, 'question', ('id', 'question_text', 'pub_date'), question_rows)
+            _copy(cursor, 'choice', ('id', 'choice_text', 'votes', 'question_id', 'pub_date'), choice_rows)
+
+        # Rows were copied with explicit ids, so sequences have to continue after them
+        for table in ('question', 'choice'):
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT coalesce(max(id), 1) FROM {table}))"
+            )
+        conn.commit()
+        cursor.execute('ANALYZE question, choice')
+        conn.commit()
+    finally:
+        conn.close()
+
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Create tables and fill them with sample or synthetic data.')
+    parser.add_argument('--questions', type=int, help='generate given number of synthetic questions')
+    parser.add_argument('--min-choices', type=int, default=2, help='minimal number of choices of question')
+    parser.add_argument('--max-choices', type=int, default=5, help='maximal number of choices of question')
+    parser.add_argument('--votes-per-question', type=float, default=10, help='average number of votes of question')
+    parser.add_argument('--zipf-exponent', type=float, default=1.1, help='skew of votes, 0 means uniform')
+    parser.add_argument(
+        '--start-date', type=datetime.date.fromisoformat, default=datetime.date(2015, 1, 1),
+        help='earliest publication date',
+    )
+    parser.add_argument('--days', type=int, default=3650, help='number of days publication dates are spread over')
+    parser.add_argument('--seed', type=int, default=0, help='seed of random generator')
+    parser.add_argument('--batch-size', type=int, default=100000, help='questions copied in one batch')
+    parser.add_argument(
+        '--partitioned', action='store_true', help='partition new tables by publication date, requires PostgreSQL 15'
+    )
+    parser.add_argument('--partition-interval', choices=INTERVALS, default='year', help='range of one partition')
+    args = parser.parse_args()
+
     db_url = DSN.format(**config['db']['postgres'])
     engine = create_engine(db_url)
 
-    create_tables(engine)
-    sample_data(engine)
+    if args.partitioned:
+        # Partitions cover generated dates and the coming ones
+        end_date = max(args.start_date + datetime.timedelta(days=args.days), datetime.date.today()) + \
+            datetime.timedelta(days=366)
+        if len(list(partitions_between(args.start_date, end_date, args.partition_interval))) > MAX_PARTITIONS:
+            parser.error(f'dates need more than {MAX_PARTITIONS} partitions, use longer interval or fewer days')
+        create_partitioned_tables(engine, args.start_date, end_date, args.partition_interval)
+    else:
+        create_tables(engine)
+        upgrade_tables(engine)
+    create_indexes(engine, args.partitioned)
+    if args.questions:
+        started_at = time.perf_counter()
+        seed_data(
+            engine,
+            questions=args.questions,
+            min_choices=args.min_choices,
+            max_choices=args.max_choices,
+            votes_per_question=args.votes_per_question,
+            zipf_exponent=args.zipf_exponent,
+            start_date=args.start_date,
+            days=args.days,
+            seed=args.seed,
+            batch_size=args.batch_size,
+        )
+        print(f'Generated {args.questions} questions in {time.perf_counter() - started_at:.1f}s')
+    else:
+        sample_data(engine)
@@ -0,0 +1,110 @@
+import argparse
+import datetime
+import os
+
+from sqlalchemy import create_engine
+
+from app.settings import config
+from connectors.db.partitions import (
+    INTERVALS, archive_partition, attach_partition, attached_partitions, create_partitions, detach_partition,
+    detached_partitions, partitions_between, restore_partition,
+)
+from init_db import DSN
+
+
+def _before(partitions, date):
+    return [partition for partition in partitions if partition.upper <= date]
+
+
+def create(cursor, conn, args):
+    partitions = list(partitions_between(args.start_date, args.end_date, args.interval))
+    create_partitions(cursor, partitions)
+    conn.commit()
+    print(f'Ensured {len(partitions)} partitions')
+
+
+def list_partitions(cursor, conn, args):
+    for state, partitions in (('attached', attached_partitions(cursor)), ('detached', detached_partitions(cursor))):
+        for partition in partitions:
+            print(f'{partition.suffix}\t{partition.lower}\t{partition.upper}\t{state}')
+
+
+def detach(cursor, conn, args):
+    # Every partition is detached in its own transaction, so that tables are locked only briefly
+    for partition in _before(attached_partitions(cursor), args.before):
+        detach_partition(cursor, partition)
+        conn.commit()
+        print(f'Detached {partition.suffix}')
+
+
+def attach(cursor, conn, args):
+    for partition in detached_partitions(cursor):
+        attach_partition(cursor, partition)
+        conn.commit()
+        print(f'Attached {partition.suffix}')
+
+
+def archive(cursor, conn, args):
+    os.makedirs(args.directory, exist_ok=True)
+    partitions = sorted(_before(attached_partitions(cursor) + detached_partitions(cursor), args.before))
+    for partition in partitions:
+        path = archive_partition(cursor, partition, args.directory)
+        conn.commit()
+        print(f'Archived {partition.suffix} to {path}')
+
+
+def restore(cursor, conn, args):
+    for path in args.archives:
+        partition = restore_partition(cursor, path)
+        conn.commit()
+        print(f'Restored {partition.suffix} from {path}')
+    cursor.execute('ANALYZE question, choice')
+    conn.commit()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Maintain partitions of questions and choices by publication date.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    create_parser = commands.add_parser('create', help='create missing partitions covering range of dates')
+    create_parser.add_argument('--start-date', type=datetime.date.fromisoformat, default=datetime.date.today())
+    create_parser.add_argument(
+        '--end-date', type=datetime.date.fromisoformat,
+        default=datetime.date.today() + datetime.timedelta(days=366),
+    )
+    create_parser.add_argument('--interval', choices=INTERVALS, default='year', help='range of one partition')
+    create_parser.set_defaults(handler=create)
+
+    list_parser = commands.add_parser('list', help='list attached and detached partitions')
+    list_parser.set_defaults(handler=list_partitions)
+
+    detach_parser = commands.add_parser('detach', help='detach partitions keeping them as standalone tables')
+    detach_parser.add_argument(
+        '--before', type=datetime.date.fromisoformat, required=True, help='detach partitions ending by this date'
+    )
+    detach_parser.set_defaults(handler=detach)
+
+    attach_parser = commands.add_parser('attach', help='attach all detached partitions back')
+    attach_parser.set_defaults(handler=attach)
+
+    archive_parser = commands.add_parser('archive', help='export partitions to archives and drop them')
+    archive_parser.add_argument(
+        '--before', type=datetime.date.fromisoformat, required=True, help='archive partitions ending by this date'
+    )
+    archive_parser.add_argument('--directory', default='archive', help='directory of archives')
+    archive_parser.set_defaults(handler=archive)
+
+    restore_parser = commands.add_parser('restore', help='load partitions back from archives')
+    restore_parser.add_argument('archives', nargs='+', help='paths of archives')
+    restore_parser.set_defaults(handler=restore)
+
+    args = parser.parse_args()
+
+    engine = create_engine(DSN.format(**config['db']['postgres']))
+    connection = engine.raw_connection()
+    try:
+        args.handler(connection.cursor(), connection, args)
+    except ValueError as error:
+        parser.exit(1, f'{error}\n')
+    finally:
+        connection.close()
@@ -0,0 +1,60 @@
+# Shared fixtures of tests
+import asyncio
+import copy
+import inspect
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from api import create_app
+from app.settings import config
+from memory_data_service import memory_context
+
+
+@pytest.fixture
+def event_loop() -> asyncio.AbstractEventLoop:
+    """Event loop shared by coroutine test and its fixtures."""
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    loop.run_until_complete(loop.shutdown_asyncgens())
+    asyncio.set_event_loop(None)
+    loop.close()
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem: pytest.Function):
+    """Run coroutine test functions on event loop of their fixtures or on a new one."""
+    if not inspect.iscoroutinefunction(pyfuncitem.obj):
+        return None
+    arguments = {name: pyfuncitem.funcargs[name] for name in inspect.signature(pyfuncitem.obj).parameters}
+    loop = pyfuncitem.funcargs.get('event_loop')
+    if loop is None:
+        asyncio.run(pyfuncitem.obj(**arguments))
+    else:
+        loop.run_until_complete(pyfuncitem.obj(**arguments))
+    return True
+
+
+@pytest.fixture
+def app_config() -> dict:
+    """Config of application under test, tests may change it before they request client."""
+    app_config = copy.deepcopy(config)
+    # Changes are not shared with other processes
+    app_config.pop('change_feed', None)
+    return app_config
+
+
+@pytest.fixture
+def client(event_loop: asyncio.AbstractEventLoop, app_config: dict) -> TestClient:
+    """Client of application served by in-memory data service."""
+    client = event_loop.run_until_complete(_serve(create_app(app_config, memory_context)))
+    yield client
+    event_loop.run_until_complete(client.close())
+
+
+async def _serve(app: web.Application) -> TestClient:
+    client = TestClient(TestServer(app))
+    await client.start_server()
+    return client
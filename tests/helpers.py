@@ -0,0 +1,17 @@
+# Helpers of tests of web application
+from aiohttp.test_utils import TestClient
+
+
+async def create_questions(client: TestClient, *questions: dict) -> list:
+    """Create questions through API and get them with their choices."""
+    response = await client.post('/questions', json=list(questions))
+    assert response.status == 200
+    return await response.json()
+
+
+async def vote(client: TestClient, question_id: int, choice_id: int, times: int = 1):
+    """Vote for choice through API and write buffered votes to data service."""
+    for _ in range(times):
+        response = await client.post(f'/questions/{question_id}/choices/{choice_id}/vote')
+        assert response.status == 202
+    await client.app['vote_buffer'].flush()
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from api.admission import Limiter, Overloaded
+
+
+async def test_admits_up_to_concurrency_right_away():
+    limiter = Limiter(concurrency=2, queue_size=1)
+    deadline = asyncio.get_running_loop().time() + 1
+    await limiter.acquire(deadline)
+    await limiter.acquire(deadline)
+    assert (limiter.active, limiter.admitted, limiter.queue_depth) == (2, 2, 0)
+
+
+async def test_sheds_when_queue_is_full():
+    limiter = Limiter(concurrency=1, queue_size=1)
+    deadline = asyncio.get_running_loop().time() + 1
+    await limiter.acquire(deadline)
+    waiting = asyncio.create_task(limiter.acquire(deadline))
+    await asyncio.sleep(0)
+    assert limiter.queue_depth == 1
+
+    with pytest.raises(Overloaded) as error:
+        await limiter.acquire(deadline)
+    assert error.value.reason == 'queue_full'
+    assert limiter.shed == {'queue_full': 1, 'deadline': 0}
+
+    limiter.release()
+    await waiting
+    assert (limiter.active, limiter.admitted, limiter.queue_depth) == (1, 2, 0)
+
+
+async def test_sheds_when_expected_wait_exceeds_deadline():
+    limiter = Limiter(concurrency=1, queue_size=10)
+    limiter.service_time = 10.0
+    loop = asyncio.get_running_loop()
+    await limiter.acquire(loop.time() + 1)
+
+    with pytest.raises(Overloaded) as error:
+        await limiter.acquire(loop.time() + 1)
+    assert error.value.reason == 'deadline'
+    assert limiter.queue_depth == 0
+
+
+async def test_sheds_waiter_reaching_deadline():
+    limiter = Limiter(concurrency=1, queue_size=10)
+    loop = asyncio.get_running_loop()
+    await limiter.acquire(loop.time() + 1)
+
+    with pytest.raises(Overloaded) as error:
+        await limiter.acquire(loop.time() + 0.01)
+    assert error.value.reason == 'deadline'
+    assert limiter.queue_depth == 0
+
+    # Slot is kept by its holder and becomes free on release
+    limiter.release()
+    assert (limiter.active, limiter.admitted) == (0, 1)
+
+
+async def test_release_hands_slot_over_to_waiters_in_order():
+    limiter = Limiter(concurrency=1, queue_size=10)
+    deadline = asyncio.get_running_loop().time() + 1
+    await limiter.acquire(deadline)
+    first = asyncio.create_task(limiter.acquire(deadline))
+    second = asyncio.create_task(limiter.acquire(deadline))
+    await asyncio.sleep(0)
+
+    limiter.release()
+    await first
+    assert not second.done()
+    assert (limiter.active, limiter.queue_depth) == (1, 1)
+
+    limiter.release()
+    await second
+    limiter.release()
+    assert (limiter.active, limiter.admitted, limiter.queue_depth) == (0, 3, 0)
+
+
+async def test_release_skips_cancelled_waiters():
+    limiter = Limiter(concurrency=1, queue_size=10)
+    deadline = asyncio.get_running_loop().time() + 1
+    await limiter.acquire(deadline)
+    cancelled = asyncio.create_task(limiter.acquire(deadline))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+
+    limiter.release()
+    assert (limiter.active, limiter.admitted, limiter.queue_depth) == (0, 1, 0)
+
+
+def test_release_updates_service_time_average():
+    limiter = Limiter(concurrency=1, queue_size=1)
+    limiter.active = 2
+    limiter.release(service_time=1.0)
+    limiter.release(service_time=1.0)
+    assert limiter.service_time == pytest.approx(0.19)
+    assert limiter.active == 0
@@ -0,0 +1,64 @@
+import pytest
+
+from common.constants import MAX_BULK_UPDATE_SIZE, MAX_ID
+from tests.helpers import create_questions
+
+
+async def _create(client) -> list:
+    questions = await create_questions(
+        client, {'question_text': 'Tea or coffee?', 'pub_date': '2024-01-01'}, {'question_text': 'Cats or dogs?'},
+    )
+    return [question['id'] for question in questions]
+
+
+async def test_questions_are_updated(client):
+    tea, cats = await _create(client)
+
+    response = await client.patch('/questions', json=[
+        {'id': tea, 'changes': {'question_text': 'Tea?', 'pub_date': '2024-02-01'}},
+        {'id': cats, 'changes': {'question_text': 'Cats?'}},
+    ])
+    assert response.status == 200
+    updated = {question['id']: question for question in await response.json()}
+    assert updated[tea]['question_text'] == 'Tea?' and updated[tea]['pub_date'] == '2024-02-01'
+    assert updated[cats]['question_text'] == 'Cats?'
+
+    question = await (await client.get(f'/questions/{tea}')).json()
+    assert question['question_text'] == 'Tea?'
+
+
+async def test_unknown_questions_are_not_updated(client):
+    tea, _ = await _create(client)
+
+    response = await client.patch('/questions', json=[{'id': tea + 100, 'changes': {'question_text': 'Tea?'}}])
+    assert response.status == 200
+    assert await response.json() == []
+
+
+@pytest.mark.parametrize('body', (
+    {'id': 1, 'changes': {'question_text': 'Tea?'}},
+    [{'id': 1, 'changes': {'question_text': 'Tea?'}}] * (MAX_BULK_UPDATE_SIZE + 1),
+    ['Tea?'],
+    [{'changes': {'question_text': 'Tea?'}}],
+    *([{'id': question_id, 'changes': {'question_text': 'Tea?'}}] for question_id in (0, MAX_ID + 1, '1', 1.0, True)),
+    [{'id': 1, 'changes': {'question_text': 'Tea?'}}, {'id': 1, 'changes': {'question_text': 'Coffee?'}}],
+    *([{'id': 1, 'changes': changes}] for changes in (None, {}, ['question_text'], {'id': 2})),
+    *([{'id': 1, 'changes': {'question_text': text}}] for text in ('', 'x' * 201, 1)),
+    *([{'id': 1, 'changes': {'pub_date': pub_date}}] for pub_date in ('tomorrow', 20240101)),
+))
+async def test_invalid_changes_are_rejected_as_a_whole(client, body):
+    tea, _ = await _create(client)
+
+    # Valid change of the same batch is not applied either
+    if isinstance(body, list) and len(body) < MAX_BULK_UPDATE_SIZE:
+        body = [{'id': tea + 1, 'changes': {'question_text': 'Changed?'}}, *body]
+    response = await client.patch('/questions', json=body)
+    assert response.status == 400
+
+    questions = await (await client.get('/questions')).json()
+    assert [question['question_text'] for question in questions] == ['Tea or coffee?', 'Cats or dogs?']
+
+
+async def test_malformed_body_is_rejected(client):
+    response = await client.patch('/questions', data=b'[{"id": 1', headers={'Content-Type': 'application/json'})
+    assert response.status == 400
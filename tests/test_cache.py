@@ -0,0 +1,87 @@
+import pytest
+
+from modules.data_service import cache as cache_module
+from modules.data_service.cache import ANY_SCOPE, MISSING, QueryCache
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(cache_module, 'time', clock)
+    return clock
+
+
+def test_gets_cached_value(clock):
+    cache = QueryCache()
+    cache.set('key', 'value', tags=())
+    assert cache.get('key') == 'value'
+    assert cache.get('other') is MISSING
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_expires_value_after_ttl(clock):
+    cache = QueryCache(ttl=5.0)
+    cache.set('key', 'value', tags=(('question', 1),))
+    clock.now = 5.0
+    assert cache.get('key') == 'value'
+    clock.now = 5.1
+    assert cache.get('key') is MISSING
+    assert cache.stats == {'size': 0, 'hits': 1, 'misses': 1, 'evictions': 1, 'invalidations': 0}
+
+
+def test_evicts_least_recently_used_value(clock):
+    cache = QueryCache(maxsize=2)
+    cache.set('a', 1, tags=())
+    cache.set('b', 2, tags=())
+    assert cache.get('a') == 1
+    cache.set('c', 3, tags=())
+    assert cache.get('b') is MISSING
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert cache.evictions == 1
+
+
+def test_invalidates_entries_of_changed_scopes_and_any_scope(clock):
+    cache = QueryCache()
+    cache.set('question 1', 1, tags=(('question', 1),))
+    cache.set('question 2', 2, tags=(('question', 2),))
+    cache.set('questions', [1, 2], tags=(('question', ANY_SCOPE),))
+    cache.set('choices of 1', [], tags=(('choice', 1),))
+
+    cache.invalidate('question', scopes=(1,))
+    assert cache.get('question 1') is MISSING
+    assert cache.get('questions') is MISSING
+    assert cache.get('question 2') == 2
+    assert cache.get('choices of 1') == []
+    assert cache.invalidations == 2
+
+    cache.invalidate('question')
+    assert cache.get('question 2') is MISSING
+    assert cache.get('choices of 1') == []
+
+
+def test_drops_value_read_before_invalidation(clock):
+    cache = QueryCache()
+    generation = cache.generation
+    cache.invalidate('question', scopes=(1,))
+    cache.set('question 1', 1, tags=(('question', 1),), generation=generation)
+    assert cache.get('question 1') is MISSING
+
+    cache.set('question 1', 1, tags=(('question', 1),), generation=cache.generation)
+    assert cache.get('question 1') == 1
+
+
+def test_replaced_value_loses_its_previous_tags(clock):
+    cache = QueryCache()
+    cache.set('key', 1, tags=(('question', 1),))
+    cache.set('key', 2, tags=(('question', 2),))
+    cache.invalidate('question', scopes=(1,))
+    assert cache.get('key') == 2
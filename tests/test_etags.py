@@ -0,0 +1,60 @@
+import pytest
+
+from tests.helpers import create_questions, vote
+
+QUESTION = {'question_text': 'Tea or coffee?', 'choices': [{'choice_text': 'Tea'}, {'choice_text': 'Coffee'}]}
+
+
+async def _etag(client, path: str) -> str:
+    response = await client.get(path)
+    assert response.status == 200
+    return response.headers['ETag']
+
+
+@pytest.mark.parametrize('path', ('/questions', '/questions?expand=choices', '/questions/{id}?expand=choices'))
+@pytest.mark.parametrize('if_none_match', ('{etag}', 'W/"other", {etag}', '*'))
+async def test_unchanged_representation_is_not_modified(client, path, if_none_match):
+    question, = await create_questions(client, QUESTION)
+    path = path.format(id=question['id'])
+    etag = await _etag(client, path)
+
+    response = await client.get(path, headers={'If-None-Match': if_none_match.format(etag=etag)})
+    assert response.status == 304
+    assert response.headers['ETag'] == etag
+    assert await response.read() == b''
+
+
+async def test_other_etag_is_modified(client):
+    await create_questions(client, QUESTION)
+
+    response = await client.get('/questions', headers={'If-None-Match': 'W/"other"'})
+    assert response.status == 200
+
+
+async def test_list_etag_changes_with_questions(client):
+    await create_questions(client, QUESTION)
+    etag = await _etag(client, '/questions')
+
+    await create_questions(client, QUESTION)
+    assert await _etag(client, '/questions') != etag
+
+
+async def test_question_etag_changes_only_with_data_it_is_built_from(client):
+    tea, other = await create_questions(client, QUESTION, QUESTION)
+    paths = [f'/questions/{tea["id"]}', f'/questions/{tea["id"]}?expand=choices']
+    etags = [await _etag(client, path) for path in paths]
+
+    # Votes change choices of question only
+    await vote(client, tea['id'], tea['choices'][0]['id'])
+    changed_etags = [await _etag(client, path) for path in paths]
+    assert changed_etags[0] == etags[0] and changed_etags[1] != etags[1]
+    etags = changed_etags
+
+    # Votes for choices of other questions do not change representations of question
+    await vote(client, other['id'], other['choices'][0]['id'])
+    assert [await _etag(client, path) for path in paths] == etags
+
+    response = await client.patch('/questions', json=[{'id': tea['id'], 'changes': {'question_text': 'Tea?'}}])
+    assert response.status == 200
+    changed_etags = [await _etag(client, path) for path in paths]
+    assert all(changed_etag != etag for changed_etag, etag in zip(changed_etags, etags))
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from tests.helpers import create_questions
+
+QUESTION = {'question_text': 'Tea or coffee?', 'choices': [{'choice_text': 'Tea'}, {'choice_text': 'Coffee'}]}
+
+
+async def test_only_requested_fields_of_questions_are_returned(client):
+    await create_questions(client, QUESTION)
+
+    questions = await (await client.get('/questions?fields=id,question_text')).json()
+    assert [set(question) for question in questions] == [{'id', 'question_text'}]
+
+
+async def test_only_requested_fields_of_expanded_relation_are_returned(client):
+    question, = await create_questions(client, QUESTION)
+
+    response = await client.get('/questions?expand=choices&fields[choices]=choice_text,votes')
+    assert response.status == 200
+    questions = await response.json()
+    assert set(questions[0]) == {'id', 'question_text', 'pub_date', 'choices'}
+    assert questions[0]['choices'] == [{'choice_text': 'Tea', 'votes': 0}, {'choice_text': 'Coffee', 'votes': 0}]
+
+
+async def test_fields_of_question_and_relation_are_combined(client):
+    await create_questions(client, QUESTION)
+
+    questions = await (await client.get('/questions?expand=choices&fields=id&fields[choices]=votes')).json()
+    assert questions == [{'id': questions[0]['id'], 'choices': [{'votes': 0}, {'votes': 0}]}]
+
+
+@pytest.mark.parametrize('stream', ('json', 'ndjson'))
+async def test_streamed_questions_have_requested_fields(client, stream):
+    await create_questions(client, QUESTION, QUESTION)
+    query = 'expand=choices&fields=question_text&fields[choices]=choice_text'
+    page = await (await client.get(f'/questions?{query}')).json()
+
+    body = await (await client.get(f'/questions?{query}&stream={stream}')).text()
+    streamed = json.loads(body) if stream == 'json' else [json.loads(line) for line in body.splitlines()]
+    assert streamed == page
+    assert streamed[0] == {
+        'question_text': 'Tea or coffee?', 'choices': [{'choice_text': 'Tea'}, {'choice_text': 'Coffee'}],
+    }
+
+
+async def test_representations_with_different_fields_have_different_etags(client):
+    await create_questions(client, QUESTION)
+
+    etags = {(await client.get(f'/questions?fields={fields}')).headers['ETag'] for fields in ('id', 'question_text')}
+    assert len(etags) == 2
+
+
+@pytest.mark.parametrize('query', (
+    'fields=unknown', 'fields=id,votes', 'fields[choices]=votes', 'expand=choices&fields[choices]=pub_date',
+    'expand=choices&fields[question]=id',
+))
+async def test_unsupported_fields_are_rejected(client, query):
+    response = await client.get(f'/questions?{query}')
+    assert response.status == 400
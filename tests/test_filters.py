@@ -0,0 +1,78 @@
+import sys
+
+import pytest
+
+from common.constants import MAX_ID, MAX_PAGE_SIZE
+from modules.data_service.filters import Filter, Prefix
+from tests.helpers import create_questions
+
+LARGEST = chr(sys.maxunicode)
+
+
+def test_filter_is_abstract():
+    with pytest.raises(TypeError):
+        Filter()
+
+
+def test_prefix_is_not_empty():
+    with pytest.raises(ValueError):
+        Prefix('')
+
+
+@pytest.mark.parametrize('prefix, upper_bound', (
+    ('What', 'Whau'),
+    ('a', 'b'),
+    ('é', 'ê'),
+    # Surrogates are skipped
+    ('x퟿', 'x'),
+    # The largest code points are dropped
+    ('ab' + LARGEST, 'ac'),
+    ('a' + LARGEST * 2, 'b'),
+))
+def test_prefix_params_bound_texts_starting_with_prefix(prefix, upper_bound):
+    params = Prefix(prefix).params('c_question_text')
+    assert params == {'c_question_text_from': prefix, 'c_question_text_to': upper_bound}
+
+
+def test_prefix_of_largest_code_points_has_no_upper_bound():
+    prefix = Prefix(LARGEST * 2)
+    assert prefix.params('c') == {'c_from': LARGEST * 2}
+    assert prefix.shape != Prefix('a').shape
+
+
+def test_prefix_matches():
+    prefix = Prefix('Wh')
+    assert prefix.matches('What')
+    assert not prefix.matches('W')
+
+
+async def _create(client) -> list:
+    return await create_questions(
+        client,
+        {'question_text': 'What is new?', 'pub_date': '2024-01-01'},
+        {'question_text': 'Where to go?', 'pub_date': '2024-02-01'},
+        {'question_text': 'What to eat?', 'pub_date': '2024-03-01'},
+    )
+
+
+async def _get_ids(client, query: str) -> list:
+    response = await client.get(f'/questions?{query}')
+    assert response.status == 200
+    return [question['id'] for question in await response.json()]
+
+
+async def test_questions_are_filtered_and_ordered(client):
+    new, where, eat = (question['id'] for question in await _create(client))
+    assert await _get_ids(client, f'id={eat},{new}') == [new, eat]
+    assert await _get_ids(client, 'question_text_prefix=What') == [new, eat]
+    assert await _get_ids(client, 'question_text_prefix=What&order=-pub_date') == [eat, new]
+    assert await _get_ids(client, 'order=question_text') == [new, eat, where]
+
+
+@pytest.mark.parametrize('query', (
+    'id=1,a', 'id=0', f'id=1,{MAX_ID + 1}', 'id=' + ','.join(['1'] * (MAX_PAGE_SIZE + 1)),
+    'pub_date_from=yesterday', 'order=votes',
+))
+async def test_invalid_filters_are_rejected(client, query):
+    response = await client.get(f'/questions?{query}')
+    assert response.status == 400
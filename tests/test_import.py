@@ -0,0 +1,76 @@
+import asyncio
+import json
+from unittest import mock
+
+import pytest
+from aiohttp import web
+from aiohttp.streams import StreamReader
+
+from api.views import QuestionImport
+from common.constants import MAX_ID
+from modules.data_service.polls import MAX_QUERY_PARAMS
+
+QUESTION = {'question_text': 'Tea or coffee?', 'pub_date': '2024-01-01', 'choices': [{'choice_text': 'Tea'}]}
+
+
+def _ndjson(*questions) -> bytes:
+    return b''.join(json.dumps(question).encode() + b'\n' for question in questions)
+
+
+async def test_questions_are_imported_with_choices(client):
+    body = _ndjson(QUESTION, {'question_text': 'Why?', 'choices': [{'choice_text': 'Because', 'votes': 3}]})
+    response = await client.post('/questions/import', data=b'\n' + body)
+    assert response.status == 200
+    assert await response.json() == {'imported': 2}
+
+    questions = await (await client.get('/questions?expand=choices&fields[choices]=choice_text,votes')).json()
+    assert [(question['question_text'], question['choices']) for question in questions] == [
+        ('Tea or coffee?', [{'choice_text': 'Tea', 'votes': 0}]),
+        ('Why?', [{'choice_text': 'Because', 'votes': 3}]),
+    ]
+
+
+@pytest.mark.parametrize('question', (
+    {'pub_date': '2024-01-01'},
+    {'question_text': None},
+    {'question_text': 42},
+    {'question_text': ''},
+    {'question_text': 'x' * 201},
+    {'question_text': 'Why?', 'pub_date': 'yesterday'},
+    {'question_text': 'Why?', 'choices': [{'choice_text': None}]},
+    {'question_text': 'Why?', 'choices': [{'choice_text': 'x' * 201}]},
+    {'question_text': 'Why?', 'choices': [{'choice_text': 'Because', 'votes': -1}]},
+    {'question_text': 'Why?', 'choices': [{'choice_text': 'Because', 'votes': MAX_ID + 1}]},
+    {'question_text': 'Why?', 'choices': 'Because'},
+    ['Why?'],
+))
+async def test_invalid_question_is_rejected_with_its_line(client, question):
+    response = await client.post('/questions/import', data=_ndjson(QUESTION, question))
+    assert response.status == 400
+    assert response.reason.startswith('Invalid question on line 2')
+
+
+async def test_malformed_line_is_rejected(client):
+    response = await client.post('/questions/import', data=_ndjson(QUESTION) + b'{"question_text": \n')
+    assert response.status == 400
+    assert response.reason.startswith('Invalid question on line 2')
+
+
+async def test_too_long_line_is_rejected():
+    content = StreamReader(mock.Mock(_reading_paused=False), 16, loop=asyncio.get_running_loop())
+    content.feed_data(_ndjson({'question_text': 'Why?'}) + b'x' * 100 + b'\n')
+    content.feed_eof()
+    view = QuestionImport(mock.Mock(content=content))
+
+    questions = view._read_questions()
+    assert (await questions.__anext__())['question_text'] == 'Why?'
+    with pytest.raises(web.HTTPBadRequest) as error:
+        await questions.__anext__()
+    assert error.value.reason == 'Line 2 is too long'
+
+
+async def test_batches_fit_into_parameters_of_statement(client):
+    data_service = client.app['polls_data_service']
+    with mock.patch.object(data_service, '_import_questions', mock.AsyncMock(return_value=0)) as import_questions:
+        await data_service.import_questions(questions=mock.Mock(), batch_size=100000)
+    assert import_questions.call_args.kwargs['batch_size'] * 3 <= MAX_QUERY_PARAMS
@@ -0,0 +1,83 @@
+import io
+
+import pytest
+
+from init_db import seed_data
+
+
+class Cursor:
+    """DB-API cursor of empty database keeping data copied into it."""
+
+    def __init__(self):
+        self.copied = []
+
+    def execute(self, statement):
+        pass
+
+    def fetchone(self):
+        return 0,
+
+    def copy_expert(self, statement, data: io.StringIO):
+        self.copied.append((statement, data.getvalue()))
+
+
+class Engine:
+
+    def __init__(self):
+        self.copying_cursor = Cursor()
+
+    def raw_connection(self):
+        return self
+
+    def cursor(self) -> Cursor:
+        return self.copying_cursor
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _seed(**options) -> list:
+    engine = Engine()
+    seed_data(engine, **options)
+    return engine.copying_cursor.copied
+
+
+def _rows(copied, table):
+    return [
+        row.split('\t')
+        for statement, data in copied if statement.startswith(f'COPY {table} ')
+        for row in data.splitlines()
+    ]
+
+
+def test_the_same_seed_produces_the_same_data():
+    options = {'questions': 200, 'days': 30, 'batch_size': 64}
+    assert _seed(seed=7, **options) == _seed(seed=7, **options)
+    assert _seed(seed=7, **options) != _seed(seed=8, **options)
+
+
+def test_batches_do_not_change_data():
+    copied, batched = _seed(questions=100, seed=3, batch_size=100), _seed(questions=100, seed=3, batch_size=7)
+    for table in ('question', 'choice'):
+        assert _rows(copied, table) == _rows(batched, table)
+
+
+def test_generated_data_follows_options():
+    copied = _seed(questions=300, min_choices=2, max_choices=4, votes_per_question=10, days=10, seed=1)
+    questions, choices = _rows(copied, 'question'), _rows(copied, 'choice')
+    assert [int(question_id) for question_id, _, _ in questions] == list(range(1, 301))
+
+    pub_dates = {int(question_id): pub_date for question_id, _, pub_date in questions}
+    choice_counts = {}
+    for _, _, votes, question_id, pub_date in choices:
+        choice_counts[int(question_id)] = choice_counts.get(int(question_id), 0) + 1
+        assert pub_date == pub_dates[int(question_id)]
+        assert int(votes) >= 0
+    assert set(choice_counts) == set(pub_dates)
+    assert all(2 <= count <= 4 for count in choice_counts.values())
+    assert len(set(pub_dates.values())) <= 10
+    # Stochastic rounding keeps total votes close to expected
+    assert sum(int(votes) for _, _, votes, _, _ in choices) == pytest.approx(3000, rel=0.05)
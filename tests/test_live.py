@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+from aiohttp import ClientResponse
+
+from common.constants import MAX_ID
+from modules.data_service.live import Subscription
+from tests.helpers import create_questions, vote
+
+QUESTION = {
+    'question_text': 'Tea or coffee?',
+    'pub_date': '2024-01-01',
+    'choices': [{'choice_text': 'Tea'}, {'choice_text': 'Coffee'}],
+}
+
+
+@pytest.fixture
+def app_config(app_config: dict) -> dict:
+    app_config['live'] = {'tick_interval': 0.01, 'queue_size': 16, 'keepalive_interval': 15}
+    return app_config
+
+
+async def _read_event(response: ClientResponse) -> bytes:
+    """Read the next server-sent event including its terminating blank line."""
+    event = b''
+    while not event.endswith(b'\n\n'):
+        line = await asyncio.wait_for(response.content.readline(), timeout=5)
+        assert line, 'stream ended'
+        event += line
+    return event
+
+
+async def test_stream_starts_with_snapshot_and_pushes_votes(client):
+    question, = await create_questions(client, QUESTION)
+    tea, coffee = (choice['id'] for choice in question['choices'])
+
+    async with client.get(f'/questions/{question["id"]}/live') as response:
+        assert response.status == 200
+        assert response.headers['Content-Type'] == 'text/event-stream'
+        snapshot = await _read_event(response)
+        assert snapshot.startswith(b'event: snapshot\ndata: {"question_id":%d,' % question['id'])
+        assert b'"total_votes":0' in snapshot
+
+        await vote(client, question['id'], coffee, times=2)
+        assert await _read_event(response) == (
+            b'event: delta\ndata: {"question_id":%d,"votes":{"%d":2}}\n\n' % (question['id'], coffee)
+        )
+
+
+async def test_stream_ends_when_question_is_deleted(client):
+    question, = await create_questions(client, QUESTION)
+
+    async with client.get(f'/questions/{question["id"]}/live') as response:
+        await _read_event(response)
+        assert (await client.delete(f'/questions/{question["id"]}')).status == 204
+        assert await _read_event(response) == b'event: deleted\ndata: {"question_id":%d}\n\n' % question['id']
+        assert await asyncio.wait_for(response.content.read(), timeout=5) == b''
+    assert client.app['live_results'].stats['subscribers'] == 0
+
+
+@pytest.mark.parametrize('question_id', ('404', 'abc', str(MAX_ID + 1)))
+async def test_stream_of_unknown_question_is_not_found(client, question_id):
+    response = await client.get(f'/questions/{question_id}/live')
+    assert response.status == 404
+
+
+async def test_subscriber_falling_behind_is_resynchronized():
+    subscription = Subscription(question_id=1, queue_size=2)
+    subscription.resync = False
+    assert subscription.offer(b'first')
+    assert subscription.offer(b'second')
+    assert not subscription.offer(b'third')
+    assert subscription.resync
+
+    subscription.close(b'final')
+    assert [await subscription.get(), await subscription.get()] == [b'final', None]
@@ -0,0 +1,63 @@
+from common.metrics import Histogram, render_family
+from tests.helpers import create_questions
+
+QUESTION = {'question_text': 'Tea or coffee?', 'choices': [{'choice_text': 'Tea'}, {'choice_text': 'Coffee'}]}
+
+
+def _samples(text: str) -> dict:
+    return dict(line.rsplit(' ', 1) for line in text.splitlines() if line and not line.startswith('#'))
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram(buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 2):
+        histogram.observe(value)
+
+    assert histogram.snapshot() == {'buckets': {'0.1': 2, '1': 3, '+Inf': 4}, 'sum': 2.65, 'count': 4}
+
+
+def test_family_is_rendered_with_escaped_labels():
+    histogram = Histogram(buckets=(1,))
+    histogram.observe(0.5)
+    samples = [({'route': 'a"b\\c\nd'}, 3), ({'route': '/'}, histogram)]
+
+    assert list(render_family('polls_test', 'histogram', 'Test.', samples)) == [
+        '# HELP polls_test Test.',
+        '# TYPE polls_test histogram',
+        'polls_test{route="a\\"b\\\\c\\nd"} 3',
+        'polls_test_bucket{route="/",le="1"} 1',
+        'polls_test_bucket{route="/",le="+Inf"} 1',
+        'polls_test_sum{route="/"} 0.5',
+        'polls_test_count{route="/"} 1',
+    ]
+
+
+async def test_requests_are_recorded_by_route_method_and_status(client):
+    question, = await create_questions(client, QUESTION)
+    await client.get(f'/questions/{question["id"]}')
+    await client.get(f'/questions/{question["id"]}')
+    await client.get('/questions/1/results/unknown')
+
+    response = await client.get('/metrics')
+    assert response.status == 200
+    assert response.content_type == 'text/plain'
+    samples = _samples(await response.text())
+
+    single = 'route="/questions/{question_id}",method="GET"'
+    assert samples[f'polls_http_responses_total{{{single},status="200"}}'] == '2'
+    assert samples[f'polls_http_request_duration_seconds_count{{{single}}}'] == '2'
+    assert samples[f'polls_http_request_serialization_duration_seconds_count{{{single}}}'] == '2'
+    assert samples['polls_http_responses_total{route="/questions",method="POST",status="200"}'] == '1'
+    assert samples['polls_http_responses_total{route="unmatched",method="GET",status="404"}'] == '1'
+    # Request for metrics is being handled while they are rendered
+    assert samples['polls_http_requests_in_flight{route="/metrics",method="GET"}'] == '1'
+    assert 'polls_live_subscribers' in samples
+
+
+async def test_unknown_methods_share_series(client):
+    for method in ('PURGE', 'PROPFIND'):
+        await client.request(method, '/questions')
+
+    samples = _samples(await (await client.get('/metrics')).text())
+    assert samples['polls_http_responses_total{route="/questions",method="OTHER",status="405"}'] == '2'
+    assert not any('PURGE' in sample or 'PROPFIND' in sample for sample in samples)
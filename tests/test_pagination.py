@@ -0,0 +1,53 @@
+import json
+
+import pytest
+from yarl import URL
+
+from common.constants import MAX_ID
+from tests.helpers import create_questions
+
+
+async def _create(client, count: int) -> list:
+    questions = await create_questions(
+        client, *({'question_text': f'Question {number}?', 'pub_date': '2024-01-01'} for number in range(count))
+    )
+    return [question['id'] for question in questions]
+
+
+async def test_pages_are_linked_by_last_id(client):
+    ids = await _create(client, 5)
+
+    pages, path = [], '/questions?limit=2'
+    while path:
+        response = await client.get(path)
+        assert response.status == 200
+        pages.append([question['id'] for question in await response.json()])
+        link = response.links.get('next')
+        path = str(URL(str(link['url'])).relative()) if link else None
+    assert pages == [ids[:2], ids[2:4], ids[4:]]
+
+
+async def test_page_after_id(client):
+    ids = await _create(client, 5)
+    response = await client.get(f'/questions?after_id={ids[1]}&limit=2')
+    assert [question['id'] for question in await response.json()] == ids[2:4]
+
+
+@pytest.mark.parametrize('stream', ('json', 'ndjson'))
+async def test_streamed_questions_match_page(client, stream):
+    await _create(client, 3)
+    page = await (await client.get('/questions?expand=choices')).json()
+
+    response = await client.get(f'/questions?expand=choices&stream={stream}')
+    assert response.status == 200
+    body = await response.text()
+    streamed = json.loads(body) if stream == 'json' else [json.loads(line) for line in body.splitlines()]
+    assert streamed == page
+
+
+@pytest.mark.parametrize('query', (
+    'after_id=-1', f'after_id={MAX_ID + 1}', 'after_id=abc', 'limit=0', 'after_id=1&order=pub_date', 'stream=xml',
+))
+async def test_invalid_pagination_is_rejected(client, query):
+    response = await client.get(f'/questions?{query}')
+    assert response.status == 400
@@ -0,0 +1,43 @@
+import datetime
+
+import pytest
+
+from connectors.db.partitions import Partition, partitions_between
+
+
+def test_partition_names_and_bounds():
+    partition = Partition(datetime.date(2019, 1, 1), datetime.date(2020, 1, 1))
+    assert partition.suffix == 'p20190101_20200101'
+    assert partition.table('choice') == 'choice_p20190101_20200101'
+    assert partition.bounds == "FROM ('2019-01-01') TO ('2020-01-01')"
+
+
+def test_parse_partition_suffix():
+    partition = Partition(datetime.date(2019, 12, 1), datetime.date(2020, 1, 1))
+    assert Partition.parse(partition.suffix) == partition
+
+
+@pytest.mark.parametrize('suffix', ('default', 'p20190101', 'p20190101_20200101.zip', 'p20191301_20200101'))
+def test_parse_rejects_other_names(suffix):
+    with pytest.raises(ValueError):
+        Partition.parse(suffix)
+
+
+def test_yearly_partitions_cover_dates():
+    partitions = list(partitions_between(datetime.date(2019, 6, 15), datetime.date(2021, 1, 1)))
+    assert [partition.suffix for partition in partitions] == [
+        'p20190101_20200101', 'p20200101_20210101', 'p20210101_20220101',
+    ]
+
+
+def test_monthly_partitions_cover_dates_across_year():
+    partitions = list(partitions_between(datetime.date(2019, 11, 30), datetime.date(2020, 1, 31), 'month'))
+    assert [partition.suffix for partition in partitions] == [
+        'p20191101_20191201', 'p20191201_20200101', 'p20200101_20200201',
+    ]
+
+
+def test_partitions_are_contiguous():
+    partitions = list(partitions_between(datetime.date(2015, 1, 1), datetime.date(2024, 12, 31), 'month'))
+    assert len(partitions) == 120
+    assert all(previous.upper == following.lower for previous, following in zip(partitions, partitions[1:]))
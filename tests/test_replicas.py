@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from modules.data_service.cache import QueryCache
+from modules.data_service.models import Question
+from modules.data_service.polls import PollsDataService
+
+EJECT_SECONDS = 0.05
+
+
+@pytest.fixture
+def data_service(event_loop):
+    # Every subclass has its own instance and engines, which connect to database only once they are used
+    service_class = type('ReplicatedPollsDataService', (PollsDataService,), {})
+    data_service = service_class(
+        host='127.0.0.1', port=5432, database='polls', user='polls', password='polls',
+        replicas=[{'port': 5433}, {'port': 5434}], replica_eject_seconds=EJECT_SECONDS, replica_lag=60,
+        cache=QueryCache(),
+    )
+    data_service.failing = set()
+
+    async def checkout(session):
+        if session.bind in data_service.failing:
+            raise OSError('Connection refused')
+
+    data_service._checkout = checkout
+    yield data_service
+    event_loop.run_until_complete(data_service.close_pool())
+
+
+def _engines(data_service) -> list:
+    return [replica.engine for replica in data_service.replicas]
+
+
+async def _read_engine(data_service, question_id: int = 1):
+    async def read(session):
+        return session.bind
+
+    conditions = {Question.id: question_id}
+    return await data_service._read(('read', question_id), Question, conditions, (), read)
+
+
+async def _transaction_engine(data_service):
+    async with data_service.read_transaction() as session:
+        return session.bind
+
+
+async def test_reads_are_spread_over_replicas(data_service):
+    first, second = _engines(data_service)
+    assert [await _transaction_engine(data_service) for _ in range(4)] == [first, second, first, second]
+
+
+async def test_failing_replica_is_ejected_for_a_while(data_service):
+    first, second = _engines(data_service)
+    data_service.failing.add(first)
+
+    assert [await _transaction_engine(data_service) for _ in range(3)] == [second] * 3
+    assert [replica['ejections'] for replica in data_service.replicas.stats] == [1, 0]
+    assert [replica['available'] for replica in data_service.replicas.stats] == [False, True]
+
+    data_service.failing.clear()
+    await asyncio.sleep(EJECT_SECONDS * 2)
+    assert {await _transaction_engine(data_service) for _ in range(2)} == {first, second}
+
+
+async def test_reads_fall_back_to_primary_without_available_replicas(data_service):
+    data_service.failing.update(_engines(data_service))
+    assert await _transaction_engine(data_service) is data_service._engine
+    assert [replica['ejections'] for replica in data_service.replicas.stats] == [1, 1]
+
+
+async def test_recently_changed_data_is_read_from_primary_and_not_cached(data_service):
+    data_service._register_changes({Question.__tablename__: {1}})
+
+    assert await _read_engine(data_service, question_id=1) is data_service._engine
+    assert await _read_engine(data_service, question_id=2) in _engines(data_service)
+    assert data_service.cache.stats['size'] == 1
+
+    # Once replicas caught up, changed data is read from them and cached again
+    data_service.replica_lag = 0
+    assert await _read_engine(data_service, question_id=1) in _engines(data_service)
+    assert data_service.cache.stats['size'] == 2
+
+
+async def test_lists_are_read_from_primary_after_any_change(data_service):
+    data_service._register_changes({Question.__tablename__: {1}})
+
+    async def read(session):
+        return session.bind
+
+    assert await data_service._read(('list',), Question, None, (), read) is data_service._engine
@@ -0,0 +1,60 @@
+import pytest
+
+from common.constants import MAX_ID
+from tests.helpers import create_questions, vote
+
+QUESTION = {
+    'question_text': 'Tea or coffee?',
+    'pub_date': '2024-01-01',
+    'choices': [{'choice_text': 'Tea'}, {'choice_text': 'Coffee', 'votes': 1}],
+}
+
+
+async def test_results_of_question(client):
+    question, = await create_questions(client, QUESTION)
+    tea, coffee = (choice['id'] for choice in question['choices'])
+
+    response = await client.get(f'/questions/{question["id"]}/results')
+    assert response.status == 200
+    assert await response.json() == {
+        'question_id': question['id'],
+        'question_text': 'Tea or coffee?',
+        'total_votes': 1,
+        'choices': [
+            {'id': tea, 'choice_text': 'Tea', 'votes': 0, 'percentage': 0.0},
+            {'id': coffee, 'choice_text': 'Coffee', 'votes': 1, 'percentage': 100.0},
+        ],
+    }
+
+
+async def test_results_follow_committed_votes(client):
+    question, = await create_questions(client, QUESTION)
+    tea, coffee = (choice['id'] for choice in question['choices'])
+    path = f'/questions/{question["id"]}/results'
+    etag = (await client.get(path)).headers['ETag']
+
+    await vote(client, question['id'], tea, times=2)
+
+    response = await client.get(path, headers={'If-None-Match': etag})
+    assert response.status == 200
+    assert response.headers['ETag'] != etag
+    results = await response.json()
+    assert results['total_votes'] == 3
+    assert [(choice['votes'], choice['percentage']) for choice in results['choices']] == [(2, 66.67), (1, 33.33)]
+    assert client.app['results_summary'].stats['loads'] == 1
+
+
+async def test_unchanged_results_are_not_modified(client):
+    question, = await create_questions(client, QUESTION)
+    path = f'/questions/{question["id"]}/results'
+    etag = (await client.get(path)).headers['ETag']
+
+    response = await client.get(path, headers={'If-None-Match': etag})
+    assert response.status == 304
+
+
+@pytest.mark.parametrize('question_id', ('404', 'abc', '-1', str(MAX_ID + 1)))
+async def test_results_of_unknown_question_are_not_found(client, question_id):
+    await create_questions(client, QUESTION)
+    response = await client.get(f'/questions/{question_id}/results')
+    assert response.status == 404
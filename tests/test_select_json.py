@@ -0,0 +1,53 @@
+import datetime
+from unittest import mock
+
+import pytest
+
+from common.serializers import dumps
+from modules.data_service.models import Question, Choice
+from modules.data_service.polls import PollsDataService
+
+# Pages as PostgreSQL formats output of json_build_object and json_agg
+DATABASE_PAGES = {
+    (): (
+        b'[{"id" : 1, "question_text" : "Tea or coffee?", "pub_date" : "2021-01-02"}, \n '
+        b'{"id" : 2, "question_text" : "Caf\xc3\xa9?", "pub_date" : "2021-01-03"}]'
+    ),
+    (Question.choices,): (
+        b'[{"id" : 1, "question_text" : "Tea or coffee?", "pub_date" : "2021-01-02", "choices" : '
+        b'[{"id" : 1, "choice_text" : "Tea", "votes" : 3, "question_id" : 1}, \n '
+        b'{"id" : 2, "choice_text" : "Coffee", "votes" : 0, "question_id" : 1}]}, \n '
+        b'{"id" : 2, "question_text" : "Caf\xc3\xa9?", "pub_date" : "2021-01-03", "choices" : []}]'
+    ),
+}
+
+
+def _questions():
+    tea = Question(id=1, question_text='Tea or coffee?', pub_date=datetime.date(2021, 1, 2))
+    tea.choices = [
+        Choice(id=1, choice_text='Tea', votes=3, question_id=1, pub_date=tea.pub_date),
+        Choice(id=2, choice_text='Coffee', votes=0, question_id=1, pub_date=tea.pub_date),
+    ]
+    cafe = Question(id=2, question_text='Café?', pub_date=datetime.date(2021, 1, 3))
+    cafe.choices = []
+    return tea, cafe
+
+
+@pytest.fixture
+def data_service(event_loop):
+    # Engine of subclass connects to database only once it is used
+    service_class = type('JsonPollsDataService', (PollsDataService,), {})
+    data_service = service_class(host='127.0.0.1', port=5432, database='polls', user='polls', password='polls')
+    yield data_service
+    event_loop.run_until_complete(data_service.close_pool())
+
+
+@pytest.mark.parametrize('with_relations', DATABASE_PAGES)
+async def test_page_encoded_by_database_is_the_same_as_encoded_in_python(data_service, with_relations):
+    result = mock.Mock(one=mock.Mock(return_value=(DATABASE_PAGES[with_relations], 2, 2)))
+    session = mock.Mock(execute=mock.AsyncMock(return_value=result))
+
+    page = await data_service._get_json(Question, session=session, with_relations=with_relations)
+
+    assert page.payload == dumps(tuple(map(Question.encoder(with_relations), _questions())))
+    assert (page.count, page.last_key) == (2, 2)
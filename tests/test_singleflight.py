@@ -0,0 +1,107 @@
+import asyncio
+import contextvars
+
+import pytest
+
+from common.singleflight import SingleFlight
+
+
+async def test_coalesces_concurrent_calls():
+    flights = SingleFlight()
+    release = asyncio.Event()
+    calls = []
+
+    async def call():
+        calls.append(None)
+        await release.wait()
+        return 'result'
+
+    waiters = [asyncio.create_task(flights.do('key', call)) for _ in range(3)]
+    await asyncio.sleep(0)
+    assert flights.stats == {'in_flight': 1, 'calls': 1, 'coalesced': 2}
+
+    release.set()
+    assert await asyncio.gather(*waiters) == ['result'] * 3
+    assert len(calls) == 1
+    assert flights.stats['in_flight'] == 0
+
+    # Finished call is forgotten, so the next one is executed again
+    assert await flights.do('key', call) == 'result'
+    assert len(calls) == 2
+
+
+async def test_does_not_coalesce_different_keys():
+    flights = SingleFlight()
+
+    async def call(value):
+        await asyncio.sleep(0)
+        return value
+
+    results = await asyncio.gather(flights.do(1, lambda: call(1)), flights.do(2, lambda: call(2)))
+    assert results == [1, 2]
+    assert flights.stats == {'in_flight': 0, 'calls': 2, 'coalesced': 0}
+
+
+async def test_shares_exception():
+    flights = SingleFlight()
+
+    async def call():
+        await asyncio.sleep(0)
+        raise LookupError('failed')
+
+    results = await asyncio.gather(flights.do('key', call), flights.do('key', call), return_exceptions=True)
+    assert [type(result) for result in results] == [LookupError, LookupError]
+
+
+async def test_cancelled_leader_does_not_cancel_call_of_other_waiters():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def call():
+        await release.wait()
+        return 'result'
+
+    leader = asyncio.create_task(flights.do('key', call))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flights.do('key', call))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    release.set()
+    assert await follower == 'result'
+
+
+async def test_call_is_cancelled_when_all_waiters_are_cancelled():
+    flights = SingleFlight()
+    cancelled = asyncio.Event()
+
+    async def call():
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    waiter = asyncio.create_task(flights.do('key', call))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+    assert flights.stats['in_flight'] == 0
+
+
+async def test_call_runs_without_isolated_variables_of_caller():
+    isolated = contextvars.ContextVar('isolated', default=None)
+    shared = contextvars.ContextVar('shared', default=None)
+    flights = SingleFlight(isolated_vars=(isolated,))
+    isolated.set('caller')
+    shared.set('caller')
+
+    async def call():
+        return isolated.get(), shared.get()
+
+    assert await flights.do('key', call) == (None, 'caller')
+    assert isolated.get() == 'caller'
@@ -0,0 +1,105 @@
+import asyncio
+import datetime
+from collections import Counter
+
+import pytest
+from sqlalchemy.exc import DBAPIError
+
+from modules.data_service.votes import VoteBuffer
+
+PUB_DATE = datetime.date(2021, 1, 2)
+
+
+class DataError(Exception):
+    """Error of driver carrying SQLSTATE of error raised by database."""
+
+    def __init__(self, sqlstate: str):
+        super().__init__(sqlstate)
+        self.sqlstate = sqlstate
+
+
+class DataService:
+    """Data service recording increments of votes and rejecting those of given choices."""
+
+    def __init__(self):
+        self.increments = []
+        self.rejected_keys = set()
+        self.error = None
+
+    async def increment_votes(self, deltas: Counter, pub_dates: dict):
+        if self.error:
+            raise self.error
+        if self.rejected_keys & set(deltas):
+            raise DBAPIError('UPDATE choice', None, DataError('22003'))
+        self.increments.append(dict(deltas))
+
+
+@pytest.fixture
+def data_service():
+    return DataService()
+
+
+async def test_votes_are_written_as_one_batch(data_service):
+    buffer = VoteBuffer(data_service)
+    buffer.add(1, 1, PUB_DATE)
+    buffer.add(1, 1, PUB_DATE, count=2)
+    buffer.add(2, 3, PUB_DATE)
+
+    await buffer.flush()
+    await buffer.flush()
+    assert data_service.increments == [{(1, 1): 3, (2, 3): 1}]
+
+
+async def test_rejected_votes_are_dropped_without_holding_back_others(data_service, caplog):
+    buffer = VoteBuffer(data_service)
+    for choice_id in range(1, 6):
+        buffer.add(1, choice_id, PUB_DATE)
+    data_service.rejected_keys.add((1, 4))
+
+    await buffer.flush()
+    written = Counter()
+    for increment in data_service.increments:
+        written.update(increment)
+    assert written == {(1, 1): 1, (1, 2): 1, (1, 3): 1, (1, 5): 1}
+    assert 'Dropped 1 votes for choice (1, 4)' in caplog.text
+
+    # Dropped votes are not retried
+    await buffer.flush()
+    assert sum(written.values()) == sum(sum(increment.values()) for increment in data_service.increments)
+
+
+@pytest.mark.parametrize('error', [
+    ConnectionError('Connection reset'), DBAPIError('UPDATE choice', None, DataError('40001')),
+])
+async def test_votes_are_kept_for_next_flush_if_writing_fails(data_service, error):
+    buffer = VoteBuffer(data_service)
+    buffer.add(1, 1, PUB_DATE)
+    data_service.error = error
+    with pytest.raises(type(error)):
+        await buffer.flush()
+
+    data_service.error = None
+    buffer.add(1, 1, PUB_DATE)
+    await buffer.flush()
+    assert data_service.increments == [{(1, 1): 2}]
+
+
+async def test_votes_are_flushed_once_buffer_is_full(data_service):
+    async with VoteBuffer(data_service, flush_interval=60, flush_size=2) as buffer:
+        buffer.add(1, 1, PUB_DATE)
+        await asyncio.sleep(0.01)
+        assert data_service.increments == []
+
+        buffer.add(1, 2, PUB_DATE)
+        await asyncio.sleep(0.01)
+        assert data_service.increments == [{(1, 1): 1, (1, 2): 1}]
+
+
+async def test_votes_are_flushed_periodically_and_on_close(data_service):
+    async with VoteBuffer(data_service, flush_interval=0.01) as buffer:
+        buffer.add(1, 1, PUB_DATE)
+        await asyncio.sleep(0.05)
+        assert data_service.increments == [{(1, 1): 1}]
+
+        buffer.add(1, 2, PUB_DATE)
+    assert data_service.increments[-1] == {(1, 2): 1}
@@ -0,0 +1,49 @@
+import functools
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+import api
+from api.workers import _serve_worker
+from app.settings import config
+from memory_data_service import memory_context
+
+SHUTDOWN_TIMEOUT = 5
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port: int, timeout: float):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def test_worker_shuts_down_on_sigterm(monkeypatch):
+    monkeypatch.setattr(api, 'create_app', functools.partial(api.create_app, data_context=memory_context))
+    port = _free_port()
+    worker = multiprocessing.get_context('fork').Process(
+        target=_serve_worker, args=(config, 1, '127.0.0.1', port, SHUTDOWN_TIMEOUT)
+    )
+    worker.start()
+    try:
+        _wait_for_port(port, timeout=10)
+        os.kill(worker.pid, signal.SIGTERM)
+        worker.join(SHUTDOWN_TIMEOUT)
+        assert worker.exitcode == 0
+    finally:
+        if worker.is_alive():
+            worker.kill()
+            worker.join()